@@ -0,0 +1,26 @@
+"""
+Serves the graph over HTTP.
+
+    CONFIG_FILE=config/config.anthropic.yaml python main.py --port 8000
+
+Endpoints: `POST /ask` (JSON answer), `POST /ask/stream` (server-sent events per graph
+step, then the answer), `GET /metrics` and `GET /health`. Projects, concurrency and
+queue bounds are configured under `tools.server`.
+"""
+import argparse
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the LaPSUM graph over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    # One worker process: agents, indexes and in-flight coalescing live in its memory
+    uvicorn.run("src.server.app:app", host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Measures wall time and peak RSS of deriving the project lists from the CodeXGLUE Java
+split: the previous path (whole split as a DataFrame, then drop_duplicates) against
+streaming only the `repo` column, and writing data.csv whole against in batches.
+
+Every mode runs in its own process so peak RSS is not shared between them.
+
+    python scripts/benchmark_data_loading.py --split train
+    python scripts/benchmark_data_loading.py --split validation --modes eager_repos streaming_repos
+
+Without access to the Hub, point `--data-dir` at the dataset's Parquet files
+(`<split>-*.parquet`) downloaded elsewhere.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+MODES = ["eager_repos", "streaming_repos", "eager_csv", "streaming_csv"]
+
+
+def run_mode(mode: str, split: str, limit, output_dir: str) -> dict:
+    from src.data import load_code_to_text_dataset, distinct_repos, write_code_to_text_csv
+
+    start = time.perf_counter()
+    if mode == "eager_repos":
+        data = load_code_to_text_dataset(split=split, limit=limit)
+        rows = len(data["repo"].drop_duplicates())
+    elif mode == "streaming_repos":
+        rows = len(distinct_repos(split, limit=limit))
+    elif mode == "eager_csv":
+        data = load_code_to_text_dataset(split=split, limit=limit)
+        data.to_csv(os.path.join(output_dir, "eager.csv"), index=False)
+        rows = len(data)
+    else:
+        rows = write_code_to_text_csv(os.path.join(output_dir, "streaming.csv"), split=split, limit=limit)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin" else 1024 * 1024)
+    return {"mode": mode, "rows": rows, "seconds": time.perf_counter() - start, "peak_rss_mb": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--split", default="train")
+    parser.add_argument("--limit", type=int, help="Only load the first N examples")
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--data-dir", help="Read the split from these local Parquet files instead of the Hub")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.data_dir:
+        from src.data.load_data import DATA_DIR_ENV
+        os.environ[DATA_DIR_ENV] = os.path.abspath(args.data_dir)  # Inherited by the child processes
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        if args.child:
+            print(json.dumps(run_mode(args.child, args.split, args.limit, output_dir)))
+            return
+        print(f"{'mode':<18}{'rows':>10}{'seconds':>10}{'peak RSS (MB)':>16}")
+        for mode in args.modes:
+            command = [sys.executable, __file__, "--split", args.split, "--child", mode]
+            if args.limit:
+                command += ["--limit", str(args.limit)]
+            output = subprocess.run(command, capture_output=True, text=True)
+            if output.returncode != 0:
+                print(f"{mode:<18} failed: {output.stderr.strip().splitlines()[-1] if output.stderr.strip() else output.returncode}")
+                continue
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+            print(f"{mode:<18}{result['rows']:>10}{result['seconds']:>10.1f}{result['peak_rss_mb']:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
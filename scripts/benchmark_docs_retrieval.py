@@ -0,0 +1,82 @@
+"""
+Measures docs retrieval latency and the tokens it would send to the docs LLM, for the
+local hybrid index and (optionally) Tavily, over the evaluation questions.
+
+    python scripts/benchmark_docs_retrieval.py path/to/docs --questions data/external/final_questions.csv
+    python scripts/benchmark_docs_retrieval.py path/to/docs --tavily https://www.keycloak.org/documentation
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.indexes.docs_index import get_docs_index
+from src.utils.retrieval import count_tokens, compress_passages
+
+
+def report(name: str, latencies: list[float], tokens: list[int], compressed: list[int]):
+    latencies = np.array(latencies) * 1000
+    print(
+        f"{name:>8}: n={len(latencies)}  latency p50={np.percentile(latencies, 50):.1f}ms "
+        f"p95={np.percentile(latencies, 95):.1f}ms  tokens mean={np.mean(tokens):.0f} max={np.max(tokens)}  "
+        f"after compression mean={np.mean(compressed):.0f} max={np.max(compressed)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Documentation directory, file or prebuilt index")
+    parser.add_argument("--questions", default="data/external/final_questions.csv")
+    parser.add_argument("--column", default="customized_quesstion")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--embedding", default="hashing")
+    parser.add_argument("--max-tokens", type=int, default=1500, help="Token budget of the compression stage")
+    parser.add_argument("--tavily", metavar="DOMAIN", help="Also query Tavily restricted to this domain")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N questions")
+    args = parser.parse_args()
+
+    with open(args.questions, newline="", encoding="utf-8") as f:
+        questions = [row[args.column] for row in csv.DictReader(f)][:args.limit]
+
+    start = time.time()
+    index = get_docs_index(args.source, {"embedding": args.embedding})
+    print(f"Index ready with {len(index.chunks)} chunks in {time.time() - start:.2f}s")
+
+    latencies, tokens, compressed = [], [], []
+    for question in questions:
+        start = time.perf_counter()
+        text = "\n\n".join(c["text"] for c in index.search(question, args.top_k))
+        text_compressed = compress_passages(question, text, args.max_tokens)
+        latencies.append(time.perf_counter() - start)
+        tokens.append(count_tokens(text))
+        compressed.append(count_tokens(text_compressed))
+    report("local", latencies, tokens, compressed)
+
+    if args.tavily:
+        from langchain_community.tools.tavily_search import TavilySearchResults
+        tavily = TavilySearchResults()
+        latencies, tokens, compressed = [], [], []
+        for question in questions:
+            start = time.perf_counter()
+            results = tavily.invoke({
+                "query": question,
+                "include_raw_content": True,
+                "include_domains": [args.tavily],
+                "search_depth": "advanced",
+                "num_results": 5
+            })
+            text = "\n\n".join(r["content"] for r in results or [] if "content" in r)
+            text_compressed = compress_passages(question, text, args.max_tokens)
+            latencies.append(time.perf_counter() - start)
+            tokens.append(count_tokens(text))
+            compressed.append(count_tokens(text_compressed))
+        report("tavily", latencies, tokens, compressed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Measures how close several processes calling one provider get to its quota, with the
+rate limiter's buckets shared by all of them (one SQLite file) or kept per process (one
+file each, i.e. no coordination), without API calls or keys.
+
+Every process runs `--threads` callers that take one request from the limiter, then
+"call" the provider for `--latency` seconds. The calls are replayed against a simulated
+provider enforcing `--rpm` with a token bucket holding `--provider-burst` seconds of
+quota, which counts the requests it would have answered with a 429. The sustained rate
+is measured over the second half of the run, after the buckets' initial burst.
+
+    python scripts/benchmark_rate_limit.py --processes 4 --seconds 20 --rpm 600
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("CONFIG_FILE", "config/config.standin.yaml")
+
+from src.utils.rate_limit import RateLimiter
+
+BACKEND = "standin:benchmark"
+
+
+def worker(db_path: str, threads: int, until: float, rpm: float, latency: float) -> list[float]:
+    limiter = RateLimiter(db_path)
+
+    def caller(_):
+        calls = []
+        while True:
+            limiter.acquire(BACKEND, requests_per_minute=rpm)
+            now = time.time()
+            if now >= until:
+                return calls
+            calls.append(now)
+            time.sleep(latency)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return sorted(t for calls in pool.map(caller, range(threads)) for t in calls)
+
+
+def rejected(calls: list[float], rpm: float, burst_seconds: float) -> int:
+    """Counts the calls a provider bucket of `rpm`, holding `burst_seconds` of quota, would reject."""
+    rate = rpm / 60
+    capacity = max(rate * burst_seconds, 1.0)
+    level, last, count = capacity, calls[0] if calls else 0.0, 0
+    for t in calls:
+        level = min(capacity, level + (t - last) * rate)
+        last = t
+        if level >= 1:
+            level -= 1
+        else:
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent callers per process")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--rpm", type=float, default=600, help="Provider quota (requests per minute)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latency of a call (seconds)")
+    parser.add_argument("--provider-burst", type=float, default=10, help="Seconds of quota the provider lets a client spend at once")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="rate_limit_")
+    print(f"{'buckets':<14}{'calls':>8}{'rpm':>8}{'of quota':>10}{'429s':>8}")
+    for mode in ("per process", "shared"):
+        paths = [os.path.join(directory, f"{mode.replace(' ', '_')}_{i if mode == 'per process' else 0}.db") for i in range(args.processes)]
+        start = time.time()
+        until = start + args.seconds
+        with Pool(args.processes) as pool:
+            results = pool.starmap(worker, [(path, args.threads, until, args.rpm, args.latency) for path in paths])
+        calls = sorted(t for result in results for t in result)
+        rpm = sum(t >= start + args.seconds / 2 for t in calls) / (args.seconds / 2) * 60
+        print(f"{mode:<14}{len(calls):>8}{rpm:>8.0f}{rpm / args.rpm:>10.0%}{rejected(calls, args.rpm, args.provider_burst):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Measures what the session memo saves on follow-ups: a session asks a question routed to the
+git agent, then a follow-up whose git sub-query is the same. The follow-up is served from
+the memo instead of running the agent again; the script reports the latency and LLM calls
+of both turns, and the size of the memo kept in the checkpoint.
+
+The stand-in LLMs of config/config.standin.yaml are used, with the supervisor routing the
+sub-query to the git agent, so the numbers count graph steps and LLM calls, not a provider.
+
+    python scripts/benchmark_session_memo.py --repository . --sessions 5
+"""
+import os
+import sys
+import time
+import uuid
+import pickle
+import argparse
+import tempfile
+
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SUB_QUERY = "Who made the latest commit?"
+
+
+def write_config(directory: str) -> str:
+    with open(os.path.join(ROOT, "config", "config.standin.yaml")) as f:
+        config = yaml.safe_load(f)
+    config["llms"]["information_supervisor"]["response"] = (
+        f'{{"source_code": "PASS", "git": "{SUB_QUERY}", "github": "PASS", "docs": "PASS"}}'
+    )
+    config["tools"]["session"] = {"path": os.path.join(directory, "sessions.db")}
+    path = os.path.join(directory, "config.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repository", default=ROOT, help="Git repository the questions are about")
+    parser.add_argument("--sessions", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ["CONFIG_FILE"] = write_config(tempfile.mkdtemp(prefix="session_memo_"))
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.messages import HumanMessage
+    from src.orchestration import get_session_graph
+    from src.utils import metrics
+
+    class LLMCalls(BaseCallbackHandler):
+        def __init__(self):
+            self.calls = 0
+
+        def on_chat_model_start(self, *args, **kwargs):
+            self.calls += 1
+
+        def on_llm_start(self, *args, **kwargs):
+            self.calls += 1
+
+    graph = get_session_graph()
+    project = {"repository_path": os.path.abspath(args.repository), "run_code": False, "run_git": True, "run_github": False, "run_docs": False}
+    turns = {"first": [], "follow-up": []}
+    memo_bytes = []
+    for _ in range(args.sessions):
+        thread = {"thread_id": str(uuid.uuid4())}
+        for turn, question in (("first", "Who made the latest commit?"), ("follow-up", "And who was it again?")):
+            counter = LLMCalls()
+            state = {**project, "user_query": [HumanMessage(content=question)]} if turn == "first" else {"user_query": [HumanMessage(content=question)]}
+            start = time.perf_counter()
+            graph.invoke(state, {"configurable": thread, "callbacks": [counter]})
+            turns[turn].append((time.perf_counter() - start, counter.calls))
+        memo_bytes.append(len(pickle.dumps(graph.get_state({"configurable": thread}).values.get("memo") or {})))
+
+    for turn, runs in turns.items():
+        seconds = sum(s for s, _ in runs) / len(runs)
+        calls = sum(c for _, c in runs) / len(runs)
+        print(f"{turn:>10}: {seconds * 1000:8.0f} ms, {calls:4.1f} LLM calls (mean of {len(runs)} sessions)")
+    print(f"memo in the checkpoint: {sum(memo_bytes) / len(memo_bytes):.0f} bytes; {metrics.summary()}")
+
+
+if __name__ == "__main__":
+    main()
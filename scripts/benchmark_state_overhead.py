@@ -0,0 +1,80 @@
+"""
+Measures the per-step overhead LangGraph adds for the graph State as message history grows,
+comparing whole-state returns with add_messages on every channel (the previous layout)
+against delta returns with identity-reduced agent channels (the current State).
+
+    python scripts/benchmark_state_overhead.py --history 10 100 1000 --steps 50
+"""
+import os
+import sys
+import time
+import argparse
+from typing import Annotated, TypedDict, get_type_hints
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+
+from src.utils.state_model import State
+
+AGENT_CHANNELS = [
+    "source_query", "git_query", "github_query", "docs_query",
+    "supervisor_response", "source_response", "git_response", "github_response", "docs_response",
+]
+
+# The previous State: every agent channel merged with add_messages.
+LegacyState = TypedDict("LegacyState", {
+    name: Annotated[hint, add_messages] if name in AGENT_CHANNELS else hint
+    for name, hint in get_type_hints(State, include_extras=True).items()
+})
+
+
+def build(state_type, steps: int, delta: bool):
+    def step(state):
+        if delta:
+            return {"rounds": state.get("rounds", 0) + 1}
+        state["rounds"] = state.get("rounds", 0) + 1
+        return state
+
+    sg = StateGraph(state_type)
+    sg.add_node("step", step)
+    sg.add_edge(START, "step")
+    sg.add_conditional_edges("step", lambda s: "step" if s["rounds"] < steps else "end", {"step": "step", "end": END})
+    return sg.compile()
+
+
+def initial_state(history: int, output_kb: int) -> dict:
+    bulky = "x" * (output_kb * 1024)
+    state = {"user_query": [HumanMessage(f"question {i}", id=f"q{i}") for i in range(history)], "rounds": 0}
+    for name in AGENT_CHANNELS:
+        message = HumanMessage if name.endswith("_query") else AIMessage
+        state[name] = [message(bulky if name.endswith("_response") else f"{name} {i}", id=f"{name}{i}") for i in range(history)]
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, nargs="+", default=[10, 100, 1000], help="Messages per channel")
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--output-kb", type=int, default=4, help="Size of each agent response message")
+    args = parser.parse_args()
+
+    graphs = {
+        "whole state + add_messages": build(LegacyState, args.steps, delta=False),
+        "deltas + identity": build(State, args.steps, delta=True),
+    }
+    print(f"{'history':>8}  " + "  ".join(f"{name:>28}" for name in graphs))
+    for history in args.history:
+        timings = []
+        for graph in graphs.values():
+            state = initial_state(history, args.output_kb)
+            start = time.perf_counter()
+            graph.invoke(state, {"recursion_limit": args.steps + 10})
+            timings.append((time.perf_counter() - start) / args.steps * 1000)
+        print(f"{history:>8}  " + "  ".join(f"{t:>25.3f} ms" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
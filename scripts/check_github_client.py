@@ -0,0 +1,211 @@
+"""
+Checks the GitHub client and mirror against a local stand-in GitHub server that counts
+the requests it receives (no network access or token needed):
+
+- mirror syncs page through issues, send `since=` once synced and fetch only what changed;
+- repeated GETs are sent with `If-None-Match` and a `304 Not Modified` is served from the cache;
+- requests go out at once while a quota is healthy and are only paced below its low-water
+  mark, on their own rate-limit bucket: an exhausted search quota does not slow down core
+  requests, bulk requests leave the reserve to interactive ones, and a wait longer than the
+  question's deadline fails fast;
+- search qualifiers (`is:`, `label:`, `author:`, bare "pull requests" / "open") filter the mirror.
+
+    python scripts/check_github_client.py
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("CONFIG_FILE", "config/config.standin.yaml")
+
+from src.utils import metrics
+from src.utils.resilience import DeadlineExceeded, deadline_at
+from src.utils.github_client import GitHubClient
+from src.indexes.github_mirror import GitHubMirror
+
+REPO = "octo/demo"
+
+
+def issue(number: int, title: str, state: str, author: str, labels: list[str], pull_request: bool, updated_at: str) -> dict:
+    return {
+        "id": 1000 + number, "number": number, "title": title, "body": f"Body of {title}", "state": state,
+        "user": {"login": author}, "labels": [{"name": label} for label in labels], "comments": 0,
+        "created_at": updated_at, "updated_at": updated_at, "closed_at": None, "html_url": f"https://github.com/{REPO}/issues/{number}",
+        **({"pull_request": {}} if pull_request else {}),
+    }
+
+
+class StubGitHub:
+    """A minimal GitHub REST API: issues (paginated, `since`), comments, labels and search, with ETags and rate-limit headers."""
+
+    def __init__(self):
+        self.issues = [
+            issue(1, "Parser crashes on null input", "open", "alice", ["bug"], False, "2024-01-01T00:00:00Z"),
+            issue(2, "Add date parsing", "closed", "bob", ["enhancement"], True, "2024-01-02T00:00:00Z"),
+            issue(3, "Typo in docs", "open", "alice", [], False, "2024-01-03T00:00:00Z"),
+        ]
+        self.comments = [{
+            "id": 900, "issue_url": f"https://api.github.com/repos/{REPO}/issues/3", "user": {"login": "carol"},
+            "body": "The parser crashes here too", "created_at": "2024-02-01T00:00:00Z", "updated_at": "2024-02-01T00:00:00Z",
+        }]
+        # resource -> (limit, remaining, seconds until reset)
+        self.quota = {"core": (5000, 4999, 3600), "search": (30, 2, 60)}
+        self.requests = Counter()
+        self.not_modified = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def handle(self, request: BaseHTTPRequestHandler):
+        url = urlparse(request.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.requests[url.path] += 1
+        resource = "search" if url.path.startswith("/search/") else "core"
+        links = None
+        if url.path.endswith("/issues/comments"):
+            body = [c for c in self.comments if c["updated_at"] >= query.get("since", "")]
+        elif url.path.endswith("/issues"):
+            matching = [i for i in self.issues if i["updated_at"] >= query.get("since", "")]
+            # Pages of two, so a handful of issues spans several pages
+            page, per_page = int(query.get("page", 1)), min(int(query.get("per_page", 30)), 2)
+            body = matching[(page - 1) * per_page:page * per_page]
+            if page * per_page < len(matching):
+                links = f'<{self.url}{url.path}?state=all&per_page={per_page}&page={page + 1}&since={query.get("since", "")}>; rel="next"'
+        elif url.path.endswith("/labels"):
+            body = [{"name": "bug", "color": "d73a4a"}, {"name": "enhancement", "color": "a2eeef"}]
+        elif url.path.startswith("/search/"):
+            body = {"total_count": 0, "items": []}
+        else:
+            body = {}
+        data = json.dumps(body).encode()
+        etag = f'"{hash(data) & 0xffffffff:x}"'
+        limit, remaining, reset_in = self.quota[resource]
+
+        modified = request.headers.get("If-None-Match") != etag
+        if not modified:
+            self.not_modified += 1
+            request.send_response(304)  # Not counted against the quota
+        else:
+            self.quota[resource] = (limit, max(remaining - 1, 0), reset_in)
+            request.send_response(200)
+        request.send_header("ETag", etag)
+        request.send_header("X-RateLimit-Resource", resource)
+        request.send_header("X-RateLimit-Limit", str(limit))
+        request.send_header("X-RateLimit-Remaining", str(self.quota[resource][1]))
+        request.send_header("X-RateLimit-Reset", str(int(time.time() + reset_in)))
+        if links:
+            request.send_header("Link", links)
+        request.send_header("Content-Type", "application/json")
+        request.end_headers()
+        if modified:
+            request.wfile.write(data)
+
+
+def check(name: str, condition: bool, detail: str = "") -> bool:
+    print(f"{'ok  ' if condition else 'FAIL'} {name}{f': {detail}' if detail else ''}")
+    return condition
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+    stub = StubGitHub()
+    results = []
+
+    # Mirror sync: full, then incremental
+    client = GitHubClient(base_url=stub.url)
+    mirror = GitHubMirror(os.path.join(tempfile.mkdtemp(prefix="github_stub_"), "mirror.db"), client)
+    first = mirror.sync(REPO)
+    results.append(check("first sync mirrors every issue and comment", first == {"issues": 3, "comments": 1}, str(first)))
+    results.append(check("issues are paged through Link headers", stub.requests[f"/repos/{REPO}/issues"] == 2, f"{stub.requests[f'/repos/{REPO}/issues']} issue requests"))
+    stub.issues.append(issue(4, "Crash when parsing empty file", "open", "dave", ["bug"], False, "2024-03-01T00:00:00Z"))
+    second = mirror.sync(REPO)
+    results.append(check("incremental sync fetches only changed issues (since=)", second["issues"] <= 2 and second["comments"] <= 1, str(second)))
+    results.append(check("incremental sync picks up the new issue", mirror.search(REPO, "empty file")["total"] == 1))
+
+    # Conditional requests
+    before = dict(stub.requests)
+    data, _ = client.get(f"/repos/{REPO}/labels")
+    again, _ = client.get(f"/repos/{REPO}/labels")
+    results.append(check("repeated GET is answered 304 and served from the cache", stub.not_modified >= 1 and again == data,
+                         f"{stub.not_modified} not modified, {sum(stub.requests.values()) - sum(before.values())} requests"))
+
+    # A healthy quota is not paced, and concurrent requests run concurrently
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda number: client.get(f"/repos/{REPO}/milestones/{number}"), range(8)))
+    healthy_seconds = time.perf_counter() - start
+    results.append(check("requests are not paced while the quota is healthy", healthy_seconds < 0.5, f"8 concurrent core requests in {healthy_seconds:.2f}s"))
+
+    # Pacing per bucket: an exhausted search quota does not slow core requests
+    client.get("/search/issues", {"q": f"repo:{REPO} crash"})
+    start = time.perf_counter()
+    for number in range(5):
+        client.get(f"/repos/{REPO}/issues/{number}")
+    core_seconds = time.perf_counter() - start
+    results.append(check("search and core quotas are tracked apart", client.scheduler.remaining("search") == 1 and client.scheduler.remaining("core") > 1000))
+    results.append(check("core requests are not paced on the search bucket", core_seconds < 1.0, f"5 core requests in {core_seconds:.2f}s"))
+
+    # A paced wait longer than the deadline raises instead of sleeping
+    start = time.perf_counter()
+    try:
+        with deadline_at(time.time() + 2):
+            for number in range(3):
+                client.get("/search/issues", {"q": f"repo:{REPO} {number}"})
+        raised = False
+    except DeadlineExceeded:
+        raised = True
+    waited = time.perf_counter() - start
+    results.append(check("a rate-limit wait past the deadline raises DeadlineExceeded", raised and waited < 1.0, f"after {waited:.2f}s"))
+
+    # Bulk requests leave the reserve (1% of the limit) to interactive ones
+    stub.quota["core"] = (5000, 40, 2)
+    client.get(f"/repos/{REPO}")
+    start = time.perf_counter()
+    for number in range(3):
+        client.get(f"/repos/{REPO}/pulls/{number}")
+    interactive_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for number in range(3):
+        client.get(f"/repos/{REPO}/commits/{number}", bulk=True)
+    bulk_seconds = time.perf_counter() - start
+    results.append(check("interactive requests use the reserve, bulk requests wait", interactive_seconds < 0.5 < bulk_seconds,
+                         f"interactive {interactive_seconds:.2f}s, bulk {bulk_seconds:.2f}s"))
+
+    # Qualifier parsing
+    queries = {
+        "is:open label:bug author:alice": [1],
+        "label:bug crash": [4],
+        "label:bug parser": [1],
+        "closed pull requests": [2],
+        "open issues": [1, 3, 4],
+        "is:pr is:open": [],
+    }
+    for query, expected in queries.items():
+        found = sorted(item["number"] for item in mirror.search(REPO, query)["items"])
+        results.append(check(f"search {query!r}", found == sorted(expected), f"found {found}"))
+
+    print(f"{sum(stub.requests.values())} requests to the stub; {metrics.summary()}")
+    raise SystemExit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
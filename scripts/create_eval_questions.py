@@ -1,159 +1,170 @@
-import sqlite3
+"""
+Fills the evaluation question templates with entities sampled from each project's code DB.
+
+Each DB is read once into arrays of entity names (classes, methods, packages, files and
+the methods of classes having at least two), which are then sampled with a NumPy RNG
+seeded per project, so the same seed always yields the same questions. Projects are
+processed in parallel; the project -> DB mapping comes from `tools.evaluation.projects`.
+
+    python scripts/create_eval_questions.py --seed 7 --per-template 50
+    python scripts/create_eval_questions.py --project wg/scrypt=/data/scrypt.db
+"""
 import os
+import re
+import sys
 import csv
+import time
+import sqlite3
+import argparse
+from dataclasses import dataclass, field
 
-# Maps placeholders to database tables and their respective columns
-placeholder_table_map = {
-    'CLASS': ('class_models', 'class_name'),
-    'METHOD': ('method_models', 'method_name'),
-    'PACKAGE': ('code_models', 'namespace'),
-    'PROJECT': ('code_models', 'filepath'),
-    'FILES': ('code_models', 'filepath')  # We no longer use this for PROJECT
-}
+import numpy as np
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-def get_random_entity(conn, entity_type):
-    """Fetch a random value from the database based on entity type."""
-    table, column = placeholder_table_map.get(entity_type, (None, None))
-    if not table or not column:
-        return f"Unknown{entity_type}"
+from src.utils import get_tool_config, run_batch
 
-    cursor = conn.cursor()
-    try:
-        cursor.execute(f"SELECT {column} FROM {table} ORDER BY RANDOM() LIMIT 1")
-        row = cursor.fetchone()
-        if not row:
-            return f"Sample{entity_type}"
-        value = row[0]
-        if entity_type == "FILES":
-            return os.path.basename(value)  # Extract only the filename
-        return value
-    except sqlite3.OperationalError:
-        return f"Sample{entity_type}"
-
-def get_multiple_unique_entities(conn, entity_type, count):
-    """Fetch a list of unique values for an entity type."""
-    table, column = placeholder_table_map.get(entity_type, (None, None))
-    if not table or not column:
-        return [f"Sample{entity_type}{i+1}" for i in range(count)]
-
-    cursor = conn.cursor()
-    try:
-        cursor.execute(f"SELECT DISTINCT {column} FROM {table} ORDER BY RANDOM() LIMIT {count}")
-        rows = cursor.fetchall()
-        values = [os.path.basename(row[0]) if entity_type == "FILES" else row[0] for row in rows]
-        while len(values) < count:
-            values.append(f"Sample{entity_type}{len(values)+1}")
-        return values
-    except sqlite3.OperationalError:
-        return [f"Sample{entity_type}{i+1}" for i in range(count)]
-
-
-def fill_placeholders(template, conn, project_name):
-    """Replace placeholders like {CLASS}, {METHOD}, {PROJECT} with actual values."""
-    result = template
-    cursor = conn.cursor()
-
-    if template.count("{METHOD}") == 2:
-        # Special case: get a class with at least 2 methods
-        cursor.execute("""
-            SELECT cm.id, cm.class_name
-            FROM class_models cm
-            JOIN method_models mm ON cm.id = mm.class_model_id
-            GROUP BY cm.id
-            HAVING COUNT(mm.id) >= 2
-            ORDER BY RANDOM()
-            LIMIT 1
-        """)
-        row = cursor.fetchone()
-        if row:
-            class_id, class_name = row
-        else:
-            class_name = "SampleClass"
-            method_names = ["SampleMethod1", "SampleMethod2"]
-            result = result.replace("{METHOD}", method_names[0], 1)
-            result = result.replace("{METHOD}", method_names[1], 1)
-            return result.replace("{CLASS}", class_name)
-
-        # Get two methods from that class
-        cursor.execute("""
-            SELECT method_name 
-            FROM method_models 
-            WHERE class_model_id = ?
-            ORDER BY RANDOM() 
-            LIMIT 2
-        """, (class_id,))
-        method_rows = cursor.fetchall()
-        method_names = [row[0] for row in method_rows]
-
-        result = result.replace("{METHOD}", method_names[0], 1)
-        result = result.replace("{METHOD}", method_names[1], 1)
-        return result.replace("{CLASS}", class_name)
-
-    # Normal case: handle one placeholder per type
-    for placeholder in placeholder_table_map:
-        token = f"{{{placeholder}}}"
-        count = template.count(token)
-        if count == 1:
-            # Single replacement
-            if placeholder == 'PROJECT':
-                replacement = project_name
-            else:
-                replacement = get_random_entity(conn, placeholder)
-            result = result.replace(token, replacement.replace(";", ""))
-        elif count >= 2:
-            # Two or more replacements: get distinct values
-            values = get_multiple_unique_entities(conn, placeholder, count)
-            for val in values:
-                result = result.replace(token, val.replace(";", ""), 1)
-    return result
-
-
-def generate_rows(project_name, db_path, templates, start_id=1):
-    """Generate filled questions for a single project."""
-    conn = sqlite3.connect(db_path)
-    rows = []
-    row_id = start_id
-
-    for question_id, template in enumerate(templates, start=1):
-        filled = fill_placeholders(template, conn, project_name)
-        row = {
-            "id": row_id,
-            "project": project_name,
-            "question_id": question_id,
-            "customized_quesstion": filled
-        }
-        rows.append(row)
-        row_id += 1
-
-    conn.close()
-    return rows, row_id
-
-
-# === Load question templates from text file ===
-with open("questions.txt", "r", encoding="utf-8") as f:
-    question_templates = [line.strip() for line in f if line.strip()]
-
-# === Project to SQLite database mapping ===
-projects = {
-    "wg/scrypt": "D:\\Projects\\mimir\\output\\wg_scrypt\\code_data.db",
-    "groovy/groovy-core": "D:\\Projects\\mimir\\output\\groovy_groovy-core\\code_data.db",
-    "joestelmach/natty": "D:\\Projects\\mimir\\output\\joestelmach_natty\\code_data.db",
-    "sstrickx/yahoofinance-api": "D:\\Projects\\mimir\\output\\sstrickx_yahoofinance-api\\code_data.db",
-    "pedrovgs/Renderers": "D:\\Projects\\mimir\\output\\pedrovgs_Renderers\\code_data.db"
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PLACEHOLDER = re.compile(r"\{(CLASS|METHOD|PACKAGE|PROJECT|FILES)\}")
+# Maps placeholders to database tables and their respective columns
+PLACEHOLDER_TABLE_MAP = {
+    "CLASS": ("class_models", "class_name"),
+    "METHOD": ("method_models", "method_name"),
+    "PACKAGE": ("code_models", "namespace"),
+    "FILES": ("code_models", "filepath"),
 }
+FIELDNAMES = ["id", "project", "question_id", "customized_quesstion"]
 
-# === Generate all rows for CSV ===
-all_rows = []
-next_id = 1
-for project_name, db_path in projects.items():
-    rows, next_id = generate_rows(project_name, db_path, question_templates, start_id=next_id)
-    all_rows.extend(rows)
 
-# === Write to final CSV ===
-with open("filled_questions_v2.csv", "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=["id", "project", "question_id", "customized_quesstion"])
-    writer.writeheader()
-    writer.writerows(all_rows)
+@dataclass
+class EntityPools:
+    """The entity names of one code DB, loaded once for sampling."""
+    values: dict[str, np.ndarray] = field(default_factory=dict)
+    distinct: dict[str, np.ndarray] = field(default_factory=dict)
+    # Classes with at least two methods, and the methods of each as slices of `pair_methods`
+    pair_classes: np.ndarray = field(default_factory=lambda: np.array([], dtype=object))
+    pair_methods: np.ndarray = field(default_factory=lambda: np.array([], dtype=object))
+    pair_offsets: np.ndarray = field(default_factory=lambda: np.array([0]))
 
-print("✅ CSV file 'filled_questions_v2.csv' has been generated.")
\ No newline at end of file
+
+def load_pools(db_path: str) -> EntityPools:
+    """Reads every entity pool of a code DB with one query per table."""
+    pools = EntityPools()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for placeholder, (table, column) in PLACEHOLDER_TABLE_MAP.items():
+            try:
+                rows = conn.execute(f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL AND {column} != ''").fetchall()
+            except sqlite3.OperationalError:
+                rows = []
+            values = [os.path.basename(r[0]) if placeholder == "FILES" else str(r[0]) for r in rows]
+            pools.values[placeholder] = np.array(values, dtype=object)
+            pools.distinct[placeholder] = np.array(sorted(set(values)), dtype=object)
+        try:
+            rows = conn.execute(
+                """
+                SELECT cm.id, cm.class_name, mm.method_name
+                FROM method_models mm JOIN class_models cm ON cm.id = mm.class_model_id
+                ORDER BY cm.id, mm.id
+                """
+            ).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+    finally:
+        conn.close()
+    if rows:
+        class_ids = np.array([r[0] for r in rows])
+        starts = np.flatnonzero(np.r_[True, class_ids[1:] != class_ids[:-1]])
+        counts = np.diff(np.r_[starts, len(rows)])
+        keep = counts >= 2
+        methods = np.array([str(r[2]) for r in rows], dtype=object)
+        pools.pair_classes = np.array([str(rows[i][1]) for i in starts[keep]], dtype=object)
+        pools.pair_methods = np.concatenate([methods[s:s + c] for s, c in zip(starts[keep], counts[keep])]) if keep.any() else methods[:0]
+        pools.pair_offsets = np.r_[0, np.cumsum(counts[keep])]
+    return pools
+
+
+def _sample(pools: EntityPools, placeholder: str, count: int, rng: np.random.Generator) -> list[str]:
+    if count == 1:
+        values = pools.values.get(placeholder)
+        return [str(values[rng.integers(len(values))])] if values is not None and len(values) else [f"Sample{placeholder}"]
+    values = pools.distinct.get(placeholder, np.array([], dtype=object))
+    picked = [str(v) for v in rng.choice(values, size=min(count, len(values)), replace=False)] if len(values) else []
+    return picked + [f"Sample{placeholder}{i + 1}" for i in range(len(picked), count)]
+
+
+def fill_template(template: str, project: str, pools: EntityPools, rng: np.random.Generator) -> str:
+    """Replaces the placeholders of a template (e.g. {CLASS}, {METHOD}, {PROJECT}) with sampled entities."""
+    counts = {p: template.count(f"{{{p}}}") for p in dict.fromkeys(PLACEHOLDER.findall(template))}
+    replacements = {"PROJECT": [project] * counts.get("PROJECT", 0)}
+    if counts.get("METHOD") == 2:
+        # Two methods of one class, which names the {CLASS}
+        if len(pools.pair_classes):
+            i = rng.integers(len(pools.pair_classes))
+            methods = pools.pair_methods[pools.pair_offsets[i]:pools.pair_offsets[i + 1]]
+            replacements["METHOD"] = [str(m) for m in rng.choice(methods, size=2, replace=False)]
+            replacements["CLASS"] = [str(pools.pair_classes[i])] * counts.get("CLASS", 0)
+        else:
+            replacements["METHOD"] = ["SampleMethod1", "SampleMethod2"]
+            replacements["CLASS"] = ["SampleClass"] * counts.get("CLASS", 0)
+    for placeholder, count in counts.items():
+        if placeholder not in replacements:
+            replacements[placeholder] = _sample(pools, placeholder, count, rng)
+    queues = {p: iter(v) for p, v in replacements.items()}
+    return PLACEHOLDER.sub(lambda m: next(queues[m.group(1)]).replace(";", ""), template)
+
+
+def generate_project(project: str, db_path: str, templates: list[str], per_template: int, seed: np.random.SeedSequence) -> list[dict]:
+    """Generates `per_template` questions per template for one project."""
+    pools = load_pools(db_path)
+    rng = np.random.default_rng(seed)
+    return [
+        {"project": project, "question_id": question_id, "customized_quesstion": fill_template(template, project, pools, rng)}
+        for question_id, template in enumerate(templates, start=1)
+        for _ in range(per_template)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill evaluation question templates from project code DBs.")
+    parser.add_argument("--templates", default=os.path.join(ROOT, "data", "external", "questions.txt"))
+    # A new file by default: the tracked data/external question sets are only replaced on purpose
+    parser.add_argument("--output", default=os.path.join(ROOT, "data", "generated", "eval_questions.csv"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--per-template", type=int, default=1, help="Questions generated per template and project")
+    parser.add_argument("--project", action="append", default=[], metavar="NAME=DB",
+                        help="Project and code DB, instead of tools.evaluation.projects (repeatable)")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.project:
+        projects = {name: os.path.abspath(os.path.expanduser(path)) for name, path in (p.split("=", 1) for p in args.project)}
+    else:
+        # Config paths are relative to the repository root
+        configured = get_tool_config("evaluation").get("projects") or {}
+        projects = {name: os.path.join(ROOT, os.path.expanduser(path)) for name, path in configured.items()}
+    if not projects:
+        parser.error("no projects: set tools.evaluation.projects in the config or pass --project NAME=DB")
+    missing = [path for path in projects.values() if not os.path.exists(path)]
+    if missing:
+        parser.error(f"code DB not found: {', '.join(missing)}")
+
+    with open(args.templates, "r", encoding="utf-8") as f:
+        templates = [line.strip() for line in f if line.strip()]
+
+    start = time.perf_counter()
+    # One seed per project (in config order), so results do not depend on scheduling
+    seeds = np.random.SeedSequence(args.seed).spawn(len(projects))
+    jobs = [(name, path, seed) for (name, path), seed in zip(projects.items(), seeds)]
+    per_project = run_batch(lambda job: generate_project(job[0], job[1], templates, args.per_template, job[2]), jobs, args.workers)
+    rows = [{"id": i, **row} for i, row in enumerate((row for rows in per_project for row in rows), start=1)]
+
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Wrote {len(rows)} questions for {len(projects)} projects to {args.output} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Drives the HTTP app with concurrent `/ask` requests and reports latency percentiles and
+throughput. The app runs in-process (httpx ASGI transport), so with the stand-in LLMs
+the numbers measure the serving layer and graph, not the network or a provider.
+
+    CONFIG_FILE=config/config.standin.yaml python scripts/load_test_server.py --requests 400 --concurrency 64 --distinct 20
+
+`--distinct` is the number of different questions asked: fewer means more identical
+in-flight questions to coalesce. `--tenants` spreads requests over that many tenants.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.server.app import app
+from src.utils import metrics
+
+
+async def load_test(requests: int, concurrency: int, distinct: int, tenants: int) -> dict:
+    limit = asyncio.Semaphore(concurrency)
+    latencies, statuses, coalesced = [], Counter(), 0
+
+    async def one(client: httpx.AsyncClient, i: int):
+        nonlocal coalesced
+        async with limit:
+            start = time.perf_counter()
+            response = await client.post(
+                "/ask",
+                json={"question": f"Which classes does component {i % distinct} contain?", "run_code": False, "run_git": False},
+                headers={"X-Tenant": f"tenant-{i % tenants}"},
+            )
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+                coalesced += response.json()["coalesced"]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {
+        "requests": requests,
+        "ok": statuses[200],
+        "statuses": dict(statuses),
+        "coalesced": coalesced,
+        "seconds": elapsed,
+        "throughput": statuses[200] / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight at once")
+    parser.add_argument("--distinct", type=int, default=20, help="Number of different questions")
+    parser.add_argument("--tenants", type=int, default=8)
+    args = parser.parse_args()
+
+    metrics.reset()
+    result = asyncio.run(load_test(args.requests, args.concurrency, args.distinct, args.tenants))
+    print(f"{result['ok']}/{result['requests']} ok {result['statuses']} in {result['seconds']:.1f}s "
+          f"({result['throughput']:.1f} req/s), {result['coalesced']} coalesced")
+    if result["p50_ms"] is not None:
+        print(f"latency p50 {result['p50_ms']:.0f} ms, p99 {result['p99_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Reports how many eval questions the response fast path answers without the response LLM,
+and the latency it saves: runs each question of an eval CSV (e.g. data/external/
+final_questions.csv) through the graph for one project and reads the `fast_path` flag of
+its answer and the `response_fast_path.*` metrics.
+
+    CONFIG_FILE=config/config.anthropic.yaml python scripts/report_fast_path.py \\
+        --questions data/external/final_questions.csv --project wg/scrypt --bundle bundles/scrypt
+
+The saved latency is estimated as the mean response LLM call of the run minus the time
+the template took, per fast-path answer. `--output` writes one row per question.
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("CONFIG_FILE", "config/config.standin.yaml")
+
+from langchain_core.messages import HumanMessage
+
+from src.orchestration import graph
+from src.indexes import open_bundle
+from src.utils import metrics
+
+QUESTION_COLUMNS = ("customized_quesstion", "question")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", required=True, help="Eval CSV with project and question columns")
+    parser.add_argument("--project", help="Only ask the questions of this project")
+    parser.add_argument("--bundle", help="Project bundle to answer from")
+    parser.add_argument("--source-db", help="Code DB to answer from")
+    parser.add_argument("--repository", help="Git repository to answer from")
+    parser.add_argument("--github-url")
+    parser.add_argument("--limit", type=int, help="Ask at most this many questions")
+    parser.add_argument("--output", help="CSV to write the per-question results to")
+    args = parser.parse_args()
+
+    questions = pd.read_csv(args.questions)
+    column = next(c for c in QUESTION_COLUMNS if c in questions.columns)
+    if args.project:
+        questions = questions[questions["project"] == args.project]
+    if args.limit:
+        questions = questions.head(args.limit)
+
+    project = open_bundle(args.bundle).settings() if args.bundle else {}
+    project.update({k: v for k, v in {
+        "source_db": args.source_db, "repository_path": args.repository, "github_url": args.github_url,
+    }.items() if v})
+    project.setdefault("run_code", bool(project.get("source_db")))
+    project.setdefault("run_git", bool(project.get("repository_path")))
+    project.setdefault("run_github", bool(project.get("github_url")))
+    project.setdefault("run_docs", bool(project.get("docs_source")))
+
+    rows = []
+    for question in questions[column]:
+        start = time.perf_counter()
+        result = graph.invoke({**project, "user_query": [HumanMessage(content=question)]})
+        final_response = result["final_response"]
+        rows.append({
+            "question": question,
+            "fast_path": bool((final_response.response_metadata or {}).get("fast_path")),
+            "seconds": time.perf_counter() - start,
+            "answer": final_response.content,
+        })
+
+    counters = metrics.snapshot()
+    served = [r for r in rows if r["fast_path"]]
+    others = [r for r in rows if not r["fast_path"]]
+    print(f"{len(served)}/{len(rows)} questions ({len(served) / max(len(rows), 1):.0%}) answered by the fast path")
+    if counters.get("response_fast_path.misses"):
+        print(f"response LLM call: {counters['response_fast_path.llm_seconds'] / counters['response_fast_path.misses']:.2f}s on average")
+    print(f"latency saved: {counters.get('response_fast_path.saved_seconds', 0):.1f}s in total")
+    for name, group in (("fast path", served), ("response LLM", others)):
+        if group:
+            print(f"{name:>13}: {sum(r['seconds'] for r in group) / len(group):.2f}s per question on average")
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["question"])
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
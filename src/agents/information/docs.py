@@ -1,10 +1,17 @@
-from typing import Literal
+from typing import Literal, Optional
+import re
+import threading
 from langgraph.graph import StateGraph, START, END
 from langchain_core.runnables import RunnableMap
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_community.tools.tavily_search import TavilySearchResults
 
-from src.utils import State, get_prompts, get_agent
+from src.utils import State, get_prompts, get_agent, get_tool_config, metrics, memo_key, memo_lookup, memo_entry
+from src.utils.retrieval import compress_passages, count_tokens
+from src.utils.cache import get_cached_loader
+from src.utils.resilience import resilient_call
+from src.utils.profiling import profiled
+from src.indexes import get_docs_index, is_local_source
 
 AGENT_KEY = "information_docs"
 
@@ -13,22 +20,38 @@ class DocsAgent:
         self.llm = get_agent(AGENT_KEY)
         self.prompt = get_prompts(AGENT_KEY)
         self.tavily = TavilySearchResults()
+        self.settings = get_tool_config("docs")
+        self.cache = get_cached_loader("docs_cache", self.settings.get("cache_size", 512), self.settings.get("cache_ttl", 3600))
         self.graph = self._build_graph()
 
     def _run_tavily_search(self, query: str, domain: str = "https://www.keycloak.org/documentation"):
-        results = self.tavily.invoke({
+        results = resilient_call("tavily", lambda: self.tavily.invoke({
             "query": query,
             "include_raw_content": True,
             "include_domains": [domain],
             "search_depth": "advanced",
             "num_results": 5
-        })
+        }))
 
         if not results:
             return "Unable to find relevant content."
 
         return "\n\n".join([r["content"] for r in results if "content" in r])
 
+    def _run_local_search(self, query: str, source: str):
+        """Retrieves the best chunks of a local documentation directory or prebuilt index."""
+        chunks = get_docs_index(source, self.settings).search(query, self.settings.get("top_k", 5))
+        if not chunks:
+            return "Unable to find relevant content."
+        return "\n\n".join(f"[{c['title']} ({c['path']})]\n{c['text']}" for c in chunks)
+
+    def _retrieve(self, query: str, source: str):
+        """Retrieves docs for a query, sharing results of identical (normalized) queries on the same source."""
+        key = (" ".join(re.findall(r"\w+", query.lower())), source)
+        if is_local_source(source):
+            return self.cache.get(key, lambda: self._run_local_search(query, source))
+        return self.cache.get(key, lambda: self._run_tavily_search(query, source))
+
     def _build_query_gen(self):
         return (
             RunnableMap({
@@ -52,12 +75,23 @@ class DocsAgent:
         query_str = query_msg.content if isinstance(query_msg, HumanMessage) else str(query_msg)
 
         try:
-            result = self._run_tavily_search(query_str,doc_source)
+            result = self._retrieve(query_str, doc_source)
             state["docs"] = [HumanMessage(content=result)]
         except Exception as e:
             state["docs"] = [HumanMessage(content=f"Failed to fetch documents: {str(e)}")]
         return state
 
+    def _compress_docs_node(self, state: dict):
+        """Keeps only the retrieved passages most relevant to the query, within `tools.docs.max_tokens`."""
+        query_msg = state["docs_query"][-1] if isinstance(state["docs_query"], list) else state["docs_query"]
+        query_str = query_msg.content if isinstance(query_msg, HumanMessage) else str(query_msg)
+        docs = state["docs"][-1].content
+        compressed = compress_passages(query_str, docs, self.settings.get("max_tokens", 1500))
+        metrics.incr("docs.tokens_retrieved", count_tokens(docs))
+        metrics.incr("docs.tokens_sent", count_tokens(compressed))
+        state["docs"] = [HumanMessage(content=compressed)]
+        return state
+
     def _extract_final(self, state: dict):
         content = state.get("docs_summary") or "No summary available."
         state["final_result"] = content
@@ -67,32 +101,48 @@ class DocsAgent:
         self.query_gen = self._build_query_gen()
 
         sg = StateGraph(dict)
-        sg.add_node("load_docs", self._tavily_search_node)
-        sg.add_node("query_docs", self._query_gen_node)
-        sg.add_node("final", self._extract_final)
+        sg.add_node("load_docs", profiled(self._tavily_search_node, "docs/load_docs"))
+        sg.add_node("compress_docs", profiled(self._compress_docs_node, "docs/compress_docs"))
+        sg.add_node("query_docs", profiled(self._query_gen_node, "docs/query_docs"))
+        sg.add_node("final", profiled(self._extract_final, "docs/final"))
 
         sg.add_edge(START, "load_docs")
-        sg.add_edge("load_docs", "query_docs")
+        sg.add_edge("load_docs", "compress_docs")
+        sg.add_edge("compress_docs", "query_docs")
         sg.add_edge("query_docs", "final")
         sg.add_edge("final", END)
         return sg.compile()
 
-def information_docs_node(state: State) -> State:
+_agent: Optional[DocsAgent] = None
+_agent_lock = threading.Lock()
+
+
+def get_docs_agent() -> DocsAgent:
+    """Returns the process-wide DocsAgent, built on first use and shared by every request."""
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            _agent = DocsAgent()
+        return _agent
+
+
+def information_docs_node(state: State) -> dict:
     query = state.get("docs_query", [])
 
     if isinstance(query, list) or not state.get("docs_source",''):
         if not query:
-            state["docs_response"] = [AIMessage(content="PASS")]
-            return state
+            return {"docs_response": [AIMessage(content="PASS")]}
         query = query[-1]
     elif query == "PASS":
-        state["docs_response"] = [AIMessage(content="PASS")]
-        return state
-    agent = DocsAgent()
+        return {"docs_response": [AIMessage(content="PASS")]}
+    key = memo_key("docs", query, state)
+    if found := memo_lookup(state, key):
+        return {"docs_response": found, "memo": {key: found}}
+    agent = get_docs_agent()
     result = agent.graph.invoke({
         "docs_query": state["docs_query"],
         "docs_source": state["docs_source"],
         "context": state.get("context", [])
     })
-    state["docs_response"] = [AIMessage(content=result["final_result"])]
-    return state
+    response = [AIMessage(content=result["final_result"])]
+    return {"docs_response": response, **memo_entry(key, response)}
@@ -1,7 +1,11 @@
 import os
+import time
 import shlex
+import sqlite3
+import tempfile
+import threading
 import subprocess
-from typing import Literal
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph, START, END
 from langchain_core.tools import tool
@@ -9,10 +13,72 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import RunnableMap
 
-from src.utils import State, get_prompts, get_agent
+from src.utils import State, get_prompts, get_agent, get_tool_config, run_batch, memo_key, memo_lookup, memo_entry
+from src.utils.git_cache import get_git_cache
+from src.utils.results import ToolResult, invoke_tool, render_results, result_message
+from src.utils.resilience import bounded_timeout, time_left
+from src.utils.profiling import profiled
+from src.indexes import get_history_index
+from src.indexes.git_history import MAX_QUERY_ROWS
 
 AGENT_KEY = "information_git"
 
+DEFAULT_MAX_LINES = 2000
+DEFAULT_MAX_BYTES = 200_000
+DEFAULT_TIMEOUT = 30
+MAX_FIX_ROUNDS = 2
+
+
+def run_git_streamed(args: list[str], cwd: str, max_lines: int, max_bytes: int, timeout: float) -> tuple[int, str, str, str]:
+    """
+    Runs git and reads its stdout incrementally, killing the process as soon as the
+    line cap, byte cap or time limit is reached so the output never has to be buffered whole.
+
+    Returns:
+        tuple: (return code, stdout text, stderr text, truncation notice or "").
+    """
+    killed = threading.Event()
+
+    def kill():
+        killed.set()
+        proc.kill()
+
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(["git"] + args, cwd=cwd, stdout=subprocess.PIPE, stderr=stderr)
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        lines, size, reason = [], 0, None
+        try:
+            while True:
+                line = proc.stdout.readline(max_bytes - size + 1)
+                if not line:
+                    break
+                if size + len(line) > max_bytes:
+                    reason = f"byte limit of {max_bytes}"
+                    break
+                lines.append(line)
+                size += len(line)
+                if len(lines) >= max_lines and proc.stdout.read(1):
+                    reason = f"line limit of {max_lines}"
+                    break
+            if reason:
+                proc.kill()
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+        if killed.is_set() and not reason:
+            reason = f"time limit of {timeout}s"
+        stderr.seek(0)
+        error = stderr.read(max_bytes).decode("utf-8", errors="replace")
+
+    output = b"".join(lines).decode("utf-8", errors="replace")
+    notice = ""
+    if reason:
+        notice = f"[Output truncated after {len(lines)} lines / {size} bytes: reached the {reason}. Use a narrower command to see more.]"
+    return returncode, output, error, notice
+
+
 class GitAgent:
     """
     An agent that answers questions about Git history by generating and executing Git commands.
@@ -21,35 +87,92 @@ class GitAgent:
     class GitCommand(BaseModel):
         command: str = Field(..., description="The git command to run (excluding 'git')")
 
+    class HistoryQuery(BaseModel):
+        sql: str = Field(..., description="A read-only SQLite query against the commit-history index (tables: commits, file_changes)")
+
     def __init__(self):
         self.llm = get_agent(AGENT_KEY)
         self.prompt = get_prompts(AGENT_KEY)
+        self.max_fix_rounds = get_tool_config("resilience").get("max_fix_rounds", MAX_FIX_ROUNDS)
         self.run_git_tool = self._make_git_tool()
+        self.history_tool = self._make_history_tool()
         self.graph = self._build_graph()
 
     def _make_git_tool(self):
-        @tool
-        def run_git_command(repository_path, command: str) -> str:
+        limits = get_tool_config("git")
+        cache = get_git_cache(limits)
+
+        @tool(response_format="content_and_artifact")
+        def run_git_command(repository_path, command: str) -> tuple[str, ToolResult]:
             """Run a git command in the given repository path."""
+            result = ToolResult(source="git", query=command)
             if isinstance(repository_path, list):
                 repository_path = repository_path[-1]
             if not os.path.exists(os.path.join(repository_path, ".git")):
-                return f"Error: {repository_path} is not a valid Git repository."
-            try:
-                print(f"git {command}")
-                result = subprocess.run(
-                    ["git"] + shlex.split(command.strip()),
-                    cwd=repository_path,
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                return result.stdout.strip()
-            except subprocess.CalledProcessError as e:
-                return f"Error running git command: {e.stderr.strip()}"
+                result.error = f"{repository_path} is not a valid Git repository."
+                return result.render(), result
+            left = time_left()
+            if left is not None and left <= 0:
+                result.error = "Deadline exceeded before running the git command."
+                return result.render(), result
+            print(f"git {command}")
+            args = shlex.split(command.strip())
+            cached = cache.get(repository_path, args) if cache else None
+            if cached is not None:
+                result.text = cached
+                return result.render(), result
+
+            start = time.perf_counter()
+            returncode, output, error, notice = run_git_streamed(
+                args,
+                cwd=repository_path,
+                max_lines=limits.get("max_lines", DEFAULT_MAX_LINES),
+                max_bytes=limits.get("max_bytes", DEFAULT_MAX_BYTES),
+                timeout=bounded_timeout(limits.get("timeout", DEFAULT_TIMEOUT)),
+            )
+            if returncode != 0 and not notice:
+                result.error = f"git command failed: {error.strip()}"
+                return result.render(), result
+            result.text, result.notice, result.truncated = output.strip(), notice, bool(notice)
+            if cache and "time limit" not in notice:
+                cache.put(repository_path, args, f"{result.text}\n\n{notice}".strip(), time.perf_counter() - start)
+            return result.render(), result
 
         return run_git_command
 
+    def _make_history_tool(self):
+        @tool(response_format="content_and_artifact")
+        def query_git_history(repository_path, sql: str, history_db: Optional[str] = None) -> tuple[str, ToolResult]:
+            """Run a read-only SQL query against the commit-history index of the given repository (or the prebuilt `history_db`)."""
+            result = ToolResult(source="git_history", query=sql)
+            if isinstance(repository_path, list):
+                repository_path = repository_path[-1]
+            if not os.path.exists(os.path.join(repository_path, ".git")):
+                result.error = f"{repository_path} is not a valid Git repository."
+                return result.render(), result
+            print(f"history: {sql}")
+            try:
+                columns, rows = get_history_index(repository_path, history_db).query(sql, limit=MAX_QUERY_ROWS + 1)
+            except sqlite3.Error as e:
+                result.error = str(e)
+                return result.render(), result
+            result.columns = columns
+            result.rows = [list(row) for row in rows[:MAX_QUERY_ROWS]]
+            result.truncated = len(rows) > MAX_QUERY_ROWS
+            return result.render(), result
+
+        return query_git_history
+
+    def _select_tool_calls(self, message) -> list[dict]:
+        """Returns every history query and git command the LLM asked for in one turn."""
+        calls = []
+        for tc in message.tool_calls:
+            if tc["name"] == "HistoryQuery":
+                calls.append({"tool": "history", "command": tc["args"]["sql"]})
+            elif tc["name"] == "GitCommand":
+                calls.append({"tool": "git", "command": tc["args"]["command"]})
+        return calls or [{"tool": "git", "command": "log -1"}]
+
     def _build_query_gen(self):
         return (
             RunnableMap({
@@ -58,57 +181,82 @@ class GitAgent:
                 "context": lambda s: s.get("context", [])
             }) 
             | self.prompt 
-            | self.llm.bind_tools([self.GitCommand])
+            | self.llm.bind_tools([self.HistoryQuery, self.GitCommand])
         )
 
     def _query_gen_node(self, state: dict):
         message = self.query_gen.invoke(state)
-        tool_call = next((tc for tc in message.tool_calls if tc["name"] == "GitCommand"), None)
-        state["command"] = tool_call["args"]["command"] if tool_call else "log -1"
-        return state    
+        state["calls"] = self._select_tool_calls(message)
+        state["results"] = [None] * len(state["calls"])
+        return state
+
+    def _run_call(self, repository_path, call: dict, history_db: Optional[str] = None) -> ToolResult:
+        if call["tool"] == "history":
+            return invoke_tool(self.history_tool, {"repository_path": repository_path, "sql": call["command"], "history_db": history_db})
+        return invoke_tool(self.run_git_tool, {"repository_path": repository_path, "command": call["command"]})
 
     def _run_git_node(self, state: dict):
-        result = self.run_git_tool.invoke({
-            "repository_path": state["repository_path"],
-            "command": state["command"]
-        })
-        state["result"] = result
+        pending = [i for i, result in enumerate(state["results"]) if result is None]
+        outputs = run_batch(lambda i: self._run_call(state["repository_path"], state["calls"][i], state.get("history_db")), pending)
+        for i, output in zip(pending, outputs):
+            state["results"][i] = output
+        state["result"] = render_results(state["results"])
         return state
 
     def _check_result_node(self, state: dict) -> Literal["final", "fix_command"]:
-        return "fix_command" if state["result"].startswith("Error:") else "final"
+        # Failing calls are given up on (errors kept) after `max_fix_rounds` or past the deadline
+        left = time_left()
+        if (
+            any(r.error for r in state["results"])
+            and state.get("fix_rounds", 0) < self.max_fix_rounds
+            and (left is None or left > 0)
+        ):
+            return "fix_command"
+        return "final"
 
     def _fix_command_node(self, state: dict):
         fix_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a Git expert. Fix the git command below based on the error message."),
-            ("human", "Repository: {repository_path}\n\nOriginal command:\n{command}\n\nError:\n{result}")
+            ("system", "You are a Git expert. Fix the git command or commit-history SQL query below based on the error message."),
+            ("human", "Repository: {repository_path}\n\nOriginal {tool} query:\n{command}\n\nError:\n{result}")
         ])
         fixer = (
             RunnableMap({
                 "repository_path": lambda s: s["repository_path"],
+                "tool": lambda s: s["tool"],
                 "command": lambda s: s["command"],
                 "result": lambda s: s["result"]
             }) 
             | fix_prompt 
-            | self.llm.bind_tools([self.GitCommand])
+            | self.llm.bind_tools([self.HistoryQuery, self.GitCommand])
         )
-        message = fixer.invoke(state)
-        tool_call = next((tc for tc in message.tool_calls if tc["name"] == "GitCommand"), None)
-        state["command"] = tool_call["args"]["command"] if tool_call else "log -1"
+        failed = [i for i, result in enumerate(state["results"]) if result.error]
+        messages = run_batch(
+            lambda i: fixer.invoke({
+                "repository_path": state["repository_path"],
+                "tool": state["calls"][i]["tool"],
+                "command": state["calls"][i]["command"],
+                "result": state["results"][i].render(),
+            }),
+            failed,
+        )
+        for i, message in zip(failed, messages):
+            state["calls"][i] = self._select_tool_calls(message)[0]
+            state["results"][i] = None
+        state["fix_rounds"] = state.get("fix_rounds", 0) + 1
         return state
 
     def _extract_final(self, state: dict) -> dict:
-        state["final_result"] = state["result"]
+        state["final_result"] = result_message(state["results"], state["result"])
         return state
 
     def _build_graph(self):
         self.query_gen = self._build_query_gen()
         sg = StateGraph(dict)
 
-        sg.add_node("generate_command", self._query_gen_node)
-        sg.add_node("run_command", self._run_git_node)
-        sg.add_node("fix_command", self._fix_command_node)
-        sg.add_node("final", self._extract_final)
+        sg.add_node("generate_command", profiled(self._query_gen_node, "git/generate_command"))
+        sg.add_node("run_command", profiled(self._run_git_node, "git/run_command"))
+        sg.add_node("fix_command", profiled(self._fix_command_node, "git/fix_command"))
+        sg.add_node("final", profiled(self._extract_final, "git/final"))
 
         sg.add_edge(START, "generate_command")
         sg.add_edge("generate_command", "run_command")
@@ -118,30 +266,44 @@ class GitAgent:
 
         return sg.compile()
 
-def information_git_node(state: State) -> State:
+_agent: Optional[GitAgent] = None
+_agent_lock = threading.Lock()
+
+
+def get_git_agent() -> GitAgent:
+    """Returns the process-wide GitAgent, built on first use and shared by every request."""
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            _agent = GitAgent()
+        return _agent
+
+
+def information_git_node(state: State) -> dict:
     query = state.get("git_query", [])
     if not state.get("run_git", False):
-        state["git_response"] = [AIMessage(content="PASS")]
-        return state
+        return {"git_response": [AIMessage(content="PASS")]}
 
     if isinstance(query, list):
         if not query:  # If it's an empty list
             print("Git query skipped: empty list.")
-            state["git_response"] = [AIMessage(content="PASS")]
-            return state
+            return {"git_response": [AIMessage(content="PASS")]}
         query = query[-1]  # Otherwise, use the last HumanMessage
     elif query == "PASS":
-        state["git_response"] = [AIMessage(content="PASS")]
-        return state
+        return {"git_response": [AIMessage(content="PASS")]}
 
-    agent = GitAgent()
+    key = memo_key("git", query, state)
+    if found := memo_lookup(state, key):
+        return {"git_response": found, "memo": {key: found}}
+    agent = get_git_agent()
     result = agent.graph.invoke({
         "git_query": state["git_query"],
         "repository_path": (
             state["repository_path"] if isinstance(state["repository_path"], list)
             else [state["repository_path"]]
         ),
+        "history_db": state.get("history_db"),
         "context": []
     })
-    state["git_response"] = [AIMessage(content=result["result"])]
-    return state
\ No newline at end of file
+    response = [result["final_result"]]
+    return {"git_response": response, **memo_entry(key, response)}
\ No newline at end of file
@@ -1,13 +1,19 @@
-from typing import Literal
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph, START, END
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import AIMessage
 from langchain_core.runnables import RunnableMap
-from github import Github, GithubException
-import os, json
+import time
+import threading
+import requests
 
-from src.utils import State, get_prompts, get_agent
+from src.utils import State, get_prompts, get_agent, get_tool_config, run_batch, memo_key, memo_lookup, memo_entry
+from src.utils.results import ToolResult, render_results, result_message
+from src.utils.resilience import ResilienceError
+from src.utils.profiling import profiled
+from src.indexes import get_github_mirror
+from src.utils.github_client import API_URL, get_github_client
 
 AGENT_KEY = "information_github"
 
@@ -18,31 +24,55 @@ class GitHubAgent:
     def __init__(self):
         self.llm = get_agent(AGENT_KEY)
         self.prompt = get_prompts(AGENT_KEY)
-        self.github = Github(os.getenv("GITHUB_TOKEN"))
+        self.settings = get_tool_config("github")
+        self.github = get_github_client(base_url=self.settings.get("base_url", API_URL))
+        self.mirror = get_github_mirror(self.settings) if self.settings.get("mirror", True) else None
         self.graph = self._build_graph()
 
-    def _run_github_query(self, repo_name: str, query: str):
+    def _search_mirror(self, repo_name: str, query: str):
+        """Answers from the local mirror, syncing it first if `auto_sync` is on and it is stale. Returns None if the repo is not mirrored."""
+        if self.settings.get("auto_sync", False):
+            synced_at = self.mirror.synced_at(repo_name) or 0
+            if time.time() - synced_at > self.settings.get("sync_interval", 3600):
+                try:
+                    self.mirror.sync(repo_name)
+                except Exception as e:
+                    print(f"GitHub mirror sync failed: {e}")
+        if not self.mirror.is_synced(repo_name):
+            return None
+        found = self.mirror.search(repo_name, query)
+        columns = ["number", "type", "title", "state", "author", "labels", "comments", "created_at", "updated_at", "url"]
+        return ToolResult(
+            source="github",
+            query=query,
+            columns=columns,
+            rows=[[", ".join(item[c]) if c == "labels" else item[c] for c in columns] for item in found["items"]],
+            total=found["total"],
+            truncated=found["total"] > len(found["items"]),
+        )
+
+    def _run_github_query(self, repo_name: str, query: str) -> ToolResult:
+        if self.mirror:
+            result = self._search_mirror(repo_name, query)
+            if result is not None:
+                return result
+        result = ToolResult(source="github", query=query)
         try:
-            repo = self.github.get_repo(repo_name)
             if "issue" in query.lower():
-                search = self.github.search_issues(f"repo:{repo_name} {query}")
-                return json.dumps([{
-                    "number": i.number,
-                    "title": i.title,
-                    "state": i.state,
-                    "url": i.html_url
-                } for i in search[:5]], indent=2)
+                search, _ = self.github.get("/search/issues", {"q": f"repo:{repo_name} {query}", "per_page": 5})
+                result.columns = ["number", "title", "state", "url"]
+                result.rows = [[i["number"], i["title"], i["state"], i["html_url"]] for i in search["items"][:5]]
+                result.total = search.get("total_count")
+                result.truncated = (result.total or 0) > len(result.rows)
             elif "pull" in query.lower():
-                prs = repo.get_pulls(state="all")
-                return json.dumps([{
-                    "number": pr.number,
-                    "title": pr.title,
-                    "user": pr.user.login,
-                    "url": pr.html_url
-                } for pr in prs[:5]], indent=2)
-            return "Query type not supported."
-        except GithubException as e:
-            return f"GitHub error: {str(e)}"
+                prs, _ = self.github.get(f"/repos/{repo_name}/pulls", {"state": "all", "per_page": 5})
+                result.columns = ["number", "title", "user", "url"]
+                result.rows = [[pr["number"], pr["title"], pr["user"]["login"], pr["html_url"]] for pr in prs[:5]]
+            else:
+                result.text = "Query type not supported."
+        except (requests.RequestException, ResilienceError) as e:
+            result.error = f"GitHub error: {str(e)}"
+        return result
 
     def _build_query_gen(self):
         return (
@@ -57,25 +87,26 @@ class GitHubAgent:
 
     def _query_gen_node(self, state: dict):
         message = self.query_gen.invoke(state)
-        tool_call = next((tc for tc in message.tool_calls if tc["name"] == "GitHubQuery"), None)
-        state["query"] = tool_call["args"]["query"] if tool_call else "issue"
+        queries = [tc["args"]["query"] for tc in message.tool_calls if tc["name"] == "GitHubQuery"]
+        state["queries"] = queries or ["issue"]
         return state
 
     def _run_query_node(self, state: dict):
-        result = self._run_github_query(state["github_url"][-1], state["query"])
-        state["result"] = result
+        repo_name = state["github_url"][-1]
+        state["results"] = run_batch(lambda query: self._run_github_query(repo_name, query), state["queries"])
+        state["result"] = render_results(state["results"])
         return state
 
     def _extract_final(self, state: dict):
-        state["final_result"] = state["result"]
+        state["final_result"] = result_message(state["results"], state["result"])
         return state
 
     def _build_graph(self):
         self.query_gen = self._build_query_gen()
         sg = StateGraph(dict)
-        sg.add_node("generate_query", self._query_gen_node)
-        sg.add_node("run_query", self._run_query_node)
-        sg.add_node("final", self._extract_final)
+        sg.add_node("generate_query", profiled(self._query_gen_node, "github/generate_query"))
+        sg.add_node("run_query", profiled(self._run_query_node, "github/run_query"))
+        sg.add_node("final", profiled(self._extract_final, "github/final"))
 
         sg.add_edge(START, "generate_query")
         sg.add_edge("generate_query", "run_query")
@@ -83,20 +114,34 @@ class GitHubAgent:
         sg.add_edge("final", END)
         return sg.compile()
 
-def information_github_node(state: State) -> State:
+_agent: Optional[GitHubAgent] = None
+_agent_lock = threading.Lock()
+
+
+def get_github_agent() -> GitHubAgent:
+    """Returns the process-wide GitHubAgent, built on first use and shared by every request."""
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            _agent = GitHubAgent()
+        return _agent
+
+
+def information_github_node(state: State) -> dict:
     query = state["github_query"][-1] if isinstance(state["github_query"], list) else state["github_query"]
     if not state.get("run_github", False):
-        state["github_response"] = [AIMessage(content="PASS")]
-        return state
+        return {"github_response": [AIMessage(content="PASS")]}
     if query == "PASS":
-        state["github_response"] = ""
-        return state
+        return {"github_response": ""}
 
-    agent = GitHubAgent()
+    key = memo_key("github", query, state)
+    if found := memo_lookup(state, key):
+        return {"github_response": found, "memo": {key: found}}
+    agent = get_github_agent()
     result = agent.graph.invoke({
         "github_query": state["github_query"],
         "github_url": [state["github_url"]],
         "context": []
     })
-    state["github_response"] = AIMessage(content=result["final_result"])
-    return state
\ No newline at end of file
+    response = [result["final_result"]]
+    return {"github_response": response, **memo_entry(key, response)}
\ No newline at end of file
@@ -1,3 +1,6 @@
+import os
+import sqlite3
+import threading
 from typing import Literal
 from pydantic import BaseModel, Field
 
@@ -8,7 +11,13 @@ from langchain_core.messages import AIMessage
 from langchain_core.runnables import RunnableMap
 from langchain_community.utilities import SQLDatabase
 
-from src.utils import State, get_prompts, get_agent
+from src.utils import State, get_prompts, get_agent, get_tool_config, connect_readonly, run_batch, memo_key, memo_lookup, memo_entry
+from src.utils.results import ToolResult, invoke_tool, render_results, result_message
+from src.utils.resilience import time_left
+from src.utils.profiling import profiled
+
+MAX_SQL_ROWS = 1000
+MAX_FIX_ROUNDS = 2
 
 AGENT_KEY = "source_code"
 class SourceAgent:
@@ -18,10 +27,11 @@ class SourceAgent:
 
     The agent is designed to:
     - Interpret a user question (source_query) in the context of a UML-based schema.
-    - Use an LLM to generate a SQL query.
-    - Execute the query on the database.
-    - If an error occurs, ask the LLM to fix the query and retry.
-    - Return the final query result.
+    - Use an LLM to generate one or more SQL queries.
+    - Execute the queries concurrently on read-only connections to the database.
+    - If an error occurs, ask the LLM to fix the failing queries and retry them, at most
+      `tools.resilience.max_fix_rounds` times and not past the question's deadline.
+    - Return the structured query results (see `ToolResult`).
 
     Attributes:
         db (SQLDatabase): The SQLDatabase object connected to the provided database URI.
@@ -44,9 +54,12 @@ class SourceAgent:
         Args:
             db_uri (str): URI to the SQLite database containing UML schema data.
         """
-        self.db = SQLDatabase.from_uri(db_uri)
+        # Tables are reflected on first use, not each time an agent is created for a code DB
+        self.db = SQLDatabase.from_uri(db_uri, lazy_table_reflection=True)
+        self.db_path = db_uri.split("sqlite:///", 1)[-1]
         self.llm = get_agent(AGENT_KEY)
         self.prompt = get_prompts(AGENT_KEY)
+        self.max_fix_rounds = get_tool_config("resilience").get("max_fix_rounds", MAX_FIX_ROUNDS)
         self.execute_sql_tool = self._make_execute_sql_tool()
         self.graph = self._build_graph()
 
@@ -54,15 +67,34 @@ class SourceAgent:
         """
         Creates a LangChain tool that executes SQL queries on the configured database.
 
+        Each call opens its own read-only connection, so several queries from the same
+        LLM turn can run concurrently. The tool returns the rendered rows as content and a
+        `ToolResult` as artifact.
+
         Returns:
             Tool: A callable LangChain tool for executing SQL.
         """
-        db = self.db
-        @tool
-        def execute_sql(query: str) -> str:
+        db_path = self.db_path
+        @tool(response_format="content_and_artifact")
+        def execute_sql(query: str) -> tuple[str, ToolResult]:
             """Executes a SQL query against the UML database and returns the result."""
-            result = db.run_no_throw(query)
-            return result or "Error: Query failed."
+            result = ToolResult(source="sql", query=query)
+            try:
+                conn = connect_readonly(db_path)
+                try:
+                    cursor = conn.execute(query)
+                    result.columns = [d[0] for d in cursor.description or []]
+                    rows = cursor.fetchmany(MAX_SQL_ROWS + 1)
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                result.error = str(e)
+                return result.render(), result
+            if not rows:
+                result.error = "Query failed."
+            result.rows = [list(row) for row in rows[:MAX_SQL_ROWS]]
+            result.truncated = len(rows) > MAX_SQL_ROWS
+            return result.render(), result
         
         return execute_sql
 
@@ -85,58 +117,69 @@ class SourceAgent:
 
     def _query_gen_node(self, state: dict):
         """
-        LangGraph node that invokes the query generation chain and returns SQL.
+        LangGraph node that invokes the query generation chain and collects every SQL
+        query the LLM asked for in that turn.
 
         Args:
             state (dict): The graph state containing 'source_query' and 'context'.
 
         Returns:
-            dict: A dictionary containing the generated SQL as 'sql'.
+            dict: The updated state with the generated SQL queries in 'queries'.
         """
         message = self.query_gen.invoke(state)
-        tool_call = next((tc for tc in message.tool_calls if tc["name"] == "GeneratedQuery"), None)
-        if tool_call:
-            sql = tool_call["args"]["sql"]
-            return {"sql": sql}
-        return {"sql": "SELECT 1"}  # fallback
+        state["queries"] = [tc["args"]["sql"] for tc in message.tool_calls if tc["name"] == "GeneratedQuery"]
+        state["queries"] = state["queries"] or ["SELECT 1"]  # fallback
+        state["results"] = [None] * len(state["queries"])
+        return state
 
     def _run_sql_node(self, state: dict):
         """
-        LangGraph node that executes the generated SQL query and stores the result.
+        LangGraph node that concurrently executes the queries that have no result yet and
+        merges all results.
 
         Args:
-            state (dict): The graph state containing 'sql'.
+            state (dict): The graph state containing 'queries' and 'results'.
 
         Returns:
-            dict: The updated state with the execution result in 'result'.
+            dict: The updated state with per-query 'results' (`ToolResult`s) and the merged 'result'.
         """
-        result = self.execute_sql_tool.invoke({"query": state["sql"]})
-        state["result"] = result
+        pending = [i for i, result in enumerate(state["results"]) if result is None]
+        outputs = run_batch(lambda i: invoke_tool(self.execute_sql_tool, {"query": state["queries"][i]}), pending)
+        for i, output in zip(pending, outputs):
+            state["results"][i] = output
+        state["result"] = render_results(state["results"])
         return state
 
     def _check_result_node(self, state: dict) -> Literal["final", "fix_query"]:
         """
-        Determines whether the query result is valid or needs to be fixed.
+        Determines whether the query results are valid or some query needs to be fixed.
+        Failing queries are given up on (their errors kept in the results) once the fix
+        rounds are used up or the deadline has passed.
 
         Args:
-            state (dict): The graph state containing the SQL execution result.
+            state (dict): The graph state containing the SQL execution results.
 
         Returns:
             Literal["final", "fix_query"]: The next node to execute based on result status.
         """
-        if state["result"].startswith("Error:"):
+        left = time_left()
+        if (
+            any(result.error for result in state["results"])
+            and state.get("fix_rounds", 0) < self.max_fix_rounds
+            and (left is None or left > 0)
+        ):
             return "fix_query"
         return "final"
 
     def _fix_query_node(self, state: dict):
         """
-        LangGraph node that uses the LLM to fix an invalid SQL query based on the error message.
+        LangGraph node that uses the LLM to fix every failing SQL query based on its error message.
 
         Args:
-            state (dict): The graph state containing the original SQL and error message.
+            state (dict): The graph state containing the SQL queries and their results.
 
         Returns:
-            dict: A dictionary with a revised SQL query as 'sql'.
+            dict: The updated state with the failing queries replaced by revised ones.
         """
         fix_prompt = ChatPromptTemplate.from_messages([
             ("system", "You are a SQL expert. Fix the SQL query below based on the error message."),
@@ -150,23 +193,29 @@ class SourceAgent:
             | fix_prompt
             | self.llm.bind_tools([self.GeneratedQuery])
         )
-        message = fixer.invoke(state)
-        tool_call = next((tc for tc in message.tool_calls if tc["name"] == "GeneratedQuery"), None)
-        if tool_call:
-            return {"sql": tool_call["args"]["sql"]}
-        return {"sql": "SELECT 1"}
+        failed = [i for i, result in enumerate(state["results"]) if result.error]
+        messages = run_batch(
+            lambda i: fixer.invoke({"sql": state["queries"][i], "result": state["results"][i].render()}),
+            failed,
+        )
+        for i, message in zip(failed, messages):
+            tool_call = next((tc for tc in message.tool_calls if tc["name"] == "GeneratedQuery"), None)
+            state["queries"][i] = tool_call["args"]["sql"] if tool_call else "SELECT 1"
+            state["results"][i] = None
+        state["fix_rounds"] = state.get("fix_rounds", 0) + 1
+        return state
 
     def _extract_final(self, state: dict) -> dict:
         """
-        Final LangGraph node that saves the final query result to 'final_result'.
+        Final LangGraph node that saves the final query results to 'final_result'.
 
         Args:
-            state (dict): The graph state with the SQL execution result.
+            state (dict): The graph state with the SQL execution results.
 
         Returns:
-            dict: The updated state with 'final_result'.
+            dict: The updated state with 'final_result', a message carrying the rendered and structured results.
         """
-        state["final_result"] = state["result"]
+        state["final_result"] = result_message(state["results"], state["result"])
         return state
 
     def _build_graph(self):
@@ -179,10 +228,10 @@ class SourceAgent:
         self.query_gen = self._build_query_gen()
 
         sg = StateGraph(dict)
-        sg.add_node("generate_query", self._query_gen_node)
-        sg.add_node("run_query", self._run_sql_node)
-        sg.add_node("fix_query", self._fix_query_node)
-        sg.add_node("final", self._extract_final)
+        sg.add_node("generate_query", profiled(self._query_gen_node, "source_code/generate_query"))
+        sg.add_node("run_query", profiled(self._run_sql_node, "source_code/run_query"))
+        sg.add_node("fix_query", profiled(self._fix_query_node, "source_code/fix_query"))
+        sg.add_node("final", profiled(self._extract_final, "source_code/final"))
 
         sg.add_edge(START, "generate_query")
         sg.add_edge("generate_query", "run_query")
@@ -191,35 +240,51 @@ class SourceAgent:
         sg.add_edge("final", END)
 
         return sg.compile()
-def information_source_code_node(state: State) -> State:
+_agents: dict[str, SourceAgent] = {}
+_agents_lock = threading.Lock()
+
+
+def get_source_agent(source_db: str) -> SourceAgent:
+    """Returns the process-wide agent of a code DB, reflecting its schema and compiling the graph on first use."""
+    key = os.path.realpath(source_db)
+    with _agents_lock:
+        if key not in _agents:
+            _agents[key] = SourceAgent(db_uri=f"sqlite:///{source_db}")
+        return _agents[key]
+
+
+def information_source_code_node(state: State) -> dict:
     """
     Handles LLM-based SQL query generation and execution for source code context.
 
     This function extracts the latest source query from the state, uses a SourceAgent 
     to generate and execute a SQL query based on the UML diagram in the specified 
-    SQLite database, and stores the result in `state["source_response"]`.
+    SQLite database, and returns it as the `source_response` update.
 
-    If the source query is "PASS", the function skips processing and returns the 
-    state unchanged.
+    If the source query is "PASS", the function skips processing. If an earlier turn of the
+    session ran the same sub-query, its response is reused. The database is only read: its
+    `file_history` table is filled in beforehand, by `python -m src.indexes.file_history` or
+    when a project bundle is built.
 
     Args:
         state (State): The current LangGraph state containing the source query and 
                        the name of the source database (as 'source_db').
 
     Returns:
-        State: The updated state with the SQL query result stored in 'source_response'.
+        dict: The state update holding the SQL query result in 'source_response'.
     """
     query = state["source_query"][-1] if isinstance(state["source_query"], list) and state["source_query"] else state["source_query"]
     if not state.get("run_code", False):
-        state["source_response"] = [AIMessage(content="PASS")]
-        return state
+        return {"source_response": [AIMessage(content="PASS")]}
     if query == "PASS":
-        state["source_response"] = ""
-        return state
-    agent = SourceAgent(db_uri=f"sqlite:///{state['source_db']}")
+        return {"source_response": ""}
+    key = memo_key("source_code", query, state)
+    if found := memo_lookup(state, key):
+        return {"source_response": found, "memo": {key: found}}
+    agent = get_source_agent(state["source_db"])
     result = agent.graph.invoke({
             "source_query": state["source_query"],
             "context": []
         })
-    state["source_response"] = AIMessage(result["final_result"])
-    return state
+    response = [result["final_result"]]
+    return {"source_response": response, **memo_entry(key, response)}
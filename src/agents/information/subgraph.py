@@ -1,19 +1,48 @@
+import time
+from functools import wraps
+
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
+from langchain_core.messages import AIMessage
 
-from src.utils import State
+from src.utils import State, metrics
+from src.utils.resilience import ResilienceError, deadline_at, is_retryable
+from src.utils.profiling import profiled
 from .supervisor import information_supervisor_node
 from .source_code import information_source_code_node
 from .git import information_git_node
 from .github import information_github_node
 from .docs import information_docs_node
 
-MAX_INFORMATION_ROUNDS = 3  # Limit on sequential calls
+MAX_INFORMATION_ROUNDS = 4  # Limit on sequential calls (one per information agent)
+
+
+def within_deadline(node, response_key: str):
+    """
+    Runs an information node under the turn's deadline. If its backend is unavailable
+    (deadline passed, circuit open, or transient failures outlasting the retries), the
+    failure becomes the node's response so the answer is written from the evidence so far.
+    """
+    @wraps(node)
+    def run(state: State) -> dict:
+        with deadline_at(state.get("deadline")):
+            try:
+                return node(state)
+            except Exception as e:
+                if not isinstance(e, ResilienceError) and not is_retryable(e):
+                    raise
+                metrics.incr("resilience.degraded")
+                print(f"{node.__name__} degraded: {e}")
+                return {response_key: [AIMessage(content=f"Unavailable: {e}", response_metadata={"degraded": True})]}
+    return run
 
 
 def call_next_agent(state: State) -> str:
     if state.get("rounds", 0) >= MAX_INFORMATION_ROUNDS:
         return "end"
+    if state.get("deadline") and time.time() >= state["deadline"]:
+        metrics.incr("resilience.deadline_exceeded")
+        return "end"
 
     agent_fields = {
         "source_code": ("source_query", "source_response"),
@@ -38,11 +67,11 @@ def call_next_agent(state: State) -> str:
 def create_information_subgraph():
     workflow = StateGraph(State)
 
-    workflow.add_node("information_supervisor", information_supervisor_node)
-    workflow.add_node("information_source_code", information_source_code_node)
-    workflow.add_node("information_git", information_git_node)
-    workflow.add_node("information_github", information_github_node)
-    workflow.add_node("information_docs", information_docs_node)
+    workflow.add_node("information_supervisor", profiled(within_deadline(information_supervisor_node, "supervisor_response"), "information_supervisor"))
+    workflow.add_node("information_source_code", profiled(within_deadline(information_source_code_node, "source_response"), "information_source_code"))
+    workflow.add_node("information_git", profiled(within_deadline(information_git_node, "git_response"), "information_git"))
+    workflow.add_node("information_github", profiled(within_deadline(information_github_node, "github_response"), "information_github"))
+    workflow.add_node("information_docs", profiled(within_deadline(information_docs_node, "docs_response"), "information_docs"))
 
     workflow.add_edge(START, "information_supervisor")
     workflow.add_conditional_edges(
@@ -57,36 +86,22 @@ def create_information_subgraph():
         }
     )
 
-    # 👇 Fix: define each increment_round as a named function
-    def increment_after_source(state: State):
-        state["rounds"] = state.get("rounds", 0) + 1
-        return state
-
-    def increment_after_git(state: State):
-        state["rounds"] = state.get("rounds", 0) + 1
-        return state
-
-    def increment_after_github(state: State):
-        state["rounds"] = state.get("rounds", 0) + 1
-        return state
-
-    def increment_after_docs(state: State):
-        state["rounds"] = state.get("rounds", 0) + 1
-        return state
+    def increment_rounds(state: State) -> dict:
+        return {"rounds": state.get("rounds", 0) + 1}
 
-    workflow.add_node("rounds_information_source_code", increment_after_source)
+    workflow.add_node("rounds_information_source_code", profiled(increment_rounds, "rounds_information_source_code"))
     workflow.add_edge("information_source_code", "rounds_information_source_code")
     workflow.add_edge("rounds_information_source_code", "information_supervisor")
 
-    workflow.add_node("rounds_information_git", increment_after_git)
+    workflow.add_node("rounds_information_git", profiled(increment_rounds, "rounds_information_git"))
     workflow.add_edge("information_git", "rounds_information_git")
     workflow.add_edge("rounds_information_git", "information_supervisor")
 
-    workflow.add_node("rounds_information_github", increment_after_github)
+    workflow.add_node("rounds_information_github", profiled(increment_rounds, "rounds_information_github"))
     workflow.add_edge("information_github", "rounds_information_github")
     workflow.add_edge("rounds_information_github", "information_supervisor")
 
-    workflow.add_node("rounds_information_docs", increment_after_docs)
+    workflow.add_node("rounds_information_docs", profiled(increment_rounds, "rounds_information_docs"))
     workflow.add_edge("information_docs", "rounds_information_docs")
     workflow.add_edge("rounds_information_docs", "information_supervisor")
 
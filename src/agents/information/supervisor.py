@@ -1,27 +1,34 @@
 import json
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langchain_core.runnables import RunnableLambda
-from src.utils import State, get_prompts, get_agent
+from src.utils import State, get_prompts, get_agent, metrics
 
 AGENT_KEY = "information_supervisor"
 
 llm = get_agent(AGENT_KEY)
 prompt = get_prompts(AGENT_KEY)
 
-def safe_parse_json(text: str):
-    try:
-        json_str = text[text.index("{"):]
-        result = json.loads(json_str)
-
-        if isinstance(result, list):
-            print("Warning: LLM returned a list instead of a dict.")
-            result = result[0] if result and isinstance(result[0], dict) else {}
+def safe_parse_json(text: str) -> dict:
+    """
+    Parses the routing JSON object of the supervisor's reply.
 
-        return result
-    except Exception as e:
-        return {}
-
-def information_supervisor_node(state: State) -> State:
+    An unparseable reply routes to no agent, but is not silent: it is counted as
+    `information_supervisor.parse_errors`, logged, and returned as `{"error": ...}` so it
+    shows in `supervisor_response`.
+    """
+    try:
+        result = json.JSONDecoder().raw_decode(text[text.index("{"):])[0]
+    except ValueError as e:
+        metrics.incr("information_supervisor.parse_errors")
+        print(f"Warning: could not parse the information supervisor's reply ({e}): {text[:200]!r}")
+        return {"error": f"Unparseable reply: {e}", "reply": text}
+
+    if isinstance(result, list):
+        print("Warning: LLM returned a list instead of a dict.")
+        result = result[0] if result and isinstance(result[0], dict) else {}
+    return result
+
+def information_supervisor_node(state: State) -> dict:
     input_vars = {
         "user_query": state.get("user_query", []),
         "context": state.get("context", []),
@@ -40,16 +47,17 @@ def information_supervisor_node(state: State) -> State:
 
     parsed = safe_parse_json(result)
 
+    update = {}
     if isinstance(parsed, dict):
         if parsed.get("source_code", "PASS") != "PASS" and not state.get("source_response"):
-            state["source_query"] = [HumanMessage(content=parsed["source_code"])]
+            update["source_query"] = [HumanMessage(content=parsed["source_code"])]
         if parsed.get("git", "PASS") != "PASS" and not state.get("git_response"):
-            state["git_query"] = [HumanMessage(content=parsed["git"])]
+            update["git_query"] = [HumanMessage(content=parsed["git"])]
         if parsed.get("github", "PASS") != "PASS" and not state.get("github_response"):
-            state["github_query"] = [HumanMessage(content=parsed["github"])]
+            update["github_query"] = [HumanMessage(content=parsed["github"])]
         if parsed.get("docs", "PASS") != "PASS" and not state.get("docs_response"):
-            state["docs_query"] = [HumanMessage(content=parsed["docs"])]
+            update["docs_query"] = [HumanMessage(content=parsed["docs"])]
 
     # Add supervisor LLM output for debugging or transparency
-    state["supervisor_response"] = [AIMessage(content=str(parsed))]
-    return state
\ No newline at end of file
+    update["supervisor_response"] = [AIMessage(content=str(parsed))]
+    return update
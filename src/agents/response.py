@@ -1,27 +1,38 @@
-import json
+import re
+import time
+from typing import Optional
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langchain_core.runnables import RunnableLambda
-from src.utils import State, get_prompts, get_agent
+from src.utils import State, get_prompts, get_agent, get_tool_config, metrics
+from src.utils.results import MAX_ROWS, MAX_CHARS, ToolResult, get_results, render_results
 
 AGENT_KEY = "response"
+QUERY_KEYS = ("source_query", "git_query", "github_query", "docs_query")
+RESPONSE_KEYS = ("source_response", "git_response", "github_response", "docs_response")
+FAST_PATH_MAX_ROWS = 20
+FAST_PATH_MAX_LINES = 30
+# Questions asking for reasoning rather than a lookup always go to the LLM.
+SYNTHESIS_PATTERN = re.compile(r"\b(why|explain|describe|compare|summari[sz]e|how (does|do|is|are|can|should)|what if|difference)\b", re.I)
+# Questions answered by whether the lookup found anything ("Is there an entity named ...?")
+YES_NO_PATTERN = re.compile(r"^\s*(is|are|was|were|does|do|did|has|have|can)\b", re.I)
 llm = get_agent(AGENT_KEY)
 prompt = get_prompts(AGENT_KEY)
 
-import ast
+def render_agent_response(messages: list[BaseMessage], settings: dict) -> list[BaseMessage]:
+    """
+    Renders the latest response of an information agent for the response prompt.
 
-def clean_source_response(messages: list[BaseMessage]) -> list[BaseMessage]:
+    Structured results attached by the agent (see `ToolResult`) are rendered once, within
+    the `tools.response` row and character budget; plain responses are passed through.
+    """
     if not messages:
         return []
+    message = messages[-1]
+    results = get_results(message)
+    if not results:
+        return [message]
+    return [AIMessage(content=render_results(results, settings.get("max_rows", MAX_ROWS), settings.get("max_chars", MAX_CHARS)))]
 
-    content = messages[0].content  # assume single message for now
-    try:
-        parsed = ast.literal_eval(content)  # safe parse string into Python list
-        # Expecting list of tuples, extract first element of each
-        class_names = sorted(set(item[0] for item in parsed if isinstance(item, tuple)))
-        formatted = "The following classes or entities were found:\n" + "\n".join(f"- {name}" for name in class_names)
-        return [AIMessage(content=formatted)]
-    except Exception:
-        return [AIMessage(content="(⚠️ Couldn't parse source response.)\n\n" + content)]
 def ensure_list(value):
     # Ensure all values are lists of BaseMessages
     if isinstance(value, list):
@@ -33,17 +44,102 @@ def ensure_list(value):
     else:
         return []
 
-def response_node(state: State) -> State:
+def _markdown_table(result: ToolResult) -> str:
+    lines = ["| " + " | ".join(result.columns) + " |", "|" + "---|" * len(result.columns)]
+    lines += ["| " + " | ".join("" if v is None else str(v).replace("|", "\\|") for v in row) + " |" for row in result.rows]
+    return "\n".join(lines)
+
+def render_fast_path(result: ToolResult, max_rows: int = FAST_PATH_MAX_ROWS, yes_no: bool = False) -> Optional[str]:
+    """
+    Renders a single tool result as a final answer with a fixed template, or returns None
+    if the result is not a plain lookup (an error, no rows, or too large to list).
+
+    The answer to a yes/no question starts with "Yes." and lists what was found; free
+    text, and a single row of numbers (a count the question compares to something), are
+    left to the LLM.
+    """
+    if result.error or result.truncated:
+        return None
+    if yes_no:
+        if not result.columns or not result.rows or (len(result.rows) == 1 and all(isinstance(v, (int, float)) for v in result.rows[0])):
+            return None
+        answer = render_fast_path(result, max_rows)
+        return f"Yes. {answer}" if answer is not None else None
+    if not result.columns:
+        lines = result.text.strip().splitlines()
+        if not lines or len(lines) > FAST_PATH_MAX_LINES:
+            return None
+        return f"Output of `git {result.query}`:\n\n```\n{result.text.strip()}\n```" if result.source == "git" else result.text.strip()
+    if not result.rows or len(result.rows) > max_rows:
+        return None
+    count = f"{len(result.rows)} result{'s' if len(result.rows) != 1 else ''}"
+    if len(result.columns) == 1:
+        return f"Found {count} for `{result.columns[0]}`:\n" + "\n".join(f"- {row[0]}" for row in result.rows)
+    if len(result.rows) == 1:
+        return "Found 1 result:\n" + "\n".join(f"- {c}: {v}" for c, v in zip(result.columns, result.rows[0]))
+    return f"Found {count}:\n\n{_markdown_table(result)}"
+
+def _last_text(messages: list[BaseMessage]) -> str:
+    return messages[-1].content if messages and isinstance(messages[-1].content, str) else ""
+
+def single_lookup(state: State) -> Optional[BaseMessage]:
+    """
+    Returns the response of the one agent the information supervisor routed the question
+    to, if its plan was a single lookup: one agent, answered in one round, after which the
+    supervisor asked for nothing more.
+    """
+    routed = [
+        response_key for query_key, response_key in zip(QUERY_KEYS, RESPONSE_KEYS)
+        if (query := ensure_list(state.get(query_key, []))) and query[-1].content not in ("", "PASS")
+    ]
+    if len(routed) != 1 or state.get("rounds", 0) != 1:
+        return None
+    messages = ensure_list(state.get(routed[0], []))
+    return messages[-1] if messages and messages[-1].content not in ("", "PASS") else None
+
+def fast_path_answer(state: State, settings: dict) -> Optional[str]:
+    """
+    Answers without the response LLM when the supervisor's plan was a single lookup (see
+    `single_lookup`), its one structured result is a plain lookup, and the question does
+    not ask for reasoning.
+    """
+    if not settings.get("fast_path", True):
+        return None
+    question = _last_text(ensure_list(state.get("user_query", [])))
+    if SYNTHESIS_PATTERN.search(question):
+        return None
+    response = single_lookup(state)
+    if response is None:
+        return None
+    results = get_results(response)
+    if len(results) != 1:
+        return None
+    return render_fast_path(results[0], settings.get("fast_path_max_rows", FAST_PATH_MAX_ROWS), bool(YES_NO_PATTERN.match(question)))
+
+def response_node(state: State) -> dict:
+    settings = get_tool_config("response")
+    start = time.perf_counter()
+    answer = fast_path_answer(state, settings)
+    if answer is not None:
+        # Estimate the time saved from the average response LLM call of this run so far
+        counters = metrics.snapshot()
+        if counters.get("response_fast_path.misses"):
+            average = counters.get("response_fast_path.llm_seconds", 0) / counters["response_fast_path.misses"]
+            metrics.incr("response_fast_path.saved_seconds", max(average - (time.perf_counter() - start), 0))
+        metrics.incr("response_fast_path.hits")
+        return {"final_response": AIMessage(content=answer, response_metadata={"fast_path": True})}
+
     input_data = {
         "user_query": ensure_list(state.get("user_query", [])),
-        "source_response": clean_source_response(ensure_list(state.get("source_response", []))),
-        "git_response": clean_source_response(ensure_list(state.get("git_response", []))),
-        "github_response": clean_source_response(ensure_list(state.get("github_response", []))),
-        "docs_response": clean_source_response(ensure_list(state.get("docs_response", []))),
+        "source_response": render_agent_response(ensure_list(state.get("source_response", [])), settings),
+        "git_response": render_agent_response(ensure_list(state.get("git_response", [])), settings),
+        "github_response": render_agent_response(ensure_list(state.get("github_response", [])), settings),
+        "docs_response": render_agent_response(ensure_list(state.get("docs_response", [])), settings),
         "context": ensure_list(state.get("context", [])),
     }
     # This chain already includes prompt -> LLM -> extract .content
     chain = prompt | llm | RunnableLambda(lambda msg: msg.content if isinstance(msg, BaseMessage) else msg)
     result = chain.invoke(input_data)
-    state["final_response"] = AIMessage(content=result)
-    return state
\ No newline at end of file
+    metrics.incr("response_fast_path.misses")
+    metrics.incr("response_fast_path.llm_seconds", time.perf_counter() - start)
+    return {"final_response": AIMessage(content=result)}
\ No newline at end of file
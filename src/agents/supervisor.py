@@ -1,4 +1,43 @@
-from src.utils import State
-def supervisor_node(state: State) -> State:
-    """An LLM-based router."""
-    return state
+import time
+from langchain_core.messages import AIMessage, HumanMessage
+from src.utils import State, get_tool_config
+from src.utils.results import get_results, render_results
+
+QUERY_KEYS = ("source_query", "git_query", "github_query", "docs_query")
+RESPONSE_KEYS = ("source_response", "git_response", "github_response", "docs_response")
+EVIDENCE_MAX_ROWS = 20
+EVIDENCE_MAX_CHARS = 2000
+
+def previous_turn_context(state: State) -> list:
+    """Summarizes the question, answer and agent evidence of the previous turn of a session."""
+    final_response = state.get("final_response")
+    if not final_response:
+        return []
+    user_query = state.get("user_query") or []
+    context = []
+    if len(user_query) > 1:
+        context.append(HumanMessage(content=f"Previous question: {user_query[-2].content}"))
+    context.append(AIMessage(content=f"Previous answer: {final_response.content}"))
+    for key in RESPONSE_KEYS:
+        messages = state.get(key) or []
+        if not isinstance(messages, list) or not messages or messages[-1].content in ("", "PASS"):
+            continue
+        results = get_results(messages[-1])
+        evidence = render_results(results, EVIDENCE_MAX_ROWS, EVIDENCE_MAX_CHARS) if results else messages[-1].content[:EVIDENCE_MAX_CHARS]
+        context.append(AIMessage(content=f"Previous {key.replace('_response', '')} evidence:\n{evidence}"))
+    return context
+
+def supervisor_node(state: State) -> dict:
+    """
+    An LLM-based router.
+
+    Also starts a new turn: when the graph runs with a checkpointer, the agent channels left
+    by the previous turn of the session are cleared and its question, answer and evidence
+    are passed on as `context`, and the turn's `deadline` is set from
+    `tools.resilience.deadline` (seconds).
+    """
+    update = {key: [] for key in QUERY_KEYS + RESPONSE_KEYS}
+    update.update(rounds=0, final_response=None, context=previous_turn_context(state))
+    seconds = get_tool_config("resilience").get("deadline")
+    update["deadline"] = time.time() + seconds if seconds else None
+    return update
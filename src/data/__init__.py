@@ -1,3 +1,4 @@
-from .load_data import load_code_to_text_dataset
+from .load_data import load_code_to_text_dataset, iter_code_to_text_batches, write_code_to_text_csv, distinct_repos
+from .preprocess import write_project_lists
 
-__all__ = ["load_code_to_text_dataset"]
\ No newline at end of file
+__all__ = ["load_code_to_text_dataset", "iter_code_to_text_batches", "write_code_to_text_csv", "distinct_repos", "write_project_lists"]
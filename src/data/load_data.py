@@ -1,34 +1,112 @@
+import os
+import glob
 from datasets import load_dataset
 import pandas as pd
-from typing import Optional
+from typing import Iterator, Optional
+
+DATASET = "google/code_x_glue_ct_code_to_text"
+CACHE_DIR = "../../data/raw/"
+BATCH_SIZE = 10000
+# A directory holding the Java config's Parquet files (`<split>-*.parquet`, as exported on the
+# Hub) to read instead of downloading them, e.g. on a machine without access to the Hub
+DATA_DIR_ENV = "CODE_TO_TEXT_DATA_DIR"
+
+def _dataset_args() -> tuple[tuple, dict]:
+    """Returns the `load_dataset` arguments of the dataset: the Hub's, or the local Parquet files of `CODE_TO_TEXT_DATA_DIR`."""
+    data_dir = os.getenv(DATA_DIR_ENV)
+    if not data_dir:
+        return (DATASET, "java"), {"cache_dir": CACHE_DIR}
+    files = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.parquet"))):
+        files.setdefault(os.path.basename(path).split("-", 1)[0], []).append(path)
+    if not files:
+        raise FileNotFoundError(f"No <split>-*.parquet files in {data_dir}")
+    return ("parquet",), {"data_files": files}
 
 def load_code_to_text_dataset(
     split: str = "train",
     limit: Optional[int] = None,
-    as_dataframe: bool = True
+    as_dataframe: bool = True,
+    columns: Optional[list[str]] = None,
+    streaming: bool = False
 ):
     """
-    Loads the CodeXGlue Code-to-Text dataset for Java from Hugging Face.
+    Loads the CodeXGlue Code-to-Text dataset for Java from Hugging Face, or from the local
+    Parquet files of the `CODE_TO_TEXT_DATA_DIR` directory if it is set.
 
     Args:
         split (str): Dataset split to load ('train', 'validation', 'test').
         limit (Optional[int]): If set, only loads the first `limit` examples.
         as_dataframe (bool): If True, returns a pandas DataFrame. Otherwise, returns Hugging Face dataset.
+        columns (Optional[list[str]]): If set, only keeps these columns (e.g. ['repo']).
+        streaming (bool): If True, returns an iterable dataset that reads examples as it is
+            iterated instead of materializing the split; `as_dataframe` is ignored.
 
     Returns:
-        pd.DataFrame or datasets.Dataset: Loaded dataset.
+        pd.DataFrame, datasets.Dataset or datasets.IterableDataset: Loaded dataset.
     """
-    dataset = load_dataset("google/code_x_glue_ct_code_to_text", "java", cache_dir="../../data/raw/")
-    
+    args, kwargs = _dataset_args()
+    if streaming:
+        data_split = load_dataset(*args, split=split, streaming=True, **kwargs)
+        if columns:
+            data_split = data_split.select_columns(columns)
+        return data_split.take(limit) if limit else data_split
+
+    dataset = load_dataset(*args, **kwargs)
+
     if split not in dataset:
         raise ValueError(f"Split '{split}' not found. Available splits: {list(dataset.keys())}")
 
     data_split = dataset[split]
 
+    if columns:
+        data_split = data_split.select_columns(columns)
+
     if limit:
         data_split = data_split.select(range(limit))
 
     if as_dataframe:
-        return pd.DataFrame(data_split)
+        return data_split.to_pandas() if columns else pd.DataFrame(data_split)
     else:
-        return data_split
\ No newline at end of file
+        return data_split
+
+def iter_code_to_text_batches(
+    split: str = "train",
+    columns: Optional[list[str]] = None,
+    batch_size: int = BATCH_SIZE,
+    limit: Optional[int] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams the dataset as DataFrames of at most `batch_size` rows, so memory stays
+    bounded by one batch of the projected columns whatever the size of the split.
+    """
+    data_split = load_code_to_text_dataset(split, limit, columns=columns, streaming=True)
+    for batch in data_split.iter(batch_size=batch_size):
+        yield pd.DataFrame(batch)
+
+def write_code_to_text_csv(
+    path: str,
+    split: str = "train",
+    columns: Optional[list[str]] = None,
+    batch_size: int = BATCH_SIZE,
+    limit: Optional[int] = None
+) -> int:
+    """
+    Writes the dataset (or the given columns of it) to a CSV file batch by batch.
+
+    Returns:
+        int: The number of rows written.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    rows = 0
+    for i, batch in enumerate(iter_code_to_text_batches(split, columns, batch_size, limit)):
+        batch.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        rows += len(batch)
+    return rows
+
+def distinct_repos(split: str = "train", batch_size: int = BATCH_SIZE, limit: Optional[int] = None) -> list[str]:
+    """Returns the repositories of a split in order of first appearance, reading only the `repo` column."""
+    repos = {}
+    for batch in load_code_to_text_dataset(split, limit, columns=["repo"], streaming=True).iter(batch_size=batch_size):
+        repos.update(dict.fromkeys(batch["repo"]))
+    return list(repos)
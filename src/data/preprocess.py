@@ -0,0 +1,24 @@
+import os
+import csv
+from .load_data import distinct_repos
+
+def write_project_lists(data_dir: str, split: str = "train") -> int:
+    """
+    Writes the repositories of a split as `raw/repos.txt` (one GitHub URL per line) and
+    `processed/projects.csv` (`code_db`, `repo`), the inputs of the extractor.
+
+    Only the `repo` column is streamed, so this runs in constant memory.
+
+    Returns:
+        int: The number of repositories.
+    """
+    repos = distinct_repos(split)
+    os.makedirs(os.path.join(data_dir, "raw"), exist_ok=True)
+    os.makedirs(os.path.join(data_dir, "processed"), exist_ok=True)
+    with open(os.path.join(data_dir, "raw", "repos.txt"), "w", encoding="utf-8") as f:
+        f.writelines(f"https://github.com/{repo}\n" for repo in repos)
+    with open(os.path.join(data_dir, "processed", "projects.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["code_db", "repo"])
+        writer.writerows((repo.split("/")[-1] + ".db", repo) for repo in repos)
+    return len(repos)
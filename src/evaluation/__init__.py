@@ -0,0 +1,4 @@
+from .judge import JudgeItem, JudgeScore, LLMJudge, HeuristicJudge, make_judge, load_items, load_results, evaluate, mean_scores
+from .store import ResultsStore, get_results_store
+
+__all__ = ["JudgeItem", "JudgeScore", "LLMJudge", "HeuristicJudge", "make_judge", "load_items", "load_results", "evaluate", "mean_scores", "ResultsStore", "get_results_store"]
@@ -0,0 +1,233 @@
+import os
+import re
+import csv
+import json
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from typing import Callable, Iterable, Optional
+
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+
+from src.prompts.evaluation import system as JUDGE_SYSTEM_PROMPT
+from src.utils.metrics import metrics
+
+MAX_WORKERS = 8
+MAX_RETRIES = 6
+REQUESTS_PER_MINUTE = 30
+RESPONSE_COLUMN = re.compile(r"^response_(\d+)$")
+FAILED_ANSWER = re.compile(r"^\s*error\b|could not answer|cound not answer", re.I)
+HEDGED_ANSWER = re.compile(r"(don't|do not|doesn't|does not|cannot|can't) (have enough|determine|appear|contain|find)|not enough information", re.I)
+
+prompt = ChatPromptTemplate.from_messages([
+    ("system", JUDGE_SYSTEM_PROMPT),
+    ("human", "Question: {question}\n\nResponse: {response}\n\n---\nPlease provide a score (1-10) and an explanation for this response."),
+])
+
+
+class JudgeScore(BaseModel):
+    score: int = Field(..., ge=1, le=10, description="How well the response answers the question, from 1 (irrelevant) to 10 (complete, clear and correct)")
+    explanation: str = Field(..., description="Why the response got this score")
+
+
+@dataclass
+class JudgeItem:
+    """One generated answer to judge: the response of run `run_id` to a question of a project."""
+    run_id: str
+    project: str
+    question_id: str
+    question: str
+    response: str
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return self.run_id, self.project, self.question_id
+
+
+def load_items(paths: Iterable[str]) -> list[JudgeItem]:
+    """
+    Reads the answers to judge from CSV files.
+
+    Accepts generated run files (`run_id, question_id, question, project, final_response`)
+    and combined files with one `response_<n>` column per run (`combined_reponse.csv`),
+    whose runs are numbered by their column.
+    """
+    items = []
+    for path in paths:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                base = dict(project=row["project"], question_id=str(row["question_id"]), question=row["question"])
+                if "final_response" in row:
+                    items.append(JudgeItem(run_id=str(row["run_id"]), response=row["final_response"] or "", **base))
+                    continue
+                for column, value in row.items():
+                    if (match := RESPONSE_COLUMN.match(column or "")) and value:
+                        items.append(JudgeItem(run_id=match.group(1), response=value, **base))
+    return items
+
+
+def load_results(path: str) -> list[dict]:
+    """Reads the judged answers stored by `evaluate`, skipping a line cut off by an interrupted run."""
+    if not os.path.exists(path):
+        return []
+    results = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return results
+
+
+class LLMJudge:
+    """
+    Scores answers with a chat model using the evaluation prompt and structured output.
+
+    Failed calls (rate limits included) are retried with exponential backoff and jitter.
+    Pacing is up to the model: `make_judge` loads it behind the cross-process rate limiter.
+    """
+
+    def __init__(self, llm, name: str, max_retries: int = MAX_RETRIES):
+        self.name = name
+        self.chain = (prompt | llm.with_structured_output(JudgeScore)).with_retry(
+            wait_exponential_jitter=True, stop_after_attempt=max_retries,
+        )
+
+    def __call__(self, item: JudgeItem) -> JudgeScore:
+        return self.chain.invoke({"question": item.question, "response": item.response})
+
+
+class HeuristicJudge:
+    """
+    A deterministic stand-in judge for offline runs and for testing the pipeline.
+
+    Failed answers score 1 and hedged ones ("I cannot determine ...") 3; other answers
+    score from 5 up by how many of the question's terms they mention.
+    """
+    name = "heuristic"
+
+    def __call__(self, item: JudgeItem) -> JudgeScore:
+        response = item.response.strip()
+        if not response or FAILED_ANSWER.search(response):
+            return JudgeScore(score=1, explanation="The response reports an error or no answer.")
+        if HEDGED_ANSWER.search(response):
+            return JudgeScore(score=3, explanation="The response does not commit to an answer.")
+        terms = {t for t in re.findall(r"\w+", item.question.lower()) if len(t) > 3}
+        covered = len({t for t in terms if t in response.lower()}) / len(terms) if terms else 0
+        return JudgeScore(score=5 + round(4 * covered) + (len(response) > 200), explanation=f"The response covers {covered:.0%} of the question's terms.")
+
+
+def make_judge(spec: str, requests_per_minute: float = REQUESTS_PER_MINUTE, max_retries: int = MAX_RETRIES,
+               tokens_per_minute: Optional[float] = None):
+    """
+    Returns the judge named by `spec`: `heuristic`, or `<provider>:<model>` of any provider
+    supported by `load_llm` (e.g. `groq:llama-3.3-70b-versatile`).
+
+    The model's calls wait for `requests_per_minute` and `tokens_per_minute` in the quota
+    of `spec` shared with every other process (judges, batch runs, the server) using it.
+    """
+    if spec == "heuristic":
+        return HeuristicJudge()
+    from src.utils.llm_loader import load_llm
+    provider, _, model = spec.partition(":")
+    llm = load_llm({
+        "provider": provider, "model": model, "temperature": 0,
+        "requests_per_minute": requests_per_minute, "tokens_per_minute": tokens_per_minute,
+    })
+    return LLMJudge(llm, spec, max_retries)
+
+
+def evaluate(
+    items: list[JudgeItem],
+    judge: Callable[[JudgeItem], JudgeScore],
+    output_path: str,
+    max_workers: int = MAX_WORKERS,
+    store: bool = True,
+) -> list[dict]:
+    """
+    Judges answers concurrently, appending each result to `output_path` (JSON lines) as
+    soon as it is scored. With `store`, the answers and every score are also added to
+    the results store (`get_results_store()`).
+
+    Answers this judge already scored in `output_path` are skipped, so an interrupted
+    run resumes where it stopped. Calls that fail after their retries are recorded with
+    their error and retried by the next run.
+
+    Returns:
+        list[dict]: Every result of this judge in `output_path`, including earlier runs'.
+    """
+    judge_name = getattr(judge, "name", type(judge).__name__)
+    done = {
+        (r["run_id"], r["project"], r["question_id"])
+        for r in load_results(output_path) if r.get("judge") == judge_name and r.get("score") is not None
+    }
+    pending = [item for item in items if item.key not in done]
+    print(f"Judging {len(pending)} answers with {judge_name} ({len(items) - len(pending)} already scored)")
+    if pending:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    results_store = None
+    if store:
+        from .store import get_results_store
+        results_store = get_results_store()
+        results_store.add_answers({**asdict(item), "final_response": item.response} for item in items)
+    lock = threading.Lock()
+
+    def score(item: JudgeItem) -> dict:
+        start = time.perf_counter()
+        try:
+            result = judge(item)
+            record = {"score": result.score, "explanation": result.explanation, "error": None}
+            metrics.incr("judge.scored")
+        except Exception as e:
+            record = {"score": None, "explanation": None, "error": f"{type(e).__name__}: {e}"}
+            metrics.incr("judge.errors")
+        metrics.incr("judge.seconds", time.perf_counter() - start)
+        return {**asdict(item), "judge": judge_name, **record}
+
+    start = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(score, item) for item in pending]
+        for count, future in enumerate(as_completed(futures), start=1):
+            record = future.result()
+            with lock:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+            if results_store is not None:
+                results_store.add_scores([record])
+            if count % 50 == 0 or count == len(futures):
+                print(f"  {count}/{len(futures)} judged in {time.perf_counter() - start:.1f}s")
+    return [r for r in load_results(output_path) if r.get("judge") == judge_name]
+
+
+def mean_scores(results: list[dict]) -> dict[str, float]:
+    """Returns the mean score of each run over its scored answers."""
+    scores = defaultdict(list)
+    for r in results:
+        if r.get("score") is not None:
+            scores[r["run_id"]].append(r["score"])
+    return {run_id: sum(s) / len(s) for run_id, s in sorted(scores.items())}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score generated answers with an LLM judge.")
+    parser.add_argument("inputs", nargs="+", help="Generated run CSVs (generated_<n>.csv) or a combined response CSV")
+    parser.add_argument("--output", default="data/generated/judge_scores.jsonl", help="JSON-lines file results are appended to")
+    parser.add_argument("--judge", default="groq:llama-3.3-70b-versatile", help="heuristic or <provider>:<model>")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--rpm", type=float, default=REQUESTS_PER_MINUTE, help="Requests per minute allowed by the provider")
+    parser.add_argument("--tpm", type=float, help="Tokens per minute allowed by the provider")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES)
+    parser.add_argument("--no-store", action="store_true", help="Do not add the scores to the results store (data/generated/results.db)")
+    args = parser.parse_args()
+
+    start = time.time()
+    results = evaluate(load_items(args.inputs), make_judge(args.judge, args.rpm, args.retries, args.tpm), args.output, args.workers, not args.no_store)
+    print(f"Done in {time.time() - start:.1f}s; {sum(r['score'] is None for r in results)} failed")
+    for run_id, mean in mean_scores(results).items():
+        print(f"  run {run_id}: {mean:.2f}")
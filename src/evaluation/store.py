@@ -0,0 +1,357 @@
+import os
+import re
+import csv
+import json
+import time
+import sqlite3
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .judge import RESPONSE_COLUMN, load_results
+
+METRICS_FILE = re.compile(r"metrics_(.+)\.json$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    config TEXT NOT NULL DEFAULT '{}',
+    imported REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answers (
+    run_id TEXT NOT NULL,
+    project TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    question TEXT NOT NULL,
+    final_response TEXT,
+    elapsed REAL,
+    PRIMARY KEY (run_id, project, question_id)
+);
+CREATE INDEX IF NOT EXISTS idx_answers_project ON answers(project, question_id);
+CREATE INDEX IF NOT EXISTS idx_answers_question ON answers(question_id);
+CREATE TABLE IF NOT EXISTS node_metrics (
+    run_id TEXT NOT NULL,
+    project TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, project, question_id, name)
+);
+CREATE INDEX IF NOT EXISTS idx_node_metrics_name ON node_metrics(name, run_id);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS scores (
+    judge TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    project TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    score REAL NOT NULL,
+    explanation TEXT,
+    PRIMARY KEY (judge, run_id, project, question_id)
+);
+CREATE INDEX IF NOT EXISTS idx_scores_run ON scores(run_id, judge);
+CREATE INDEX IF NOT EXISTS idx_scores_project ON scores(project, question_id);
+"""
+
+
+def _parse(value: str):
+    """Parses a CSV cell of a runs file: booleans and numbers, keeping anything else as text."""
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def run_order(run_id: str) -> tuple:
+    """Sorts numbered runs numerically ("9" before "10") and any others after them by name."""
+    return (0, int(run_id), "") if run_id.isdigit() else (1, 0, run_id)
+
+
+class ResultsStore:
+    """
+    An append-only SQLite store of evaluation runs: the generated answers, node metrics
+    (per question and per run) and judge scores of every run, indexed by run, project
+    and question. The run loop (`notebooks/2_summarize.ipynb`) and `judge.evaluate`
+    append to it as they go; files of earlier runs are brought in with the importers.
+
+    Rows are only ever inserted (importing the same file twice is a no-op), so a new run
+    adds to the store instead of producing another CSV to concatenate. Aggregates are
+    computed in SQL or on NumPy arrays of the scores rather than by pivoting DataFrames.
+
+    Attributes:
+        db_path (str): Path to the SQLite file.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _insert(self, sql: str, rows: Iterable[tuple]) -> int:
+        with self._lock, self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(sql, rows)
+            return conn.total_changes - before
+
+    # Writing
+
+    def add_run(self, run_id, config: Optional[dict] = None):
+        """Registers a run, merging `config` into the settings already stored for it."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT config FROM runs WHERE run_id = ?", (str(run_id),)).fetchone()
+            merged = {**(json.loads(row[0]) if row else {}), **(config or {})}
+            conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?)", (str(run_id), json.dumps(merged), time.time()))
+
+    def add_answers(self, rows: Iterable[dict]) -> int:
+        """Adds generated answers (`run_id, project, question_id, question, final_response[, elapsed]`)."""
+        return self._insert(
+            "INSERT OR IGNORE INTO answers VALUES (?, ?, ?, ?, ?, ?)",
+            ((str(r["run_id"]), r["project"], str(r["question_id"]), r["question"], r.get("final_response"), r.get("elapsed")) for r in rows),
+        )
+
+    def add_metrics(self, run_id, project: str, question_id, values: dict) -> int:
+        """Adds the node metrics (e.g. a `metrics.summary()`) collected while answering one question."""
+        return self._insert(
+            "INSERT OR IGNORE INTO node_metrics VALUES (?, ?, ?, ?, ?)",
+            ((str(run_id), project, str(question_id), name, float(value)) for name, value in values.items()),
+        )
+
+    def add_run_metrics(self, run_id, values: dict) -> int:
+        """Adds the node metrics (a `metrics.summary()`) collected over a whole run."""
+        return self._insert(
+            "INSERT OR IGNORE INTO run_metrics VALUES (?, ?, ?)",
+            ((str(run_id), name, float(value)) for name, value in values.items()),
+        )
+
+    def add_scores(self, rows: Iterable[dict]) -> int:
+        """Adds judge scores (`judge, run_id, project, question_id, score[, explanation]`); unscored rows are skipped."""
+        return self._insert(
+            "INSERT OR IGNORE INTO scores VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (r["judge"], str(r["run_id"]), r["project"], str(r["question_id"]), float(r["score"]), r.get("explanation"))
+                for r in rows if r.get("score") not in (None, "")
+            ),
+        )
+
+    # Importing
+
+    def import_runs_csv(self, path: str) -> int:
+        """Imports run descriptions (`runs.csv`): every column besides `run_id` becomes run config."""
+        count = 0
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                run_id = row.pop("run_id")
+                self.add_run(run_id, {k: _parse(v) for k, v in row.items() if k and v not in (None, "")})
+                count += 1
+        return count
+
+    def import_answers_csv(self, path: str) -> int:
+        """Imports a generated run file (`run_id, question_id, question, project, final_response`)."""
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO runs (run_id, imported) VALUES (?, ?)",
+                {(str(r["run_id"]), time.time()) for r in rows},
+            )
+        return self.add_answers(rows)
+
+    def import_metrics_json(self, path: str, run_id=None) -> int:
+        """Imports the metrics a run loop saved for a whole run (`metrics_<run_id>.json`)."""
+        if run_id is None:
+            match = METRICS_FILE.search(os.path.basename(path))
+            if not match:
+                raise ValueError(f"Cannot tell the run of {path}: name it metrics_<run_id>.json or pass run_id.")
+            run_id = match.group(1)
+        with open(path, "r", encoding="utf-8") as f:
+            values = json.load(f)
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO runs (run_id, imported) VALUES (?, ?)", (str(run_id), time.time()))
+        return self.add_run_metrics(run_id, values)
+
+    def import_judge_results(self, path: str) -> int:
+        """Imports the JSON-lines results written by `src.evaluation.judge.evaluate`."""
+        return self.add_scores(load_results(path))
+
+    def import_wide_scores_csv(self, path: str, judge: str, run_ids: list) -> int:
+        """
+        Imports a notebook-style score file with `score_<n>`/`explanation_<n>` columns per
+        response, where response `n` is the answer of `run_ids[n - 1]`.
+        """
+        rows = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                for column in row:
+                    if (match := RESPONSE_COLUMN.match(column or "")) and int(match.group(1)) <= len(run_ids):
+                        n = match.group(1)
+                        rows.append({
+                            "judge": judge, "run_id": run_ids[int(n) - 1], "project": row["project"],
+                            "question_id": row["question_id"], "score": row.get(f"score_{n}"),
+                            "explanation": row.get(f"explanation_{n}"),
+                        })
+        return self.add_scores(rows)
+
+    # Querying
+
+    def query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._connect() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def judges(self) -> list[str]:
+        return [row[0] for row in self.query("SELECT DISTINCT judge FROM scores ORDER BY judge")]
+
+    def score_matrix(self, judge: str, run_ids: Optional[list] = None, complete: bool = False) -> tuple[list, list, np.ndarray]:
+        """
+        Pivots one judge's scores into a question × run matrix.
+
+        Returns:
+            tuple: The `(project, question_id)` row keys, the run ids of the columns and the
+            matrix, NaN where a run has no score for a question. With `complete`, only
+            questions scored in every run are kept (as paired tests need).
+        """
+        rows = self.query("SELECT project, question_id, run_id, score FROM scores WHERE judge = ?", (judge,))
+        if run_ids is not None:
+            wanted = {str(r) for r in run_ids}
+            rows = [r for r in rows if r[2] in wanted]
+        if not rows:
+            return [], [], np.zeros((0, 0))
+        projects, question_ids, runs, values = zip(*rows)
+        keys, row_index = np.unique(np.array([f"{p}\0{q}" for p, q in zip(projects, question_ids)]), return_inverse=True)
+        columns, column_index = np.unique(np.array(runs), return_inverse=True)
+        matrix = np.full((len(keys), len(columns)), np.nan)
+        matrix[row_index, column_index] = values
+        wanted = [str(r) for r in run_ids] if run_ids is not None else sorted(columns.tolist(), key=run_order)
+        order = [int(np.where(columns == r)[0][0]) for r in wanted if r in columns]
+        columns, matrix = columns[order], matrix[:, order]
+        keys = [tuple(k.split("\0")) for k in keys]
+        if complete:
+            mask = ~np.isnan(matrix).any(axis=1)
+            keys, matrix = [k for k, m in zip(keys, mask) if m], matrix[mask]
+        return keys, [str(c) for c in columns], matrix
+
+    def mean_scores(self, judge: str, by: str = "run_id") -> list[tuple]:
+        """
+        Returns `(group, mean, count)` of one judge's scores grouped by `run_id`, `project`,
+        `question_id`, or any key of the run config (e.g. `docs` or `agents`).
+        """
+        if by == "run_id":
+            rows = self.query("SELECT run_id, AVG(score), COUNT(*) FROM scores WHERE judge = ? GROUP BY run_id", (judge,))
+            return sorted(rows, key=lambda row: run_order(row[0]))
+        if by in ("project", "question_id"):
+            return self.query(
+                f"SELECT {by}, AVG(score), COUNT(*) FROM scores WHERE judge = ? GROUP BY {by} ORDER BY {by}",
+                (judge,),
+            )
+        return self.query(
+            "SELECT json_extract(runs.config, ?) AS value, AVG(score), COUNT(*) "
+            "FROM scores JOIN runs USING (run_id) WHERE judge = ? GROUP BY value ORDER BY value",
+            (f'$."{by}"', judge),
+        )
+
+    def bootstrap_ci(self, judge: str, samples: int = 10000, confidence: float = 0.95, seed: int = 0) -> dict[str, tuple]:
+        """
+        Estimates the mean score of each run with a percentile bootstrap confidence interval.
+
+        All resamples of a run are drawn as one `samples × n` index array, so this takes
+        milliseconds even for thousands of questions.
+
+        Returns:
+            dict: `run_id -> (mean, low, high)`.
+        """
+        rng = np.random.default_rng(seed)
+        scores: dict[str, list] = {}
+        for run_id, score in self.query("SELECT run_id, score FROM scores WHERE judge = ?", (judge,)):
+            scores.setdefault(run_id, []).append(score)
+        tail = (1 - confidence) / 2 * 100
+        intervals = {}
+        for run_id, values in sorted(scores.items(), key=lambda item: run_order(item[0])):
+            values = np.asarray(values)
+            means = values[rng.integers(0, len(values), size=(samples, len(values)))].mean(axis=1)
+            low, high = np.percentile(means, [tail, 100 - tail])
+            intervals[run_id] = (float(values.mean()), float(low), float(high))
+        return intervals
+
+
+_store: Optional[ResultsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_results_store(path: Optional[str] = None) -> ResultsStore:
+    """Returns the process-wide results store, at `path` or `data/generated/results.db`."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultsStore(path or os.path.join(os.path.dirname(__file__), "../..", "data", "generated", "results.db"))
+    return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import and summarize evaluation runs.")
+    parser.add_argument("--db", default="data/generated/results.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+    runs = commands.add_parser("import-runs", help="Import run descriptions (runs.csv)")
+    runs.add_argument("paths", nargs="+")
+    answers = commands.add_parser("import-answers", help="Import generated answers (generated_<n>.csv)")
+    answers.add_argument("paths", nargs="+")
+    run_metrics = commands.add_parser("import-metrics", help="Import the metrics of whole runs (metrics_<n>.json)")
+    run_metrics.add_argument("paths", nargs="+")
+    scores = commands.add_parser("import-scores", help="Import judge results (.jsonl) or a wide score CSV")
+    scores.add_argument("paths", nargs="+")
+    scores.add_argument("--judge", help="Judge of a wide score CSV")
+    scores.add_argument("--run-ids", nargs="+", help="Runs of the response_<n> columns of a wide score CSV, in order")
+    summary = commands.add_parser("summary", help="Mean score and bootstrap CI per run")
+    summary.add_argument("--judge")
+    summary.add_argument("--by", default="run_id", help="run_id, project, question_id or a run config key")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    start = time.time()
+    if args.command == "import-runs":
+        for path in args.paths:
+            print(f"{path}: {store.import_runs_csv(path)} runs")
+    elif args.command == "import-answers":
+        for path in args.paths:
+            print(f"{path}: {store.import_answers_csv(path)} new answers")
+    elif args.command == "import-metrics":
+        for path in args.paths:
+            print(f"{path}: {store.import_metrics_json(path)} new metrics")
+    elif args.command == "import-scores":
+        for path in args.paths:
+            if path.endswith(".jsonl"):
+                count = store.import_judge_results(path)
+            else:
+                if not args.judge or not args.run_ids:
+                    parser.error("a wide score CSV needs --judge and --run-ids")
+                count = store.import_wide_scores_csv(path, args.judge, args.run_ids)
+            print(f"{path}: {count} new scores")
+    else:
+        for judge in [args.judge] if args.judge else store.judges():
+            print(f"Judge {judge}")
+            if args.by == "run_id":
+                intervals = store.bootstrap_ci(judge)
+                for run_id, mean, count in store.mean_scores(judge):
+                    _, low, high = intervals[run_id]
+                    print(f"  run {run_id}: {mean:.2f} [{low:.2f}, {high:.2f}] over {count} answers")
+            else:
+                for group, mean, count in store.mean_scores(judge, args.by):
+                    print(f"  {args.by}={group}: {mean:.2f} over {count} answers")
+    print(f"({time.time() - start:.2f}s)")
@@ -0,0 +1,7 @@
+from .git_history import GitHistoryIndex, get_history_index
+from .file_history import refresh_file_history
+from .github_mirror import GitHubMirror, get_github_mirror
+from .docs_index import DocsIndex, get_docs_index, is_local_source
+from .bundle import ProjectBundle, build_bundle, open_bundle, is_bundled
+
+__all__ = ["GitHistoryIndex", "get_history_index", "refresh_file_history", "GitHubMirror", "get_github_mirror", "DocsIndex", "get_docs_index", "is_local_source", "ProjectBundle", "build_bundle", "open_bundle", "is_bundled"]
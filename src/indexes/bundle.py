@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+import faiss
+
+from src.utils.helpers import connect_readonly
+from .git_history import GitHistoryIndex
+from .file_history import refresh_file_history
+from .docs_index import CHUNK_WORDS, DocsIndex, is_local_source
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+CODE_DB = "code.db"
+SCHEMA_FILE = "schema.sql"
+HISTORY_DB = "history.db"
+DOCS_DIR = "docs"
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def schema_digest(db_path: str) -> str:
+    """Returns the `CREATE` statements of a SQLite DB, one per line, in a stable order."""
+    with closing(connect_readonly(db_path)) as conn:
+        rows = conn.execute("SELECT sql FROM sqlite_master WHERE sql IS NOT NULL ORDER BY type, name").fetchall()
+    return "".join(f"{' '.join(sql.split())};\n" for (sql,) in rows)
+
+
+def is_bundled(db_path: str) -> bool:
+    """Returns True if a code DB is the read-only copy held by a project bundle."""
+    return os.path.basename(db_path) == CODE_DB and os.path.exists(os.path.join(os.path.dirname(os.path.abspath(db_path)), MANIFEST))
+
+
+class ProjectBundle:
+    """
+    A prebuilt, read-only directory holding everything the agents derive from a project:
+
+    - `code.db`: a compacted copy of the code DB (with its `file_history` table filled in
+      when the bundle has a repository), opened read-only through a memory map;
+    - `schema.sql`: the schema digest of the code DB;
+    - `history.db`: the commit-history index of the repository at the bundled HEAD;
+    - `docs/`: the hybrid index of local documentation, its vectors memory-mapped;
+    - `manifest.json`: the format and library versions, the original sources and the
+      size and SHA-256 of every file.
+
+    Opening a bundle reads the manifest only: the files are mapped by the OS as queries
+    touch them and shared by every process serving the project, so there is no
+    per-project warm-up and no writes at question time.
+
+    Attributes:
+        path (str): The bundle directory.
+        manifest (dict): The parsed manifest.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.realpath(path)
+        with open(os.path.join(self.path, MANIFEST), "r") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Bundle {self.path} has format {self.manifest.get('format')}, expected {FORMAT_VERSION}. Rebuild it.")
+        for name, info in self.manifest["files"].items():
+            file = os.path.join(self.path, name)
+            if not os.path.exists(file) or os.path.getsize(file) != info["size"]:
+                raise ValueError(f"Bundle {self.path} is incomplete or modified: {name}. Run `verify` or rebuild it.")
+
+    @property
+    def name(self) -> str:
+        return self.manifest["name"]
+
+    @property
+    def sources(self) -> dict:
+        return self.manifest["sources"]
+
+    def file(self, name: str) -> Optional[str]:
+        """Returns the path of a bundled file or directory, or None if the bundle lacks it."""
+        return os.path.join(self.path, name) if any(f == name or f.startswith(name + "/") for f in self.manifest["files"]) else None
+
+    @property
+    def schema(self) -> Optional[str]:
+        path = self.file(SCHEMA_FILE)
+        if path is None:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def settings(self) -> dict:
+        """
+        Returns the project fields of a graph input (`source_db`, `repository_path`,
+        `history_db`, `github_url`, `docs_source`) pointing at the bundled artifacts.
+
+        `history_db` is the bundled history index, which the git agent then queries
+        instead of the repository's own.
+        """
+        settings = {}
+        if self.file(CODE_DB):
+            settings["source_db"] = self.file(CODE_DB)
+        if self.sources.get("repository_path"):
+            settings["repository_path"] = self.sources["repository_path"]
+            if self.file(HISTORY_DB):
+                settings["history_db"] = self.file(HISTORY_DB)
+        if self.sources.get("github_url"):
+            settings["github_url"] = self.sources["github_url"]
+        if self.file(DOCS_DIR):
+            settings["docs_source"] = self.file(DOCS_DIR)
+        elif self.sources.get("docs_source"):
+            settings["docs_source"] = self.sources["docs_source"]  # Remote documentation, not bundled
+        if self.sources.get("docs_source_type"):
+            settings["docs_source_type"] = self.sources["docs_source_type"]
+        return settings
+
+    def verify(self) -> list[str]:
+        """
+        Checks every bundled file against the hashes of the manifest, and the code DB
+        against its schema digest.
+
+        Returns:
+            list[str]: The problems found; empty if the bundle is intact.
+        """
+        problems = []
+        for name, info in self.manifest["files"].items():
+            file = os.path.join(self.path, name)
+            if not os.path.exists(file):
+                problems.append(f"{name}: missing")
+            elif file_sha256(file) != info["sha256"]:
+                problems.append(f"{name}: SHA-256 differs from the manifest")
+        if self.file(CODE_DB) and self.schema is not None and schema_digest(self.file(CODE_DB)) != self.schema:
+            problems.append(f"{CODE_DB}: schema differs from {SCHEMA_FILE}")
+        return problems
+
+
+def build_bundle(
+    path: str,
+    name: str,
+    source_db: Optional[str] = None,
+    repository_path: Optional[str] = None,
+    github_url: Optional[str] = None,
+    docs_source: Optional[str] = None,
+    docs_source_type: Optional[str] = None,
+    embedding: Optional[str] = None,
+    chunk_words: int = CHUNK_WORDS,
+    file_history: bool = True,
+) -> ProjectBundle:
+    """
+    Builds the bundle of a project into `path`, replacing any bundle already there.
+
+    The bundle is assembled in a sibling directory and moved into place once complete,
+    so processes never open a half-built bundle.
+
+    Args:
+        path (str): The bundle directory to create.
+        name (str): The project name recorded in the manifest.
+        source_db (Optional[str]): The code DB to copy.
+        repository_path (Optional[str]): The Git repository whose history is indexed.
+        github_url (Optional[str]): The GitHub repository, recorded for the GitHub agent.
+        docs_source (Optional[str]): A directory or file of documentation to index. URLs are only recorded.
+        docs_source_type (Optional[str]): Recorded as is for the docs agent.
+        embedding (Optional[str]): The docs embedder; must match `tools.docs.embedding` where the bundle is served.
+        chunk_words (int): The docs chunk size.
+        file_history (bool): Fill in the `file_history` table of the bundled code DB from the repository.
+
+    Returns:
+        ProjectBundle: The opened bundle.
+    """
+    path = os.path.realpath(path)
+    building = f"{path}.building"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+    versions = {"sqlite": sqlite3.sqlite_version, "faiss": faiss.__version__}
+
+    history = None
+    if repository_path:
+        history = GitHistoryIndex(repository_path, os.path.join(building, HISTORY_DB))
+        history.update()
+        versions["git_head"] = history.head()
+
+    if source_db:
+        code_db = os.path.join(building, CODE_DB)
+        with closing(sqlite3.connect(Path(os.path.abspath(source_db)).as_uri() + "?mode=ro", uri=True)) as conn:
+            conn.execute("VACUUM INTO ?", (code_db,))
+        if history is not None and file_history:
+            refresh_file_history(code_db, repository_path, history)
+        with closing(sqlite3.connect(code_db)) as conn:
+            conn.execute("VACUUM")
+        with open(os.path.join(building, SCHEMA_FILE), "w", encoding="utf-8") as f:
+            f.write(schema_digest(code_db))
+
+    if docs_source and is_local_source(docs_source):
+        docs = DocsIndex(os.path.join(building, DOCS_DIR), embedding)
+        docs.build(os.path.expanduser(docs_source), chunk_words)
+        versions["embedding"] = docs.embedder.name
+
+    files = {}
+    for root, _, names in os.walk(building):
+        for file_name in sorted(names):
+            file = os.path.join(root, file_name)
+            files[os.path.relpath(file, building).replace(os.sep, "/")] = {"size": os.path.getsize(file), "sha256": file_sha256(file)}
+            os.chmod(file, 0o444)
+    manifest = {
+        "format": FORMAT_VERSION,
+        "name": name,
+        "built_at": time.time(),
+        "versions": versions,
+        "sources": {
+            "source_db": os.path.realpath(source_db) if source_db else None,
+            "repository_path": os.path.realpath(repository_path) if repository_path else None,
+            "github_url": github_url,
+            "docs_source": docs_source,
+            "docs_source_type": docs_source_type,
+        },
+        "files": files,
+    }
+    with open(os.path.join(building, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(path):
+        previous = f"{path}.previous"
+        shutil.rmtree(previous, ignore_errors=True)
+        os.rename(path, previous)
+        os.rename(building, path)
+        shutil.rmtree(previous, ignore_errors=True)
+    else:
+        os.rename(building, path)
+    with _bundles_lock:
+        _bundles.pop(path, None)
+    return open_bundle(path)
+
+
+_bundles: dict[str, ProjectBundle] = {}
+_bundles_lock = threading.Lock()
+
+
+def open_bundle(path: str) -> ProjectBundle:
+    """Returns the process-wide handle of a bundle, reading its manifest on first use."""
+    key = os.path.realpath(path)
+    with _bundles_lock:
+        if key not in _bundles:
+            _bundles[key] = ProjectBundle(key)
+        return _bundles[key]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.utils import get_tool_config
+
+    parser = argparse.ArgumentParser(description="Build, verify or describe the prebuilt bundle of a project.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Build a bundle from a project's sources")
+    build.add_argument("path", help="Bundle directory to create")
+    build.add_argument("--name", help="Project name (default: the directory name)")
+    build.add_argument("--source-db")
+    build.add_argument("--repository-path")
+    build.add_argument("--github-url")
+    build.add_argument("--docs-source")
+    build.add_argument("--docs-source-type")
+    build.add_argument("--embedding", help="Docs embedder (default: tools.docs.embedding)")
+    build.add_argument("--no-file-history", action="store_true", help="Do not fill in the file_history table")
+    verify = subparsers.add_parser("verify", help="Check a bundle's files against its manifest")
+    verify.add_argument("path")
+    info = subparsers.add_parser("info", help="Print a bundle's manifest")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        docs_settings = get_tool_config("docs")
+        start = time.time()
+        bundle = build_bundle(
+            args.path,
+            args.name or os.path.basename(os.path.realpath(args.path)),
+            args.source_db,
+            args.repository_path,
+            args.github_url,
+            args.docs_source,
+            args.docs_source_type,
+            args.embedding or docs_settings.get("embedding"),
+            docs_settings.get("chunk_words", CHUNK_WORDS),
+            not args.no_file_history,
+        )
+        size = sum(f["size"] for f in bundle.manifest["files"].values())
+        print(f"Built {bundle.name} into {bundle.path} ({len(bundle.manifest['files'])} files, {size / 1e6:.1f} MB) in {time.time() - start:.1f}s")
+    elif args.command == "verify":
+        problems = open_bundle(args.path).verify()
+        print("\n".join(problems) or "OK")
+        raise SystemExit(1 if problems else 0)
+    else:
+        print(json.dumps(open_bundle(args.path).manifest, indent=2))
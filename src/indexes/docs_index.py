@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from html.parser import HTMLParser
+from typing import Optional
+
+import numpy as np
+import faiss
+
+from src.utils.retrieval import BM25, tokenize, get_embedder, reciprocal_rank_fusion
+
+HTML_EXTENSIONS = {".html", ".htm", ".xhtml"}
+TEXT_EXTENSIONS = {".txt", ".md", ".markdown", ".rst", ".adoc", ".asciidoc", ".text"}
+CHUNK_WORDS = 250
+CHUNK_OVERLAP = 40
+TOP_K = 5
+CANDIDATES = 50  # Hits taken from each retriever before fusing
+STALE_CHECK_SECONDS = 30  # How long a local index is trusted before its documents are checked again
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the visible text of an HTML page, one block element per line."""
+
+    SKIP = {"script", "style", "nav", "header", "footer", "noscript", "svg"}
+    BLOCKS = {"p", "div", "li", "pre", "br", "tr", "section", "article", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts, self.title, self._skip, self._in_title = [], "", 0, False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(self._skip - 1, 0)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data.strip()
+        elif not self._skip:
+            self.parts.append(data)
+
+
+def read_document(path: str) -> tuple[str, str]:
+    """
+    Extracts the title and plain text of an HTML, PDF or text file.
+
+    PDFs need the optional `pypdf` package; without it they are skipped with a warning.
+
+    Returns:
+        tuple: The title (the file name if the document has none) and the text.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    title = os.path.basename(path)
+    if extension in HTML_EXTENSIONS:
+        parser = _TextExtractor()
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            parser.feed(f.read())
+        return parser.title or title, "".join(parser.parts)
+    if extension == ".pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            print(f"Skipping {path}: install pypdf to index PDF documents.")
+            return title, ""
+        reader = PdfReader(path)
+        return title, "\n".join(page.extract_text() or "" for page in reader.pages)
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return title, f.read()
+
+
+def chunk_text(text: str, chunk_words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    """
+    Splits text into chunks of about `chunk_words` words along paragraph boundaries.
+    Paragraphs longer than a chunk are cut into windows overlapping by `overlap` words.
+    """
+    paragraphs = [" ".join(p.split()) for p in text.replace("\r", "").split("\n\n")]
+    chunks, current = [], []
+    for paragraph in filter(None, paragraphs):
+        words = paragraph.split()
+        if len(words) > chunk_words:
+            if current:
+                chunks.append(" ".join(current))
+                current = []
+            step = chunk_words - overlap
+            chunks.extend(" ".join(words[i:i + chunk_words]) for i in range(0, max(len(words) - overlap, 1), step))
+            continue
+        if len(current) + len(words) > chunk_words:
+            chunks.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def list_documents(source: str) -> list[str]:
+    """Lists the indexable files of a documentation directory (or a single file), sorted."""
+    extensions = HTML_EXTENSIONS | TEXT_EXTENSIONS | {".pdf"}
+    if os.path.isfile(source):
+        return [source]
+    files = []
+    for root, dirs, names in os.walk(source):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        files.extend(os.path.join(root, n) for n in sorted(names) if os.path.splitext(n)[1].lower() in extensions)
+    return files
+
+
+def source_fingerprint(files: list[str]) -> str:
+    """Hashes the paths, sizes and modification times of the source files."""
+    digest = hashlib.sha1()
+    for path in files:
+        stat = os.stat(path)
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+class DocsIndex:
+    """
+    A persisted hybrid (BM25 + dense vector) index over the chunks of a documentation corpus.
+
+    The index directory holds `chunks.jsonl` (chunk text and origin), `vectors.faiss`
+    (an inner-product FAISS index of normalized chunk embeddings) and `manifest.json`
+    (the source, its fingerprint and the embedder). BM25 statistics are rebuilt from the
+    chunks when the index is loaded, which takes milliseconds for a documentation set.
+
+    Attributes:
+        index_dir (str): Directory holding the persisted index.
+        chunks (list[dict]): The chunks with their `text`, `title` and `path`.
+    """
+
+    def __init__(self, index_dir: str, embedding: Optional[str] = None):
+        self.index_dir = index_dir
+        self.embedder = get_embedder(embedding)
+        self.chunks: list[dict] = []
+        self.manifest: dict = {}
+        self.bm25: Optional[BM25] = None
+        self.vectors = None
+        self.checked_at = 0.0
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.index_dir, "manifest.json")
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def build(self, source: str, chunk_words: int = CHUNK_WORDS) -> int:
+        """
+        Ingests every document under `source`, chunks it and persists the index.
+
+        Returns:
+            int: The number of chunks indexed.
+        """
+        files = list_documents(source)
+        chunks = []
+        for path in files:
+            title, text = read_document(path)
+            for chunk in chunk_text(text, chunk_words):
+                chunks.append({"text": chunk, "title": title, "path": os.path.relpath(path, source) if os.path.isdir(source) else os.path.basename(path)})
+
+        embeddings = self.embedder.embed_documents([c["text"] for c in chunks]) if chunks else self.embedder.embed_query("").reshape(1, -1)
+        vectors = faiss.IndexFlatIP(embeddings.shape[1])
+        if chunks:
+            vectors.add(embeddings)
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(os.path.join(self.index_dir, "chunks.jsonl"), "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk) + "\n")
+        faiss.write_index(vectors, os.path.join(self.index_dir, "vectors.faiss"))
+        manifest = {
+            "source": os.path.realpath(source),
+            "fingerprint": source_fingerprint(files),
+            "embedding": self.embedder.name,
+            "chunk_words": chunk_words,
+            "chunks": len(chunks),
+            "built_at": time.time(),
+        }
+        with open(self.manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        self._set(chunks, vectors, manifest)
+        self.checked_at = time.monotonic()
+        return len(chunks)
+
+    def load(self, mmap: bool = False) -> "DocsIndex":
+        """
+        Loads the persisted index.
+
+        Args:
+            mmap (bool): Map the vectors read-only from the file where FAISS supports it,
+                for indexes that are never rebuilt in place (e.g. a project bundle's).
+        """
+        with open(self.manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest["embedding"] != self.embedder.name:
+            raise ValueError(f"Index {self.index_dir} was built with {manifest['embedding']}, not {self.embedder.name}.")
+        with open(os.path.join(self.index_dir, "chunks.jsonl"), "r", encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+        self._set(chunks, faiss.read_index(os.path.join(self.index_dir, "vectors.faiss"), flags), manifest)
+        return self
+
+    def _set(self, chunks: list[dict], vectors, manifest: dict):
+        self.chunks, self.vectors, self.manifest = chunks, vectors, manifest
+        self.bm25 = BM25([tokenize(c["title"] + " " + c["text"]) for c in chunks])
+
+    def is_stale(self, source: str) -> bool:
+        """Returns True if the source documents changed since the index was built."""
+        return self.manifest.get("fingerprint") != source_fingerprint(list_documents(source))
+
+    def search(self, query: str, k: int = TOP_K) -> list[dict]:
+        """
+        Retrieves the `k` chunks best matching a query, fusing the BM25 and vector
+        rankings with reciprocal rank fusion.
+
+        Returns:
+            list[dict]: The chunks, best first.
+        """
+        if not self.chunks:
+            return []
+        lexical = self.bm25.top_k(tokenize(query), CANDIDATES)
+        _, ids = self.vectors.search(self.embedder.embed_query(query).reshape(1, -1).astype(np.float32), min(CANDIDATES, len(self.chunks)))
+        dense = [int(i) for i in ids[0] if i >= 0]
+        return [self.chunks[i] for i in reciprocal_rank_fusion([lexical, dense])[:k]]
+
+
+_indexes: dict[str, DocsIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def is_local_source(source: Optional[str]) -> bool:
+    """Returns True if a `docs_source` names local documents or a built index rather than a URL."""
+    return bool(source) and "://" not in source and os.path.exists(os.path.expanduser(source))
+
+
+def get_docs_index(source: str, settings: dict) -> DocsIndex:
+    """
+    Returns the process-wide index of a local `docs_source`, building it on first use and
+    rebuilding it when the documents change.
+
+    `source` may be a built index directory (holding `manifest.json`), searched with the
+    embedder it was built with unless `tools.docs.embedding` names one, or a directory or
+    file of documents, whose index is kept under `tools.docs.index_dir`. Listing and
+    stat-ing the documents costs a walk of the directory, so they are checked for changes
+    at most every `tools.docs.stale_check_seconds`, not on every query.
+    """
+    source = os.path.realpath(os.path.expanduser(source))
+    embedding = settings.get("embedding")
+    with _indexes_lock:
+        index = _indexes.get(source)
+        if index is None:
+            manifest_path = os.path.join(source, "manifest.json")
+            if os.path.exists(manifest_path):
+                if not embedding:
+                    with open(manifest_path, "r") as f:
+                        embedding = json.load(f)["embedding"]
+                index = DocsIndex(source, embedding).load(mmap=True)
+            else:
+                root = os.path.expanduser(settings.get("index_dir") or os.path.join("~", ".cache", "lapsum", "docs"))
+                index = DocsIndex(os.path.join(root, hashlib.sha1(source.encode()).hexdigest()[:16]), embedding)
+                if index.exists():
+                    try:
+                        index.load()
+                    except ValueError:
+                        pass  # Built with another embedder; rebuilt below
+            _indexes[source] = index
+        if index.index_dir != source:
+            if not index.manifest:
+                index.build(source, settings.get("chunk_words", CHUNK_WORDS))
+            elif time.monotonic() - index.checked_at >= settings.get("stale_check_seconds", STALE_CHECK_SECONDS):
+                if index.is_stale(source):
+                    index.build(source, settings.get("chunk_words", CHUNK_WORDS))
+                index.checked_at = time.monotonic()
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a hybrid retrieval index over a documentation directory.")
+    parser.add_argument("source", help="Directory (or file) of HTML, PDF and text documents")
+    parser.add_argument("index_dir", help="Directory to write the index to")
+    parser.add_argument("--embedding", help="hashing, hashing:<dim> or openai:<model> (default: openai with OPENAI_API_KEY, else hashing)")
+    parser.add_argument("--chunk-words", type=int, default=CHUNK_WORDS)
+    args = parser.parse_args()
+
+    start = time.time()
+    count = DocsIndex(args.index_dir, args.embedding).build(args.source, args.chunk_words)
+    print(f"Indexed {count} chunks from {args.source} into {args.index_dir} in {time.time() - start:.1f}s")
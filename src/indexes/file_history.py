@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from collections import defaultdict
+from typing import Optional
+
+from .git_history import GitHistoryIndex, get_history_index
+
+# Column names that hold source file paths in the code DB (e.g. `UMLClass.files`).
+FILE_COLUMNS = {"files", "file", "filepath", "file_path", "filename", "path", "source_file"}
+RECENT_DAYS = 90
+TOP_AUTHORS = 3
+CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_history (
+    file TEXT PRIMARY KEY,
+    repo_file TEXT,
+    commit_count INTEGER,
+    recent_churn INTEGER,
+    last_modified TEXT,
+    last_author TEXT,
+    top_author TEXT,
+    top_authors TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_file_history_repo_file ON file_history(repo_file);
+CREATE TABLE IF NOT EXISTS file_history_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _chunks(items: list, size: int = CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _format_time(timestamp: Optional[int]) -> Optional[str]:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp)) if timestamp else None
+
+
+def find_code_files(conn: sqlite3.Connection) -> set[str]:
+    """
+    Collects every source file path referenced by the code DB, from any column named like
+    a file path. JSON lists (such as `UMLClass.files`) are expanded into their entries.
+    """
+    files = set()
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    for table in tables:
+        if table.startswith("file_history"):
+            continue
+        columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+        for column in columns:
+            if column.lower() not in FILE_COLUMNS:
+                continue
+            for (value,) in conn.execute(f'SELECT DISTINCT "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL'):
+                value = str(value)
+                if value.startswith("["):
+                    try:
+                        files.update(str(v) for v in json.loads(value) if v)
+                        continue
+                    except ValueError:
+                        pass
+                files.add(value)
+    return files
+
+
+def match_repo_files(code_files: set[str], repo_files: set[str]) -> dict[str, str]:
+    """
+    Maps code DB file paths to repository-relative paths.
+
+    The code DB may store absolute paths from the machine that extracted it, so each file
+    is matched to the repository path sharing the longest run of trailing path components.
+    """
+    by_name = defaultdict(list)
+    for repo_file in repo_files:
+        by_name[repo_file.rsplit("/", 1)[-1]].append(repo_file.split("/"))
+
+    mapping = {}
+    for code_file in code_files:
+        parts = code_file.replace("\\", "/").split("/")
+        best, best_len = None, 0
+        for candidate in by_name.get(parts[-1], []):
+            common = 0
+            for a, b in zip(reversed(parts), reversed(candidate)):
+                if a != b:
+                    break
+                common += 1
+            if common > best_len:
+                best, best_len = "/".join(candidate), common
+        if best:
+            mapping[code_file] = best
+    return mapping
+
+
+def refresh_file_history(
+    db_path: str,
+    repository_path: str,
+    history: Optional[GitHistoryIndex] = None,
+    recent_days: int = RECENT_DAYS,
+) -> int:
+    """
+    Creates or incrementally refreshes the `file_history` table in a code DB.
+
+    Each file referenced by the code DB gets its commit count, recent churn (lines added
+    and deleted in the `recent_days` before the latest commit), last-modified date, last
+    author and top authors, taken from the commit-history index of the repository. Only
+    files touched by commits indexed since the previous refresh, or newly referenced by
+    the code DB, are recomputed; recent churn is refreshed for all files in one query.
+    When no commit was indexed since and the code DB references the same files, the DB is
+    left untouched (no write, so its modification time and readers' caches are kept).
+
+    This writes into the code DB, so it is a build step (this module's CLI, or
+    `build_bundle`), never run while questions are answered from the DB.
+
+    Args:
+        db_path (str): Path to the code DB (SQLite).
+        repository_path (str): Path to the Git repository the code DB was extracted from.
+        history (Optional[GitHistoryIndex]): The history index to use. Defaults to the shared index of the repository.
+        recent_days (int): The window used for recent churn.
+
+    Returns:
+        int: The number of files whose history rows were recomputed.
+    """
+    history = history or get_history_index(repository_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        has_meta = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'file_history_meta'").fetchone()
+        meta = dict(conn.execute("SELECT key, value FROM file_history_meta")) if has_meta else {}
+        _, rows = history.query("SELECT COALESCE(MAX(rowid), 0), MAX(committed_at) FROM commits")
+        max_rowid, newest = rows[0]
+        last_rowid = int(meta.get("commit_rowid", 0))
+        generation = str(history.generation())
+        repository = os.path.realpath(repository_path)
+        code_files = find_code_files(conn)
+        code_files_digest = hashlib.sha1(json.dumps(sorted(code_files)).encode()).hexdigest()
+        # Repository paths and recent churn only change with newly indexed commits
+        if (
+            max_rowid == last_rowid
+            and meta.get("generation") == generation
+            and meta.get("repository") == repository
+            and meta.get("code_files") == code_files_digest
+        ):
+            return 0
+
+        conn.executescript(SCHEMA)
+        _, rows = history.query("SELECT DISTINCT path FROM file_changes")
+        mapping = match_repo_files(code_files, {row[0] for row in rows})
+        known = {row[0] for row in conn.execute("SELECT file FROM file_history")}
+
+        if meta.get("generation") != generation or meta.get("repository") != repository:
+            stale = set(mapping)  # The history index was rebuilt or points elsewhere
+            conn.execute("DELETE FROM file_history")
+        else:
+            _, rows = history.query(
+                "SELECT DISTINCT f.path FROM file_changes f JOIN commits c ON c.hash = f.hash WHERE c.rowid > ?",
+                (last_rowid,),
+            )
+            touched = {row[0] for row in rows}
+            stale = {f for f, repo_file in mapping.items() if repo_file in touched or f not in known}
+
+        conn.executemany("DELETE FROM file_history WHERE file = ?", [(f,) for f in known - set(mapping)])
+        updated = _compute_rows(history, {f: mapping[f] for f in stale})
+        conn.executemany("INSERT OR REPLACE INTO file_history VALUES (?, ?, ?, 0, ?, ?, ?, ?)", updated)
+
+        churn = {}
+        if newest:
+            _, rows = history.query(
+                """
+                SELECT f.path, SUM(COALESCE(f.added, 0) + COALESCE(f.deleted, 0))
+                FROM file_changes f JOIN commits c ON c.hash = f.hash
+                WHERE c.committed_at >= ?
+                GROUP BY f.path
+                """,
+                (newest - recent_days * 86400,),
+            )
+            churn = dict(rows)
+        conn.executemany(
+            "UPDATE file_history SET recent_churn = ? WHERE file = ?",
+            [(churn.get(repo_file, 0), f) for f, repo_file in mapping.items()],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO file_history_meta (key, value) VALUES (?, ?)",
+            [
+                ("commit_rowid", str(max_rowid)),
+                ("generation", generation),
+                ("repository", repository),
+                ("code_files", code_files_digest),
+            ],
+        )
+        conn.commit()
+        return len(updated)
+    finally:
+        conn.close()
+
+
+def _compute_rows(history: GitHistoryIndex, files: dict[str, str]) -> list[tuple]:
+    """Aggregates commit count, last change and top authors for the given code DB files."""
+    repo_files = sorted(set(files.values()))
+    stats, authors = {}, defaultdict(list)
+    for chunk in _chunks(repo_files):
+        placeholders = ",".join("?" * len(chunk))
+        _, rows = history.query(
+            f"""
+            SELECT f.path, COUNT(DISTINCT f.hash), MAX(c.committed_at)
+            FROM file_changes f JOIN commits c ON c.hash = f.hash
+            WHERE f.path IN ({placeholders})
+            GROUP BY f.path
+            """,
+            tuple(chunk),
+        )
+        stats.update({path: (count, last) for path, count, last in rows})
+        _, rows = history.query(
+            f"""
+            SELECT f.path, c.author_name, COUNT(*) AS n, MAX(c.committed_at) AS latest
+            FROM file_changes f JOIN commits c ON c.hash = f.hash
+            WHERE f.path IN ({placeholders})
+            GROUP BY f.path, c.author_name
+            ORDER BY f.path, n DESC
+            """,
+            tuple(chunk),
+        )
+        for path, author, n, latest in rows:
+            authors[path].append((author, n, latest))
+
+    result = []
+    for code_file, repo_file in files.items():
+        count, last = stats.get(repo_file, (0, None))
+        ranked = authors.get(repo_file, [])
+        last_author = max(ranked, key=lambda a: a[2])[0] if ranked else None
+        top = [a[0] for a in ranked[:TOP_AUTHORS]]
+        result.append((
+            code_file,
+            repo_file,
+            count,
+            _format_time(last),
+            last_author,
+            top[0] if top else None,
+            json.dumps(top),
+        ))
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Create or refresh the file_history table of a code DB.")
+    parser.add_argument("db_path", help="Path to the code DB (SQLite)")
+    parser.add_argument("repository_path", help="Path to the Git repository the code DB describes")
+    parser.add_argument("--recent-days", type=int, default=RECENT_DAYS)
+    args = parser.parse_args()
+
+    count = refresh_file_history(args.db_path, args.repository_path, recent_days=args.recent_days)
+    print(f"Refreshed history of {count} files in {args.db_path}")
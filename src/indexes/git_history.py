@@ -0,0 +1,308 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Optional
+
+from git import Repo
+from git.exc import GitCommandError
+
+from src.utils.helpers import connect_readonly
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    hash TEXT PRIMARY KEY,
+    author_name TEXT,
+    author_email TEXT,
+    authored_at INTEGER,
+    committed_at INTEGER,
+    subject TEXT
+);
+CREATE TABLE IF NOT EXISTS file_changes (
+    hash TEXT NOT NULL,
+    path TEXT NOT NULL,
+    added INTEGER,
+    deleted INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_file_changes_path ON file_changes(path);
+CREATE INDEX IF NOT EXISTS idx_file_changes_hash ON file_changes(hash);
+CREATE INDEX IF NOT EXISTS idx_commits_author ON commits(author_name);
+CREATE INDEX IF NOT EXISTS idx_commits_committed_at ON commits(committed_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+LOG_FORMAT = "--format=%x00%H%x1f%an%x1f%ae%x1f%at%x1f%ct%x1f%s"
+BATCH_SIZE = 1000
+MAX_QUERY_ROWS = 200
+
+
+def _prefix_range(prefix: str):
+    """Returns bounds so `path >= lo AND path < hi` matches every path under `prefix` using the index."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class GitHistoryIndex:
+    """
+    A per-repository SQLite index of commit history: commits, authors, timestamps,
+    touched files and line churn.
+
+    The index is built once with a single streamed `git log --numstat` walk and is
+    brought up to date incrementally whenever HEAD moves, so common history questions
+    are answered with indexed SQL instead of a fresh `git` process.
+
+    Attributes:
+        repository_path (str): Path to the working tree of the repository.
+        db_path (str): Path to the SQLite file holding the index.
+    """
+
+    def __init__(self, repository_path: str, db_path: Optional[str] = None, readonly: bool = False):
+        """
+        Opens (and creates, if needed) the index for a repository.
+
+        Args:
+            repository_path (str): Path to the Git repository.
+            db_path (Optional[str]): Where to store the index. Defaults to `<git dir>/lapsum/history.db`.
+            readonly (bool): Serve a prebuilt index (e.g. a project bundle's) as is: it is
+                never created or updated, and the repository is not opened.
+        """
+        self.repository_path = repository_path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        if readonly:
+            self.repo, self.db_path = None, db_path
+            return
+        self.repo = Repo(repository_path)
+        self.db_path = db_path or os.path.join(self.repo.git_dir, "lapsum", "history.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        if readonly:
+            return connect_readonly(self.db_path)
+        return sqlite3.connect(self.db_path)
+
+    def _get_meta(self, conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def head(self) -> Optional[str]:
+        """Returns the commit hash the index was last brought up to, if any."""
+        with closing(self._connect(self.readonly)) as conn:
+            return self._get_meta(conn, "head")
+
+    def generation(self) -> int:
+        """Returns a counter bumped every time the index is rebuilt after a history rewrite."""
+        with closing(self._connect(self.readonly)) as conn:
+            return int(self._get_meta(conn, "generation") or 0)
+
+    def update(self) -> int:
+        """
+        Brings the index up to date with HEAD.
+
+        Only commits added since the last indexed HEAD are walked. If history was
+        rewritten (the old HEAD is no longer an ancestor, or no longer exists after a
+        garbage collection), the index is rebuilt.
+
+        Returns:
+            int: The number of commits added to the index.
+        """
+        if self.readonly:
+            return 0
+        with self._lock:
+            try:
+                head = self.repo.head.commit.hexsha
+            except ValueError:
+                return 0  # Empty repository, nothing to index yet
+
+            with self._connect() as conn:
+                last = self._get_meta(conn, "head")
+                if last == head:
+                    return 0
+                rev = head
+                try:
+                    incremental = bool(last) and self.repo.is_ancestor(last, head)
+                except GitCommandError:
+                    incremental = False  # The old HEAD object is gone
+                if incremental:
+                    rev = f"{last}..{head}"
+                elif last:
+                    conn.execute("DELETE FROM file_changes")
+                    conn.execute("DELETE FROM commits")
+                    generation = int(self._get_meta(conn, "generation") or 0) + 1
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (str(generation),))
+
+                added = self._index_range(conn, rev)
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('head', ?)", (head,))
+            return added
+
+    def _index_range(self, conn: sqlite3.Connection, rev: str) -> int:
+        proc = self.repo.git(c="core.quotepath=off").log(
+            rev, "--reverse", "--no-renames", "--numstat", LOG_FORMAT, as_process=True
+        )
+        commits, changes = [], []
+        current = None
+        count = 0
+        for raw in proc.stdout:
+            line = raw.decode("utf-8", errors="replace").rstrip("\n")
+            if line.startswith("\x00"):
+                fields = line[1:].split("\x1f", 5)
+                current = fields[0]
+                commits.append((current, fields[1], fields[2], int(fields[3]), int(fields[4]), fields[5]))
+                count += 1
+            elif line and current:
+                added, deleted, path = line.split("\t", 2)
+                changes.append((
+                    current,
+                    path,
+                    int(added) if added != "-" else None,
+                    int(deleted) if deleted != "-" else None,
+                ))
+            if len(commits) >= BATCH_SIZE:
+                self._flush(conn, commits, changes)
+        self._flush(conn, commits, changes)
+        proc.wait()
+        return count
+
+    def _flush(self, conn: sqlite3.Connection, commits: list, changes: list):
+        conn.executemany("INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?)", commits)
+        conn.executemany("INSERT INTO file_changes VALUES (?, ?, ?, ?)", changes)
+        commits.clear()
+        changes.clear()
+
+    def query(self, sql: str, params: tuple = (), limit: Optional[int] = None) -> tuple[list[str], list[tuple]]:
+        """
+        Runs a read-only SQL query against the index.
+
+        Args:
+            sql (str): The SQL query to run.
+            params (tuple): Optional query parameters.
+            limit (Optional[int]): If set, fetch at most this many rows.
+
+        Returns:
+            tuple[list[str], list[tuple]]: Column names and result rows.
+        """
+        conn = self._connect(readonly=True)
+        try:
+            cursor = conn.execute(sql, params)
+            columns = [d[0] for d in cursor.description or []]
+            return columns, cursor.fetchmany(limit) if limit else cursor.fetchall()
+        finally:
+            conn.close()
+
+    def run_no_throw(self, sql: str) -> str:
+        """Runs a read-only query and formats the result for an LLM, returning an error string on failure."""
+        try:
+            columns, rows = self.query(sql, limit=MAX_QUERY_ROWS + 1)
+        except sqlite3.Error as e:
+            return f"Error: {e}"
+        if not rows:
+            return "No matching history found."
+        lines = ["\t".join(columns)]
+        lines += ["\t".join("" if v is None else str(v) for v in row) for row in rows[:MAX_QUERY_ROWS]]
+        if len(rows) > MAX_QUERY_ROWS:
+            lines.append(f"... more rows not shown (limit {MAX_QUERY_ROWS})")
+        return "\n".join(lines)
+
+    def last_commit(self, path: str) -> Optional[dict]:
+        """
+        Returns the most recent commit touching a file or any file under a directory.
+
+        Args:
+            path (str): A repository-relative file path or directory prefix.
+        """
+        lo, hi = _prefix_range(path.rstrip("/") + "/")
+        columns, rows = self.query(
+            """
+            SELECT c.hash, c.author_name, c.author_email, c.committed_at, c.subject
+            FROM commits c
+            WHERE c.hash IN (
+                SELECT hash FROM file_changes WHERE path = ? OR (path >= ? AND path < ?)
+            )
+            ORDER BY c.committed_at DESC, c.rowid DESC
+            LIMIT 1
+            """,
+            (path, lo, hi),
+        )
+        return dict(zip(columns, rows[0])) if rows else None
+
+    def file_history(self, path: str, limit: int = 20) -> list[dict]:
+        """Returns the latest commits touching a file, newest first, with per-commit churn."""
+        columns, rows = self.query(
+            """
+            SELECT c.hash, c.author_name, c.committed_at, c.subject, f.added, f.deleted
+            FROM file_changes f JOIN commits c ON c.hash = f.hash
+            WHERE f.path = ?
+            ORDER BY c.committed_at DESC, c.rowid DESC
+            LIMIT ?
+            """,
+            (path, limit),
+        )
+        return [dict(zip(columns, row)) for row in rows]
+
+    def top_contributors(self, path_prefix: str = "", limit: int = 10, since: Optional[int] = None) -> list[dict]:
+        """
+        Returns the authors with the most commits, optionally restricted to a path prefix
+        (e.g. a package directory) and to commits after a unix timestamp.
+        """
+        where, params = ["1 = 1"], []
+        if path_prefix:
+            lo, hi = _prefix_range(path_prefix)
+            where.append("f.path >= ? AND f.path < ?")
+            params += [lo, hi]
+        if since is not None:
+            where.append("c.committed_at >= ?")
+            params.append(since)
+        columns, rows = self.query(
+            f"""
+            SELECT c.author_name, COUNT(DISTINCT c.hash) AS commits,
+                   SUM(f.added) AS added, SUM(f.deleted) AS deleted
+            FROM file_changes f JOIN commits c ON c.hash = f.hash
+            WHERE {' AND '.join(where)}
+            GROUP BY c.author_name
+            ORDER BY commits DESC
+            LIMIT ?
+            """,
+            (*params, limit),
+        )
+        return [dict(zip(columns, row)) for row in rows]
+
+
+_indexes: dict[str, GitHistoryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_history_index(repository_path: str, db_path: Optional[str] = None) -> GitHistoryIndex:
+    """
+    Returns the process-wide history index for a repository, building it on first use
+    and bringing it up to date with HEAD on every call.
+
+    With `db_path`, returns the prebuilt, read-only index in that file instead (such as
+    the one of a project bundle), frozen at the commit it was built at. It is kept apart
+    from the repository's own index, so requests for the bundle and for the live
+    repository each see their own history.
+    """
+    key = os.path.realpath(db_path) if db_path else os.path.realpath(repository_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = GitHistoryIndex(repository_path, db_path, readonly=bool(db_path))
+    if not db_path:
+        index.update()
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or update the commit-history index of a repository.")
+    parser.add_argument("repository_path")
+    parser.add_argument("--db", default=None, help="Where to store the index (default: <git dir>/lapsum/history.db)")
+    args = parser.parse_args()
+
+    index = GitHistoryIndex(args.repository_path, args.db)
+    added = index.update()
+    print(f"Indexed {added} new commits into {index.db_path} (HEAD {index.head()})")
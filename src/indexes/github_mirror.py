@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Optional
+
+from src.utils.github_client import API_URL, GitHubClient, get_github_client
+
+PER_PAGE = 100
+DEFAULT_LIMIT = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    is_pull_request INTEGER NOT NULL,
+    title TEXT,
+    body TEXT,
+    state TEXT,
+    author TEXT,
+    labels TEXT,
+    comments INTEGER,
+    created_at TEXT,
+    updated_at TEXT,
+    closed_at TEXT,
+    url TEXT,
+    UNIQUE (repo, number)
+);
+CREATE INDEX IF NOT EXISTS idx_issues_repo_updated ON issues(repo, updated_at);
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    issue_number INTEGER NOT NULL,
+    author TEXT,
+    body TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_comments_issue ON comments(repo, issue_number);
+CREATE TABLE IF NOT EXISTS labels (
+    repo TEXT NOT NULL,
+    name TEXT NOT NULL,
+    color TEXT,
+    description TEXT,
+    PRIMARY KEY (repo, name)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    repo TEXT PRIMARY KEY,
+    issues_since TEXT,
+    comments_since TEXT,
+    synced_at REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts USING fts5(title, body, labels, comments);
+"""
+
+# GitHub search qualifiers understood by `search`, mapped to SQL conditions on `issues`.
+QUALIFIERS = {
+    ("is", "open"): ("i.state = ?", "open"),
+    ("is", "closed"): ("i.state = ?", "closed"),
+    ("state", "open"): ("i.state = ?", "open"),
+    ("state", "closed"): ("i.state = ?", "closed"),
+    ("is", "issue"): ("i.is_pull_request = ?", 0),
+    ("type", "issue"): ("i.is_pull_request = ?", 0),
+    ("is", "pr"): ("i.is_pull_request = ?", 1),
+    ("type", "pr"): ("i.is_pull_request = ?", 1),
+}
+# Bare words that only say which kind of item is wanted (the old agent keyed on "issue" / "pull").
+TYPE_WORDS = {
+    "issue": 0, "issues": 0,
+    "pr": 1, "prs": 1, "pull": 1, "pulls": 1, "pull-request": 1, "pull-requests": 1,
+}
+STATE_WORDS = {"open": "open", "opened": "open", "closed": "closed"}
+# Filler words of natural-language questions that would otherwise have to appear in the text.
+IGNORED_WORDS = {
+    "request", "requests", "a", "an", "the", "of", "in", "on", "for", "to", "with", "by", "and", "or",
+    "is", "are", "was", "were", "there", "any", "all", "list", "show", "find", "get", "how", "many",
+    "what", "which", "who", "number", "count", "latest", "recent", "repo", "repository",
+}
+
+
+class GitHubMirror:
+    """
+    A local SQLite mirror of the issues, pull requests, labels and comments of GitHub
+    repositories, with an FTS5 index over their text.
+
+    `sync` pulls only what changed since the previous sync (using the `since` parameter
+    of the issues and comments endpoints), so the GitHub agent can answer from local
+    disk and batch runs do not spend API quota.
+
+    Attributes:
+        db_path (str): Path to the SQLite file holding the mirror.
+        client (GitHubClient): The shared GitHub client; its base URL can point at a stand-in server for offline runs.
+    """
+
+    def __init__(self, db_path: str, client: Optional[GitHubClient] = None):
+        self.db_path = db_path
+        self.client = client or get_github_client()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+
+    def _get_pages(self, path: str, params: dict):
+        """Yields every item of a paginated GitHub list endpoint, paced as bulk requests."""
+        return self.client.get_pages(path, params, per_page=PER_PAGE, bulk=True)
+
+    def is_synced(self, repo: str) -> bool:
+        """Returns True if the repository has been mirrored at least once."""
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM sync_state WHERE repo = ?", (repo,)).fetchone() is not None
+
+    def synced_at(self, repo: str) -> Optional[float]:
+        """Returns the unix time of the last sync of a repository, if any."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT synced_at FROM sync_state WHERE repo = ?", (repo,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, repo: str) -> dict:
+        """
+        Mirrors the issues, pull requests, labels and comments of a repository that changed
+        since its previous sync.
+
+        Args:
+            repo (str): The repository as `owner/name`.
+
+        Returns:
+            dict: The number of issues and comments fetched.
+        """
+        with self._lock:
+            with self._connect() as conn:
+                row = conn.execute("SELECT issues_since, comments_since FROM sync_state WHERE repo = ?", (repo,)).fetchone()
+            issues_since, comments_since = row if row else (None, None)
+
+            params = {"state": "all", "sort": "updated", "direction": "asc"}
+            issues = list(self._get_pages(f"/repos/{repo}/issues", {**params, **({"since": issues_since} if issues_since else {})}))
+            comments = list(self._get_pages(
+                f"/repos/{repo}/issues/comments",
+                {"sort": "updated", "direction": "asc", **({"since": comments_since} if comments_since else {})},
+            ))
+            labels = list(self._get_pages(f"/repos/{repo}/labels", {}))
+
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(
+                        i["id"], repo, i["number"], int("pull_request" in i), i.get("title"), i.get("body"),
+                        i.get("state"), (i.get("user") or {}).get("login"),
+                        json.dumps([label["name"] for label in i.get("labels", [])]),
+                        i.get("comments", 0), i.get("created_at"), i.get("updated_at"), i.get("closed_at"),
+                        i.get("html_url"),
+                    ) for i in issues],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(
+                        c["id"], repo, int(c["issue_url"].rstrip("/").rsplit("/", 1)[-1]),
+                        (c.get("user") or {}).get("login"), c.get("body"), c.get("created_at"), c.get("updated_at"),
+                    ) for c in comments],
+                )
+                conn.execute("DELETE FROM labels WHERE repo = ?", (repo,))
+                conn.executemany(
+                    "INSERT INTO labels VALUES (?, ?, ?, ?)",
+                    [(repo, label["name"], label.get("color"), label.get("description")) for label in labels],
+                )
+                touched = {i["number"] for i in issues}
+                touched.update(int(c["issue_url"].rstrip("/").rsplit("/", 1)[-1]) for c in comments)
+                self._reindex(conn, repo, touched)
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                    (
+                        repo,
+                        max([i["updated_at"] for i in issues], default=issues_since),
+                        max([c["updated_at"] for c in comments], default=comments_since),
+                        time.time(),
+                    ),
+                )
+            return {"issues": len(issues), "comments": len(comments)}
+
+    def _reindex(self, conn: sqlite3.Connection, repo: str, numbers: set[int]):
+        """Rewrites the full-text rows of the given issues, including the text of their comments."""
+        for number in numbers:
+            row = conn.execute(
+                "SELECT id, title, body, labels FROM issues WHERE repo = ? AND number = ?", (repo, number)
+            ).fetchone()
+            if not row:
+                continue
+            text = "\n".join(
+                body for (body,) in conn.execute(
+                    "SELECT body FROM comments WHERE repo = ? AND issue_number = ? ORDER BY created_at", (repo, number)
+                ) if body
+            )
+            conn.execute("DELETE FROM issues_fts WHERE rowid = ?", (row[0],))
+            conn.execute(
+                "INSERT INTO issues_fts (rowid, title, body, labels, comments) VALUES (?, ?, ?, ?, ?)",
+                (row[0], row[1], row[2], " ".join(json.loads(row[3] or "[]")), text),
+            )
+
+    def search(self, repo: str, query: str, limit: int = DEFAULT_LIMIT) -> dict:
+        """
+        Searches the mirrored issues and pull requests of a repository.
+
+        The query uses GitHub search syntax: `is:open`, `is:closed`, `is:issue`, `is:pr`,
+        `label:<name>` and `author:<login>` qualifiers are applied as filters, as are bare
+        words such as "issues", "pull" or "open". Filler words are dropped and the remaining
+        words are matched against titles, bodies, labels and comments.
+
+        Returns:
+            dict: The total number of matches and the best `limit` of them.
+        """
+        where, params, terms = ["i.repo = ?"], [repo], []
+        for token in query.split():
+            key, _, value = token.partition(":")
+            key, value = key.lower(), value.strip('"')
+            word = token.strip('"?.,!;()').replace('"', "")
+            if (key, value.lower()) in QUALIFIERS:
+                condition, param = QUALIFIERS[(key, value.lower())]
+                where.append(condition)
+                params.append(param)
+            elif key == "label" and value:
+                where.append("EXISTS (SELECT 1 FROM json_each(i.labels) WHERE lower(json_each.value) = lower(?))")
+                params.append(value)
+            elif key == "author" and value:
+                where.append("i.author = ?")
+                params.append(value)
+            elif key in ("repo", "in", "sort") and value:
+                continue
+            elif word.lower() in TYPE_WORDS:
+                where.append("i.is_pull_request = ?")
+                params.append(TYPE_WORDS[word.lower()])
+            elif word.lower() in STATE_WORDS:
+                where.append("i.state = ?")
+                params.append(STATE_WORDS[word.lower()])
+            elif word and word.lower() not in IGNORED_WORDS:
+                terms.append(f'"{word}"')
+
+        conn = self._connect()
+        try:
+            # All words must match, as on GitHub; fall back to any word so loose phrasings still find something.
+            for match in ([" ".join(terms), " OR ".join(terms)] if terms else [None]):
+                source, order, clauses, args = "issues i", "i.updated_at DESC", list(where), list(params)
+                if match:
+                    source = "issues_fts JOIN issues i ON i.id = issues_fts.rowid"
+                    clauses.append("issues_fts MATCH ?")
+                    args.append(match)
+                    order = "bm25(issues_fts)"
+                total = conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {' AND '.join(clauses)}", args).fetchone()[0]
+                if total:
+                    break
+            cursor = conn.execute(
+                f"""
+                SELECT i.number, CASE WHEN i.is_pull_request THEN 'pull_request' ELSE 'issue' END AS type,
+                       i.title, i.state, i.author, i.labels, i.comments, i.created_at, i.updated_at, i.url
+                FROM {source}
+                WHERE {' AND '.join(clauses)}
+                ORDER BY {order}
+                LIMIT ?
+                """,
+                (*args, limit),
+            )
+            columns = [d[0] for d in cursor.description]
+            items = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+        for item in items:
+            item["labels"] = json.loads(item["labels"] or "[]")
+        return {"total": total, "items": items}
+
+
+_mirrors: dict[str, GitHubMirror] = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_github_mirror(settings: dict) -> GitHubMirror:
+    """Returns the process-wide GitHub mirror configured by the `tools.github` settings."""
+    path = os.path.expanduser(settings.get("mirror_path") or os.path.join("~", ".cache", "lapsum", "github_mirror.db"))
+    with _mirrors_lock:
+        if path not in _mirrors:
+            _mirrors[path] = GitHubMirror(path, get_github_client(base_url=settings.get("base_url", API_URL)))
+        return _mirrors[path]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mirror the issues and pull requests of GitHub repositories locally.")
+    parser.add_argument("repos", nargs="+", help="Repositories as owner/name")
+    parser.add_argument("--db", default=os.path.join(os.path.expanduser("~"), ".cache", "lapsum", "github_mirror.db"))
+    parser.add_argument("--base-url", default=API_URL)
+    args = parser.parse_args()
+
+    mirror = GitHubMirror(args.db, get_github_client(base_url=args.base_url))
+    for repo in args.repos:
+        counts = mirror.sync(repo)
+        print(f"{repo}: fetched {counts['issues']} issues/PRs and {counts['comments']} comments")
@@ -1,3 +1,5 @@
-from .graph import graph
+from .graph import graph, get_session_graph
+from .checkpoint import SqliteSaver
+from .answer_cache import SemanticAnswerCache, get_answer_cache, invoke_cached
 
-__all__ = ["graph"]
\ No newline at end of file
+__all__ = ["graph", "get_session_graph", "SqliteSaver", "SemanticAnswerCache", "get_answer_cache", "invoke_cached"]
\ No newline at end of file
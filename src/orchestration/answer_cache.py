@@ -0,0 +1,303 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+import numpy as np
+import faiss
+from langchain_core.messages import AIMessage, BaseMessage
+
+from src.utils import get_tool_config, metrics
+from src.utils.git_cache import refs_fingerprint
+from src.utils.retrieval import get_embedder
+from src.utils.results import get_results
+from src.indexes.bundle import CODE_DB, is_bundled, open_bundle
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    elapsed REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_answers_project ON answers(project, id);
+CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers(last_used);
+"""
+RESPONSE_KEYS = ("supervisor_response", "source_response", "git_response", "github_response", "docs_response")
+PROJECT_KEYS = ("source_db", "repository_path", "github_url", "docs_source", "docs_source_type", "run_code", "run_git", "run_github", "run_docs")
+# Numbers and identifier-like tokens (snake_case, dotted paths, CamelCase, acronyms, words with
+# digits) a paraphrase must keep
+ANCHOR = re.compile(r"\b(\d+(\.\d+)*|\w*[_./]\w+|[A-Za-z]*[a-z][A-Z]\w*|[A-Z]{2,}\w*|[A-Za-z]+\d\w*)\b")
+# Words that flip the meaning of an otherwise identical question ("in 2020" / "after 2020")
+QUALIFIERS = {
+    "in", "before", "after", "since", "until", "during", "between", "not", "no", "never", "without",
+    "more", "less", "most", "least", "first", "last", "earliest", "latest", "top", "bottom",
+    "added", "removed", "deleted", "open", "closed", "merged",
+}
+
+
+def _value(value):
+    if isinstance(value, list):
+        value = value[-1] if value else None
+    return value.content if isinstance(value, BaseMessage) else value
+
+
+def question_text(state: dict) -> str:
+    """Returns the latest user question of a graph input."""
+    return str(_value(state.get("user_query")) or "").strip()
+
+
+def project_identity(state: dict) -> str:
+    """Hashes the sources (and enabled agents) a question is answered from."""
+    identity = {}
+    for key in PROJECT_KEYS:
+        value = _value(state.get(key))
+        if key in ("source_db", "repository_path") and value:
+            value = os.path.realpath(value)
+        identity[key] = value
+    return hashlib.sha1(json.dumps(identity, sort_keys=True, default=str).encode()).hexdigest()
+
+
+_db_fingerprints: dict[str, tuple] = {}
+_db_fingerprints_lock = threading.Lock()
+
+
+def code_db_fingerprint(db_path: str) -> str:
+    """
+    Fingerprints the content of a code DB: the SHA-256 of the file (recorded in the
+    manifest of a bundled copy). The hash is recomputed only when the file's inode,
+    modification time or size change.
+    """
+    if is_bundled(db_path):
+        return open_bundle(os.path.dirname(os.path.abspath(db_path))).manifest["files"][CODE_DB]["sha256"]
+    path = os.path.realpath(db_path)
+    stat = os.stat(path)
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _db_fingerprints_lock:
+        entry = _db_fingerprints.get(path)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    fingerprint = digest.hexdigest()
+    with _db_fingerprints_lock:
+        _db_fingerprints[path] = (key, fingerprint)
+    return fingerprint
+
+
+def project_fingerprint(state: dict) -> str:
+    """
+    Fingerprints the versions of a project's data: the content of its code DB (see
+    `code_db_fingerprint`) and the HEAD and refs of its repository.
+    """
+    parts = []
+    source_db = _value(state.get("source_db"))
+    if source_db and os.path.exists(source_db):
+        parts.append(code_db_fingerprint(source_db))
+    repository_path = _value(state.get("repository_path"))
+    if repository_path and os.path.exists(os.path.join(repository_path, ".git")):
+        parts.append(refs_fingerprint(repository_path))
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def is_degraded(result: dict) -> bool:
+    """
+    Returns True if an agent could not answer fully during a graph run: its backend was
+    unavailable (see `within_deadline`) or a tool call still failed after its fixes.
+    """
+    for key in RESPONSE_KEYS:
+        messages = result.get(key) or []
+        message = messages[-1] if isinstance(messages, list) and messages else messages
+        if not isinstance(message, BaseMessage):
+            continue
+        if (message.response_metadata or {}).get("degraded") or any(r.error for r in get_results(message)):
+            return True
+    return False
+
+
+def anchors(question: str) -> set[str]:
+    """Returns the identifiers, numbers and qualifiers two questions must share to have the same answer."""
+    words = {word.lower() for word in re.findall(r"\w+", question)}
+    return {m.group(0).lower() for m in ANCHOR.finditer(question)} | (words & QUALIFIERS)
+
+
+class SemanticAnswerCache:
+    """
+    An on-disk cache of final answers, looked up by the meaning of the question.
+
+    Questions are embedded and searched with an inner-product FAISS index per project
+    (see `project_identity`), so a paraphrase of an earlier question about the same
+    project gets its answer back when the cosine similarity reaches `threshold`. Raising
+    the threshold trades hits for precision; with `strict_anchors` a hit also requires
+    both questions to share their numbers, identifiers and qualifiers ("top 5" is not
+    "top 10", "in 2020" is not "after 2020").
+
+    Entries remember the project fingerprint they were answered at. When the code DB or
+    the repository refs change, the project's entries are dropped on the next lookup.
+    Indexes are built from SQLite on first use and pick up rows written by other
+    processes since; the least recently used entries are evicted past `max_entries`.
+    """
+
+    def __init__(self, db_path: str, embedding: Optional[str] = None, threshold: float = 0.93,
+                 strict_anchors: bool = True, max_entries: int = 10000):
+        self.db_path = db_path
+        self.embedder = get_embedder(embedding)
+        self.threshold = threshold
+        self.strict_anchors = strict_anchors
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # project -> (fingerprint, FAISS index, row ids, last row id loaded)
+        self._indexes: dict[str, tuple] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _index(self, conn: sqlite3.Connection, project: str, fingerprint: str) -> tuple:
+        """Returns the project's index at `fingerprint`, invalidating and loading rows as needed."""
+        entry = self._indexes.get(project)
+        if entry is None or entry[0] != fingerprint:
+            deleted = conn.execute("DELETE FROM answers WHERE project = ? AND fingerprint != ?", (project, fingerprint)).rowcount
+            if deleted:
+                metrics.incr("answer_cache.invalidated", deleted)
+            entry = (fingerprint, None, [], 0)
+        _, index, ids, last_id = entry
+        rows = conn.execute(
+            "SELECT id, vector FROM answers WHERE project = ? AND id > ? ORDER BY id",
+            (project, last_id),
+        ).fetchall()
+        if rows:
+            vectors = np.stack([np.frombuffer(vector, dtype=np.float32) for _, vector in rows])
+            if index is None:
+                index = faiss.IndexFlatIP(vectors.shape[1])
+            index.add(vectors)
+            ids = ids + [row_id for row_id, _ in rows]
+            last_id = rows[-1][0]
+        entry = (fingerprint, index, ids, last_id)
+        self._indexes[project] = entry
+        return entry
+
+    def get(self, state: dict) -> Optional[AIMessage]:
+        """Returns the cached answer to the question of a graph input, or None on a miss."""
+        question = question_text(state)
+        if not question:
+            return None
+        start = time.perf_counter()
+        project, fingerprint = project_identity(state), project_fingerprint(state)
+        vector = self.embedder.embed_query(question).astype(np.float32).reshape(1, -1)
+        with self._lock, self._connect() as conn:
+            _, index, ids, _ = self._index(conn, project, fingerprint)
+            found = None
+            if index is not None and index.ntotal:
+                scores, positions = index.search(vector, min(5, index.ntotal))
+                for score, position in zip(scores[0], positions[0]):
+                    if position < 0 or score < self.threshold:
+                        break
+                    row = conn.execute(
+                        "SELECT id, question, answer, elapsed FROM answers WHERE id = ?", (ids[position],)
+                    ).fetchone()
+                    if row and (not self.strict_anchors or anchors(row[1]) == anchors(question)):
+                        found = (float(score), *row)
+                        break
+            if found:
+                conn.execute("UPDATE answers SET last_used = ? WHERE id = ?", (time.time(), found[1]))
+        metrics.incr("answer_cache.lookup_seconds", time.perf_counter() - start)
+        if found is None:
+            metrics.incr("answer_cache.misses")
+            return None
+        score, _, cached_question, answer, elapsed = found
+        metrics.incr("answer_cache.hits")
+        metrics.incr("answer_cache.saved_seconds", max(elapsed - (time.perf_counter() - start), 0))
+        return AIMessage(
+            content=answer,
+            response_metadata={"answer_cache": {"question": cached_question, "similarity": score}},
+        )
+
+    def put(self, state: dict, answer: str, elapsed: float):
+        """Stores the answer to the question of a graph input, which took `elapsed` seconds to produce."""
+        question = question_text(state)
+        if not question or not answer:
+            return
+        project, fingerprint = project_identity(state), project_fingerprint(state)
+        vector = self.embedder.embed_query(question).astype(np.float32)
+        with self._lock, self._connect() as conn:
+            self._index(conn, project, fingerprint)
+            conn.execute(
+                "INSERT INTO answers (project, fingerprint, question, answer, vector, elapsed, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (project, fingerprint, question, answer, vector.tobytes(), elapsed, time.time()),
+            )
+            evicted = conn.execute(
+                "DELETE FROM answers WHERE id IN (SELECT id FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            if evicted:
+                # Row ids of the in-memory indexes no longer line up; rebuild them on next use
+                self._indexes.clear()
+
+
+_cache: Optional[SemanticAnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Returns the process-wide answer cache configured by the `tools.answer_cache` settings,
+    or None unless it is turned on with `enabled: true`.
+    """
+    global _cache
+    settings = get_tool_config("answer_cache")
+    if not settings.get("enabled", False):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            path = settings.get("path") or os.path.join("~", ".cache", "lapsum", "answer_cache.db")
+            _cache = SemanticAnswerCache(
+                os.path.expanduser(path),
+                # Stored vectors do not record their embedder: never switch it implicitly
+                embedding=settings.get("embedding") or "hashing",
+                threshold=settings.get("threshold", 0.93),
+                strict_anchors=settings.get("strict_anchors", True),
+                max_entries=settings.get("max_entries", 10000),
+            )
+    return _cache
+
+
+def invoke_cached(graph, state: dict, config: Optional[dict] = None) -> dict:
+    """
+    Runs `graph` on a single-turn input unless the answer cache already answers its question.
+
+    On a hit the input is returned with the cached `final_response` (its metadata names the
+    matched question and similarity); otherwise the graph runs and its answer is stored,
+    unless the run was degraded (see `is_degraded`): an answer written around an outage or
+    a failed tool call is not served to later questions.
+    Multi-turn sessions should not go through here, as follow-ups depend on earlier turns.
+    """
+    cache = get_answer_cache()
+    if cache is None:
+        return graph.invoke(state, config)
+    cached = cache.get(state)
+    if cached is not None:
+        return {**state, "final_response": cached}
+    start = time.perf_counter()
+    result = graph.invoke(state, config)
+    final_response = result.get("final_response")
+    if final_response is None or not isinstance(final_response.content, str):
+        return result
+    if is_degraded(result):
+        metrics.incr("answer_cache.skipped_degraded")
+    else:
+        cache.put(state, final_response.content, time.perf_counter() - start)
+    return result
@@ -1,17 +1,21 @@
+import os
+import threading
 from langgraph.graph import StateGraph,  START, END
 from langchain_core.messages import AIMessage, HumanMessage
 # from langchain_ollama import ChatOllama
 from langgraph.graph.message import add_messages
-from src.utils import State
+from src.utils import State, get_tool_config
+from src.utils.profiling import profiled
 from src.agents.information import create_information_subgraph
 from src.agents.response import response_node
 from src.agents.supervisor import supervisor_node
+from .checkpoint import SqliteSaver
 
 
 workflow = StateGraph(State)
-workflow.add_node("supervisor", supervisor_node)
+workflow.add_node("supervisor", profiled(supervisor_node, "supervisor"))
 workflow.add_node("information", create_information_subgraph())
-workflow.add_node("response", response_node)
+workflow.add_node("response", profiled(response_node, "response"))
 
 workflow.add_edge("supervisor", "information")
 workflow.add_edge("information", "response")
@@ -19,4 +23,25 @@ workflow.add_edge("response", END)
 
 workflow.add_edge(START,"supervisor")
 
-graph = workflow.compile()
\ No newline at end of file
+graph = workflow.compile()
+
+_session_graph = None
+_session_graph_lock = threading.Lock()
+
+
+def get_session_graph():
+    """
+    Returns the graph compiled with a SQLite checkpointer (`tools.session.path`), for
+    multi-turn conversations.
+
+    Invoke it with `{"configurable": {"thread_id": ...}}`. The first turn passes the
+    project settings as usual; follow-ups only need the new `user_query`. Earlier turns'
+    evidence reaches the supervisor as context, and agent sub-queries already answered in
+    the session are served from its memo instead of being run again.
+    """
+    global _session_graph
+    with _session_graph_lock:
+        if _session_graph is None:
+            path = get_tool_config("session").get("path") or os.path.join("~", ".cache", "lapsum", "sessions.db")
+            _session_graph = workflow.compile(checkpointer=SqliteSaver(os.path.expanduser(path)))
+    return _session_graph
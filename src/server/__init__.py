@@ -0,0 +1,3 @@
+from .admission import AdmissionController, Rejected
+
+__all__ = ["AdmissionController", "Rejected"]
@@ -0,0 +1,82 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from src.utils.metrics import metrics
+
+
+class Rejected(Exception):
+    """A request turned away by admission control, with the HTTP status to answer it with."""
+
+    def __init__(self, status_code: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Bounds the work the server accepts: at most `max_concurrency` graph runs at once, at
+    most `max_queue` requests waiting for a slot, and at most `per_tenant` requests
+    (running or waiting) per tenant.
+
+    Requests beyond a bound are rejected immediately instead of queuing without limit: a
+    tenant over its share gets 429, and a full queue or a wait longer than
+    `queue_timeout` seconds gets 503. Tenant shares and run slots are taken separately,
+    so a run coalescing the requests of several tenants holds one slot while each tenant
+    is charged its own request. Used from the event loop only, so the counters need no lock.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 64, per_tenant: int = 4, queue_timeout: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.per_tenant = per_tenant
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._tenants: dict[str, int] = defaultdict(int)
+
+    @asynccontextmanager
+    async def tenant_share(self, tenant: str):
+        """Counts a request of `tenant` for the body of the `async with`, or raises `Rejected` (429) if it is over its share."""
+        if self._tenants[tenant] >= self.per_tenant:
+            metrics.incr("server.rejected_tenant")
+            raise Rejected(429, f"Tenant {tenant} already has {self.per_tenant} requests in flight")
+        self._tenants[tenant] += 1
+        try:
+            yield
+        finally:
+            self._tenants[tenant] -= 1
+            if not self._tenants[tenant]:
+                del self._tenants[tenant]
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds a run slot for the body of the `async with`, or raises `Rejected` (503) if the queue is full or the wait too long."""
+        if self.waiting >= self.max_queue:
+            metrics.incr("server.rejected_queue")
+            raise Rejected(503, "Server queue is full")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            metrics.incr("server.rejected_timeout")
+            raise Rejected(503, f"Waited more than {self.queue_timeout}s for a slot")
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    @asynccontextmanager
+    async def admit(self, tenant: str):
+        """Holds a share of `tenant` and a run slot for the body of the `async with`, or raises `Rejected`."""
+        async with self.tenant_share(tenant), self.slot():
+            yield
+
+    def stats(self) -> dict:
+        return {"running": self.running, "waiting": self.waiting, "tenants": len(self._tenants)}
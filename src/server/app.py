@@ -0,0 +1,222 @@
+import json
+import time
+import asyncio
+from contextlib import AsyncExitStack
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, Field
+
+from src.utils import get_tool_config, metrics, remove_think_block
+from src.utils.cache import AsyncSingleFlight
+from src.orchestration import graph, get_session_graph, invoke_cached
+from src.orchestration.answer_cache import project_identity
+from src.indexes import open_bundle
+from .admission import AdmissionController, Rejected
+
+PROJECT_FIELDS = ("source_db", "repository_path", "github_url", "docs_source", "docs_source_type", "run_code", "run_git", "run_github", "run_docs")
+
+
+class AskRequest(BaseModel):
+    question: str = Field(..., description="The user question")
+    project: Optional[str] = Field(None, description="A project of `tools.server.projects`, supplying the fields below")
+    bundle: Optional[str] = Field(None, description="A prebuilt project bundle directory, supplying the fields below")
+    source_db: Optional[str] = None
+    repository_path: Optional[str] = None
+    github_url: Optional[str] = None
+    docs_source: Optional[str] = None
+    docs_source_type: Optional[str] = None
+    run_code: Optional[bool] = None
+    run_git: Optional[bool] = None
+    run_github: Optional[bool] = None
+    run_docs: Optional[bool] = None
+    session_id: Optional[str] = Field(None, description="Continue a checkpointed multi-turn session")
+
+
+class AskResponse(BaseModel):
+    answer: str
+    seconds: float
+    coalesced: bool = False
+    cached: bool = False
+
+
+def build_input(request: AskRequest, projects: dict) -> dict:
+    """Builds the graph input of a request: the project's configured sources (or bundle), overridden by the request's own."""
+    if request.project and request.project not in projects:
+        raise HTTPException(404, f"Unknown project {request.project}")
+    state = dict(projects.get(request.project) or {})
+    bundle = request.bundle or state.pop("bundle", None)
+    if bundle:
+        try:
+            state = {**open_bundle(bundle).settings(), **state}
+        except (OSError, ValueError) as e:
+            raise HTTPException(404, f"Cannot open bundle {bundle}: {e}")
+    state.update({k: v for k, v in request.model_dump(include=set(PROJECT_FIELDS)).items() if v is not None})
+    state["user_query"] = [HumanMessage(content=request.question)]
+    return state
+
+
+def warm_project(settings: dict):
+    """
+    Builds the per-project resources the agents would otherwise build on the first
+    question: the code DB agent (schema reflection), the commit-history index, the local
+    docs index and the shared agents and GitHub mirror. A bundled project is only opened:
+    its artifacts are prebuilt and memory-mapped.
+    """
+    from src.agents.information.source_code import get_source_agent
+    from src.agents.information.git import get_git_agent
+    from src.agents.information.github import get_github_agent
+    from src.agents.information.docs import get_docs_agent
+    from src.indexes import get_history_index, get_docs_index, is_local_source
+
+    if settings.get("bundle"):
+        bundled = open_bundle(settings["bundle"]).settings()
+        if bundled.get("history_db"):
+            get_history_index(bundled["repository_path"], bundled["history_db"])
+        return
+    if settings.get("source_db") and settings.get("run_code", True):
+        get_source_agent(settings["source_db"])
+    if settings.get("repository_path") and settings.get("run_git", True):
+        get_git_agent()
+        get_history_index(settings["repository_path"])
+    if settings.get("github_url") and settings.get("run_github", True):
+        get_github_agent()
+    if settings.get("docs_source") and settings.get("run_docs", True):
+        get_docs_agent()
+        if is_local_source(settings["docs_source"]):
+            get_docs_index(settings["docs_source"], get_tool_config("docs"))
+
+
+def answer(state: dict, session_id: Optional[str] = None) -> tuple[str, bool]:
+    """Runs the graph on one request (through the answer cache, or the session checkpointer). Returns the answer and whether it was cached."""
+    if session_id:
+        result = get_session_graph().invoke(state, {"configurable": {"thread_id": session_id}})
+    else:
+        result = invoke_cached(graph, state)
+    final_response = result["final_response"]
+    return remove_think_block(final_response.content), "answer_cache" in (final_response.response_metadata or {})
+
+
+def create_app() -> FastAPI:
+    """
+    Creates the HTTP app over the compiled graph, configured by `tools.server`.
+
+    Graph runs happen on a pool of `max_concurrency` threads behind an
+    `AdmissionController`. Identical in-flight questions about the same project are
+    coalesced into one run (sessions excepted, as their answers depend on the thread).
+    Agents, DB handles and indexes of the `projects` are built at startup and shared
+    by all requests.
+    """
+    settings = get_tool_config("server")
+    projects = settings.get("projects") or {}
+    max_concurrency = settings.get("max_concurrency", 8)
+    app = FastAPI(title="LaPSUM")
+    app.state.admission = AdmissionController(
+        max_concurrency, settings.get("max_queue", 64), settings.get("per_tenant", 4), settings.get("queue_timeout", 30.0),
+    )
+    app.state.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="graph")
+    app.state.flight = AsyncSingleFlight()
+    app.state.releases = set()  # Pending admission releases of streamed runs
+
+    @app.on_event("startup")
+    async def warm_projects():
+        loop = asyncio.get_running_loop()
+        for name, project in projects.items():
+            start = time.perf_counter()
+            try:
+                await loop.run_in_executor(app.state.executor, warm_project, project)
+                print(f"Warmed {name} in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                print(f"Could not warm {name}: {e}")
+
+    @app.on_event("shutdown")
+    def stop_executor():
+        app.state.executor.shutdown(wait=False)
+
+    async def run_in_slot(state: dict, session_id: Optional[str]) -> tuple[str, bool]:
+        async with app.state.admission.slot():
+            return await asyncio.get_running_loop().run_in_executor(app.state.executor, answer, state, session_id)
+
+    @app.post("/ask", response_model=AskResponse)
+    async def ask(request: AskRequest, x_tenant: str = Header("default")):
+        start = time.perf_counter()
+        state = build_input(request, projects)
+        try:
+            # Every caller is charged to its own tenant before joining a flight, so a
+            # tenant's rejection is never handed to another's request
+            async with app.state.admission.tenant_share(x_tenant):
+                if request.session_id:
+                    (text, cached), shared = await run_in_slot(state, request.session_id), False
+                else:
+                    key = (project_identity(state), " ".join(request.question.lower().split()))
+                    (text, cached), shared = await app.state.flight.do(key, lambda: run_in_slot(state, None))
+        except Rejected as e:
+            raise HTTPException(e.status_code, e.reason)
+        seconds = time.perf_counter() - start
+        metrics.incr("server.requests")
+        metrics.incr("server.coalesced" if shared else "server.runs")
+        metrics.incr("server.seconds", seconds)
+        return AskResponse(answer=text, seconds=seconds, coalesced=shared, cached=cached)
+
+    @app.post("/ask/stream")
+    async def ask_stream(request: AskRequest, x_tenant: str = Header("default")):
+        """Streams server-sent events: one `node` event per graph step as it finishes, then the `answer`."""
+        state = build_input(request, projects)
+        config = {"configurable": {"thread_id": request.session_id}} if request.session_id else None
+        runner = get_session_graph() if request.session_id else graph
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def run():
+            try:
+                final_response = None
+                for namespace, update in runner.stream(state, config, stream_mode="updates", subgraphs=True):
+                    for node, delta in update.items():
+                        loop.call_soon_threadsafe(events.put_nowait, ("node", {"node": node, "graph": "/".join(n.split(":")[0] for n in namespace)}))
+                        if isinstance(delta, dict) and delta.get("final_response") is not None:
+                            final_response = delta["final_response"]
+                text = remove_think_block(final_response.content) if final_response is not None else ""
+                loop.call_soon_threadsafe(events.put_nowait, ("answer", {"answer": text}))
+            except Exception as e:
+                loop.call_soon_threadsafe(events.put_nowait, ("error", {"error": str(e)}))
+            loop.call_soon_threadsafe(events.put_nowait, None)
+
+        # Admitted before responding, so a rejection is still an HTTP error status. The run
+        # starts now and releases its admission when it finishes, whether or not the client
+        # is still there to read the events.
+        admission = AsyncExitStack()
+        try:
+            await admission.enter_async_context(app.state.admission.admit(x_tenant))
+        except Rejected as e:
+            raise HTTPException(e.status_code, e.reason)
+        running = loop.run_in_executor(app.state.executor, run)
+
+        async def release_when_done():
+            try:
+                await running
+            finally:
+                await admission.aclose()
+        app.state.releases.add(task := asyncio.ensure_future(release_when_done()))
+        task.add_done_callback(app.state.releases.discard)
+
+        async def stream():
+            while (event := await events.get()) is not None:
+                yield f"event: {event[0]}\ndata: {json.dumps(event[1])}\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/metrics")
+    async def get_metrics():
+        return {**metrics.summary(), **{f"server.{k}": v for k, v in app.state.admission.stats().items()}}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+app = create_app()
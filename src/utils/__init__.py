@@ -1,6 +1,9 @@
 from .state_model import State
 from .data_models import UMLClassDiagram
-from .llm_loader import get_agent
+from .llm_loader import get_agent, get_tool_config
 from .prompts import get_prompts
-from .helpers import ( safe_get_content, remove_think_block)
-__all__ = [ "State", "UMLClassDiagram", "get_prompts", "get_agent", "safe_get_content", "remove_think_block"]
\ No newline at end of file
+from .metrics import metrics
+from .helpers import ( safe_get_content, remove_think_block, connect_readonly, memo_key, memo_lookup, memo_entry)
+from .concurrency import run_batch
+from .github_client import get_github_client
+__all__ = [ "State", "UMLClassDiagram", "get_prompts", "get_agent", "get_tool_config", "safe_get_content", "remove_think_block", "connect_readonly", "memo_key", "memo_lookup", "memo_entry", "run_batch", "metrics", "get_github_client"]
\ No newline at end of file
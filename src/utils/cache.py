@@ -0,0 +1,166 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional
+
+from .metrics import metrics
+
+
+class TTLCache:
+    """
+    A thread-safe in-memory cache whose entries expire `ttl` seconds after being stored.
+    Once it holds more than `max_size` entries the least recently used one is evicted.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the function and
+    every caller arriving while it is in flight waits for and shares its result (or error).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._calls: dict = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], object]) -> tuple[object, bool]:
+        """
+        Runs `fn` unless a call for `key` is already in flight.
+
+        Returns:
+            tuple: The result and whether it was shared from another caller's call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class CachedLoader:
+    """
+    A `TTLCache` in front of a `SingleFlight`: a key is loaded at most once per TTL, and
+    concurrent misses for it share one load. Run metrics count `<name>.misses` (loads) and
+    `<name>.hits` (calls answered without a load), of which `<name>.coalesced` waited on
+    another caller's load.
+    """
+
+    def __init__(self, name: str, max_size: int = 512, ttl: float = 3600):
+        self.name = name
+        self.cache = TTLCache(max_size, ttl)
+        self.flight = SingleFlight()
+
+    def get(self, key: Hashable, load: Callable[[], object]):
+        """Returns the cached value of `key`, calling `load` to fill it on a miss."""
+        value = self.cache.get(key)
+        if value is not None:
+            metrics.incr(f"{self.name}.hits")
+            return value
+
+        def fill():
+            value = self.cache.get(key)  # Filled by a load that finished since the check above
+            if value is not None:
+                return value
+            value = load()
+            self.cache.set(key, value)
+            return value
+
+        value, shared = self.flight.do(key, fill)
+        if shared:
+            metrics.incr(f"{self.name}.hits")
+            metrics.incr(f"{self.name}.coalesced")
+        else:
+            metrics.incr(f"{self.name}.misses")
+        return value
+
+
+_loaders: dict[str, CachedLoader] = {}
+_loaders_lock = threading.Lock()
+
+
+def get_cached_loader(name: str, max_size: int = 512, ttl: float = 3600) -> CachedLoader:
+    """Returns the process-wide `CachedLoader` called `name`, creating it on first use."""
+    with _loaders_lock:
+        if name not in _loaders:
+            _loaders[name] = CachedLoader(name, max_size, ttl)
+        return _loaders[name]
+
+
+class AsyncSingleFlight:
+    """
+    The asyncio counterpart of `SingleFlight`: concurrent awaits for the same key share
+    the result (or error) of the first caller's coroutine.
+    """
+
+    def __init__(self):
+        self._calls: dict = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]) -> tuple[object, bool]:
+        """
+        Awaits `fn()` unless a call for `key` is already in flight.
+
+        Returns:
+            tuple: The result and whether it was shared from another caller's call.
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            return await asyncio.shield(call), True
+        call = self._calls[key] = asyncio.ensure_future(fn())
+        # Shielded and cleared when done, so a cancelled caller does not cancel the others' call
+        call.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(call), False
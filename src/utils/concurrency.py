@@ -0,0 +1,25 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+MAX_WORKERS = 8
+
+
+def run_batch(fn: Callable[[T], R], items: Iterable[T], max_workers: int = MAX_WORKERS) -> list[R]:
+    """
+    Applies `fn` to every item on a thread pool and returns the results in input order.
+
+    Used to execute every tool call an LLM asked for in one turn at once; git subprocesses,
+    HTTP requests and SQLite reads all release the GIL while they wait. A single item runs
+    inline without a pool. Each item runs in a copy of the caller's context, so context
+    variables such as the question's deadline reach the calls.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(lambda item: context.copy().run(fn, item), items))
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+from .metrics import metrics
+
+# Subcommands whose output depends only on the refs and objects of the repository,
+# never on the working tree or index, so it is safe to reuse while refs do not move.
+CACHEABLE_COMMANDS = {
+    "log", "shortlog", "show", "rev-list", "ls-tree", "cat-file",
+    "for-each-ref", "describe", "name-rev", "merge-base",
+}
+# Options making `describe` inspect the working tree
+WORKTREE_OPTIONS = ("--dirty", "--broken")
+DATE_OPTIONS = ("--since", "--until", "--after", "--before")
+ABSOLUTE_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2})?)?$")
+RELATIVE_OUTPUT = re.compile(r"relative|human|%[ac][rh]")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    repo TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    argv TEXT NOT NULL,
+    output TEXT NOT NULL,
+    elapsed REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_repo ON entries(repo);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+"""
+
+
+def resolve_git_dirs(repository_path: str) -> tuple[str, str]:
+    """
+    Returns the git directory of a working tree (holding its HEAD) and the common
+    directory holding the shared refs, following worktree `.git` files.
+    """
+    git_dir = os.path.join(repository_path, ".git")
+    if os.path.isfile(git_dir):
+        with open(git_dir, "r") as f:
+            git_dir = os.path.join(repository_path, f.read().strip().split("gitdir:", 1)[-1].strip())
+    common_dir = git_dir
+    commondir_file = os.path.join(git_dir, "commondir")
+    if os.path.isfile(commondir_file):
+        with open(commondir_file, "r") as f:
+            common_dir = os.path.join(git_dir, f.read().strip())
+    return os.path.realpath(git_dir), os.path.realpath(common_dir)
+
+
+def refs_fingerprint(repository_path: str) -> str:
+    """
+    Hashes HEAD, packed-refs and every loose ref of a repository.
+
+    This only reads a handful of small files, so checking whether refs moved is much
+    cheaper than forking git.
+    """
+    git_dir, common_dir = resolve_git_dirs(repository_path)
+    digest = hashlib.sha1()
+    for path in (os.path.join(git_dir, "HEAD"), os.path.join(common_dir, "packed-refs")):
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(path.encode() + b"\0" + f.read())
+    for root, dirs, files in os.walk(os.path.join(common_dir, "refs")):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                digest.update(path.encode() + b"\0" + f.read())
+    return digest.hexdigest()
+
+
+def is_cacheable(argv: list[str]) -> bool:
+    """
+    Returns True if a git command's output is fully determined by the refs it reads:
+    not with relative dates or relative output formats, nor with `describe --dirty` /
+    `--broken`, whose suffix depends on the working tree.
+    """
+    if not argv or argv[0] not in CACHEABLE_COMMANDS:
+        return False
+    for i, arg in enumerate(argv):
+        if arg.startswith(WORKTREE_OPTIONS):
+            return False
+        if RELATIVE_OUTPUT.search(arg):
+            return False
+        if arg.startswith(DATE_OPTIONS):
+            value = arg.split("=", 1)[1] if "=" in arg else (argv[i + 1] if i + 1 < len(argv) else "")
+            if not ABSOLUTE_DATE.match(value.strip("'\"")):
+                return False
+    return True
+
+
+class GitResultCache:
+    """
+    An on-disk LRU cache of git command outputs.
+
+    Entries are keyed on the repository path, a fingerprint of its HEAD and refs, and the
+    normalized command argv. When the refs of a repository move, its old entries stop
+    matching and are dropped on the next write; the least recently used entries are
+    evicted once the cache holds more than `max_entries`.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 5000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def _key(repo: str, fingerprint: str, argv: list[str]) -> str:
+        return hashlib.sha256(json.dumps([repo, fingerprint, argv]).encode()).hexdigest()
+
+    def get(self, repository_path: str, argv: list[str]) -> Optional[str]:
+        """Returns the cached output of a command, or None on a miss or an uncacheable command."""
+        if not is_cacheable(argv):
+            return None
+        repo = os.path.realpath(repository_path)
+        key = self._key(repo, refs_fingerprint(repository_path), argv)
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT output, elapsed FROM entries WHERE key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        if row is None:
+            metrics.incr("git_cache.misses")
+            return None
+        metrics.incr("git_cache.hits")
+        metrics.incr("git_cache.saved_seconds", row[1])
+        return row[0]
+
+    def put(self, repository_path: str, argv: list[str], output: str, elapsed: float):
+        """Stores the output of a command that took `elapsed` seconds to run."""
+        if not is_cacheable(argv):
+            return
+        repo = os.path.realpath(repository_path)
+        fingerprint = refs_fingerprint(repository_path)
+        key = self._key(repo, fingerprint, argv)
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE repo = ? AND fingerprint != ?", (repo, fingerprint))
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, repo, fingerprint, json.dumps(argv), output, elapsed, time.time()),
+            )
+            conn.execute(
+                """
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM entries ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+
+_cache: Optional[GitResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_git_cache(settings: dict) -> Optional[GitResultCache]:
+    """
+    Returns the process-wide git result cache configured by the `tools.git` settings,
+    or None if caching is disabled with `cache: false`.
+    """
+    global _cache
+    if not settings.get("cache", True):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            path = settings.get("cache_path") or os.path.join("~", ".cache", "lapsum", "git_cache.db")
+            _cache = GitResultCache(os.path.expanduser(path), settings.get("cache_size", 5000))
+    return _cache
@@ -0,0 +1,234 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import metrics
+from .resilience import DeadlineExceeded, bounded_timeout, get_retry_policy, resilient_call, time_left
+
+API_URL = "https://api.github.com"
+POOL_SIZE = 16
+CACHE_SIZE = 2048
+RESERVE_FRACTION = 0.01  # Share of each quota kept back from bulk requests for interactive use
+LOW_WATER_FRACTION = 0.1  # Requests are paced once less than this share of a quota is left
+REQUEST_TIMEOUT = 30
+
+
+def rate_limit_resource(url: str) -> str:
+    """Returns the GitHub rate-limit bucket (`X-RateLimit-Resource`) a request to `url` counts against."""
+    path = url.split("?", 1)[0]
+    if "/search/code" in path:
+        return "code_search"
+    if "/search/" in path:
+        return "search"
+    if path.endswith("/graphql"):
+        return "graphql"
+    return "core"
+
+
+class _Bucket:
+    """The last reported state of one rate-limit bucket and its next free slot."""
+
+    def __init__(self):
+        self.remaining: Optional[int] = None
+        self.limit: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.next_slot = 0.0
+
+
+class RateLimitScheduler:
+    """
+    Paces requests from concurrent workers so each GitHub quota lasts until it resets.
+
+    GitHub meters buckets separately (`core`, `search` at 30 a minute, `graphql`, ...), so
+    every response updates the bucket it names in `X-RateLimit-Resource` from its
+    `X-RateLimit-Remaining` / `-Limit` / `-Reset` headers, and a request is paced on its
+    own bucket only.
+
+    While more than `low_water_fraction` of a bucket's limit is left, requests are sent
+    at once, concurrently. Below it, they are handed out in evenly spaced slots of
+    `(reset - now) / remaining` seconds so the rest of the quota lasts until it resets.
+    Bulk requests (mirror syncs) leave `reserve_fraction` of the limit to interactive
+    ones: they count only `remaining - reserve` as available. A wait that would outlast
+    the current deadline raises `DeadlineExceeded` instead of sleeping.
+    """
+
+    def __init__(self, reserve_fraction: float = RESERVE_FRACTION, low_water_fraction: float = LOW_WATER_FRACTION):
+        self.reserve_fraction = reserve_fraction
+        self.low_water_fraction = low_water_fraction
+        self._buckets: dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, resource: str) -> _Bucket:
+        if resource not in self._buckets:
+            self._buckets[resource] = _Bucket()
+        return self._buckets[resource]
+
+    def wait(self, resource: str = "core", bulk: bool = False):
+        """Blocks until the caller may send its next request to the `resource` bucket."""
+        with self._lock:
+            bucket = self._bucket(resource)
+            now = time.time()
+            if bucket.remaining is None or not bucket.reset_at or bucket.reset_at <= now:
+                return  # Unknown or already reset: nothing to pace on
+            limit = bucket.limit or 0
+            available = bucket.remaining - (int(limit * self.reserve_fraction) if bulk else 0)
+            if available > limit * self.low_water_fraction:
+                bucket.next_slot = now
+                return
+            slot = max(now, bucket.next_slot)
+            left = time_left()
+            if left is not None and slot - now > left:
+                metrics.incr("resilience.deadline_exceeded")
+                raise DeadlineExceeded(f"GitHub {resource} quota leaves no time before the deadline")
+            bucket.next_slot = slot + (bucket.reset_at - now) / max(available, 1)
+        if slot > now:
+            metrics.incr("github.throttled_seconds", slot - now)
+            time.sleep(slot - now)
+
+    def update(self, response: requests.Response, resource: str = "core"):
+        """Records the quota reported by a response to a request sent to the `resource` bucket."""
+        headers = response.headers
+        with self._lock:
+            bucket = self._bucket(headers.get("X-RateLimit-Resource") or resource)
+            if headers.get("X-RateLimit-Remaining") is not None:
+                bucket.remaining = int(headers["X-RateLimit-Remaining"])
+            if headers.get("X-RateLimit-Limit") is not None:
+                bucket.limit = int(headers["X-RateLimit-Limit"])
+            if headers.get("X-RateLimit-Reset") is not None:
+                bucket.reset_at = float(headers["X-RateLimit-Reset"])
+
+    def remaining(self, resource: str = "core") -> Optional[int]:
+        """Returns the last reported remaining quota of a bucket, or None if unknown."""
+        with self._lock:
+            return self._bucket(resource).remaining
+
+    def backoff(self, response: requests.Response) -> float:
+        """Returns how long to wait before retrying a rate-limited (403/429) response, or 0 if it was not rate-limited."""
+        if response.status_code not in (403, 429):
+            return 0.0
+        if "Retry-After" in response.headers:
+            return float(response.headers["Retry-After"])
+        if response.headers.get("X-RateLimit-Remaining") == "0" and response.headers.get("X-RateLimit-Reset"):
+            return max(float(response.headers["X-RateLimit-Reset"]) - time.time(), 0.0) + 1
+        return 0.0
+
+
+class GitHubClient:
+    """
+    A GitHub REST client shared by every agent and worker using the same token.
+
+    - One pooled keep-alive `requests.Session` for all threads.
+    - An LRU cache of ETag / Last-Modified validators and bodies: repeated GETs are sent
+      as conditional requests and a `304 Not Modified` (which does not count against the
+      quota) is answered from the cache.
+    - A `RateLimitScheduler` pacing all workers on the quota the API reports, per bucket.
+    """
+
+    def __init__(self, token: Optional[str] = None, base_url: str = API_URL, pool_size: int = POOL_SIZE, cache_size: int = CACHE_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self.scheduler = RateLimitScheduler()
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _url(self, path: str) -> str:
+        return path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+
+    def get(self, path: str, params: Optional[dict] = None, retries: int = 3, bulk: bool = False) -> tuple[object, dict]:
+        """
+        Sends a (conditional) GET request.
+
+        Args:
+            path (str): An API path such as `/repos/owner/name/pulls`, or an absolute URL (e.g. a `next` page link).
+            params (Optional[dict]): Query parameters.
+            retries (int): How many times to retry after a rate-limit, 5xx or network error
+                (see `resilient_call`, which also applies the circuit breaker and deadline).
+            bulk (bool): A background request (e.g. a mirror sync), paced to leave a reserve
+                of the quota to interactive ones.
+
+        Returns:
+            tuple: The decoded JSON body and the parsed `Link` header (`response.links`).
+
+        Raises:
+            requests.HTTPError: If GitHub answers with an error status.
+            ResilienceError: If the deadline passed or GitHub's circuit breaker is open.
+        """
+        url = self._url(path)
+        resource = rate_limit_resource(url)
+        key = (url, tuple(sorted((params or {}).items())))
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached:
+                self._cache.move_to_end(key)
+
+        headers = {}
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        def send() -> requests.Response:
+            self.scheduler.wait(resource, bulk)
+            response = self.session.get(url, params=params, headers=headers, timeout=bounded_timeout(REQUEST_TIMEOUT))
+            metrics.incr("github.requests")
+            self.scheduler.update(response, resource)
+            if self.scheduler.backoff(response):
+                metrics.incr("github.rate_limited")
+                response.raise_for_status()  # Retried after Retry-After / the quota reset
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        response = resilient_call("github", send, get_retry_policy(attempts=retries + 1))
+        if response.status_code == 304 and cached:
+            metrics.incr("github.not_modified")
+            return cached["data"], cached["links"]
+        response.raise_for_status()
+        data = response.json()
+
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if etag or last_modified:
+            with self._cache_lock:
+                self._cache[key] = {"etag": etag, "last_modified": last_modified, "data": data, "links": response.links}
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return data, response.links
+
+    def get_pages(self, path: str, params: Optional[dict] = None, per_page: int = 100, bulk: bool = False):
+        """Yields every item of a paginated list endpoint, following `Link: rel="next"`."""
+        url, params = path, {**(params or {}), "per_page": per_page}
+        while url:
+            data, links = self.get(url, params, bulk=bulk)
+            yield from data
+            url, params = links.get("next", {}).get("url"), None
+
+
+_clients: dict[tuple, GitHubClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_github_client(token: Optional[str] = None, base_url: str = API_URL) -> GitHubClient:
+    """
+    Returns the process-wide client for a token (defaulting to `GITHUB_TOKEN`) and API root,
+    so connections, cached validators and the rate-limit schedule are shared.
+    """
+    token = token if token is not None else os.getenv("GITHUB_TOKEN")
+    key = (token, base_url.rstrip("/"))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = GitHubClient(token, base_url)
+        return _clients[key]
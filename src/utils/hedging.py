@@ -0,0 +1,174 @@
+import math
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from .metrics import metrics
+
+WINDOW = 200  # Latencies kept per backend
+MAX_WORKERS = 32
+
+
+class LatencyTracker:
+    """
+    The latencies of the latest `window` successful calls to a backend, and its recent
+    errors. Thread-safe; shared by every model (and tool binding) that calls the backend.
+    """
+
+    def __init__(self, window: int = WINDOW):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.errors = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    @property
+    def count(self) -> int:
+        return len(self._latencies)
+
+    def quantile(self, q: float) -> float:
+        """Returns the `q` quantile of the tracked latencies (NaN if there are none)."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return math.nan
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+
+_trackers: dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_latency_tracker(backend: str) -> LatencyTracker:
+    """Returns the process-wide latency tracker of a backend (e.g. `groq:llama-3.3-70b-versatile`)."""
+    with _trackers_lock:
+        if backend not in _trackers:
+            _trackers[backend] = LatencyTracker()
+        return _trackers[backend]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="hedge")
+        return _executor
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    A chat model that sends each request to an ordered list of backends and returns the
+    first answer.
+
+    The request goes to the first backend (or, with `order="latency"`, to the backend with
+    the lowest median latency). If it has not answered after its `quantile` latency (p95
+    by default), a backup request is sent to the next backend, up to `max_hedges` times,
+    and whichever finishes first wins. A backend that fails is replaced by the next one
+    right away. The late calls are left to finish in the background, and their latencies
+    still feed the trackers.
+
+    Until a backend has `min_samples` latencies tracked, its hedge delay is
+    `initial_delay`. Delays are clamped to `[min_delay, max_delay]`.
+
+    Counters: `llm_hedge.requests`, `llm_hedge.fired` (backup requests sent),
+    `llm_hedge.backup_wins` and `llm_hedge.failovers`.
+    """
+
+    backends: list[Any]
+    names: list[str]
+    quantile: float = 0.95
+    initial_delay: float = 2.0
+    min_delay: float = 0.05
+    max_delay: float = 30.0
+    min_samples: int = 20
+    max_hedges: int = 1
+    order: str = "config"
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    def bind_tools(self, tools, **kwargs):
+        """Binds the tools to every backend; the bound model shares the latency trackers."""
+        return self.model_copy(update={"backends": [b.bind_tools(tools, **kwargs) for b in self.backends]})
+
+    def hedge_delay(self, name: str) -> float:
+        """Returns how long to wait on a backend before sending a backup request."""
+        tracker = get_latency_tracker(name)
+        if tracker.count < self.min_samples:
+            return self.initial_delay
+        return min(max(tracker.quantile(self.quantile), self.min_delay), self.max_delay)
+
+    def _ordered(self) -> list[int]:
+        if self.order != "latency":
+            return list(range(len(self.backends)))
+
+        # Backends without enough samples sort first so they get traffic to be measured
+        def median(i):
+            tracker = get_latency_tracker(self.names[i])
+            return tracker.quantile(0.5) if tracker.count >= self.min_samples else 0.0
+        return sorted(range(len(self.backends)), key=median)
+
+    def _call(self, i: int, messages, stop, kwargs) -> AIMessage:
+        tracker = get_latency_tracker(self.names[i])
+        start = time.perf_counter()
+        try:
+            message = self.backends[i].invoke(messages, stop=stop, **kwargs)
+        except Exception:
+            tracker.record_error()
+            raise
+        tracker.record(time.perf_counter() - start)
+        return message
+
+    def _generate(self, messages, stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        metrics.incr("llm_hedge.requests")
+        executor = _get_executor()
+        order = self._ordered()
+        running, errors, hedges = {}, [], 0
+
+        def launch(position: int):
+            context = contextvars.copy_context()
+            running[executor.submit(context.run, self._call, order[position], messages, stop, kwargs)] = position
+            return position, time.perf_counter()
+
+        latest, launched_at = launch(0)
+        while True:
+            can_hedge = latest + 1 < len(order) and hedges < self.max_hedges
+            timeout = max(self.hedge_delay(self.names[order[latest]]) - (time.perf_counter() - launched_at), 0) if can_hedge else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedges += 1
+                metrics.incr("llm_hedge.fired")
+                latest, launched_at = launch(latest + 1)
+                continue
+            for future in done:
+                position = running.pop(future)
+                try:
+                    message = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if position:
+                    metrics.incr("llm_hedge.backup_wins")
+                message.response_metadata = {**(message.response_metadata or {}), "backend": self.names[order[position]]}
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            if not running:
+                if latest + 1 >= len(order):
+                    raise errors[-1]
+                metrics.incr("llm_hedge.failovers")
+                latest, launched_at = launch(latest + 1)
@@ -1,5 +1,13 @@
+import os
 import re
-from langchain_core.messages import BaseMessage, HumanMessage
+import sqlite3
+import hashlib
+from pathlib import Path
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from .metrics import metrics
+
+READONLY_MMAP_SIZE = 1 << 30  # Bytes of a read-only DB read through a memory map
+
 def safe_get_content(value, label):
     if isinstance(value, list) and value:
         return value[-1].content
@@ -9,3 +17,51 @@ def safe_get_content(value, label):
 
 def remove_think_block(text):
     return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
+
+def connect_readonly(db_path: str, mmap_size: int = READONLY_MMAP_SIZE) -> sqlite3.Connection:
+    """
+    Opens a read-only SQLite connection that can be used concurrently with other readers.
+
+    The first `mmap_size` bytes of the file are read through a memory map, so the pages are
+    shared through the OS page cache by every connection and process instead of being
+    copied into each connection's own cache.
+    """
+    conn = sqlite3.connect(Path(os.path.abspath(db_path)).as_uri() + "?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only = 1")
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    return conn
+
+def memo_key(agent: str, query, state: dict) -> str:
+    """
+    Keys a session memo entry on the project (its sources and their versions, see
+    `project_identity` and `project_fingerprint`), the agent and its normalized sub-query,
+    so a session moved to another project, or continued after its code DB or repository
+    changed, runs the sub-query again.
+    """
+    from src.orchestration.answer_cache import project_fingerprint, project_identity
+    text = query.content if isinstance(query, BaseMessage) else str(query)
+    words = re.findall(r"\w+", text.lower())
+    project = hashlib.sha1(f"{project_identity(state)}:{project_fingerprint(state)}".encode()).hexdigest()[:16]
+    return f"{agent}:{project}:{' '.join(words)}"
+
+def memo_lookup(state: dict, key: str):
+    """Returns the response an earlier turn of the session got for the same sub-query, if any."""
+    found = (state.get("memo") or {}).get(key)
+    metrics.incr("session_memo.hits" if found else "session_memo.misses")
+    return found
+
+def memo_entry(key: str, response: list) -> dict:
+    """
+    Returns the state update that memoizes an agent's response under `key`: the text of
+    its messages and their tool results cut down to the rendering budget (see
+    `ToolResult.compact`), without the rest of their metadata, so checkpoints stay small.
+    A degraded response (an unavailable backend or a failed tool call) is not kept.
+    """
+    from .results import get_results, result_message
+    entry = []
+    for message in response:
+        results = get_results(message)
+        if (message.response_metadata or {}).get("degraded") or any(r.error for r in results):
+            return {}
+        entry.append(result_message([r.compact() for r in results], message.content) if results else AIMessage(content=message.content))
+    return {"memo": {key: entry}}
@@ -1,51 +1,152 @@
 import os
+import time
+import random
+import threading
 import yaml
+from typing import Any, Optional
+from langchain_core.language_models.chat_models import SimpleChatModel
 from langchain_ollama import ChatOllama
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain.tools import Tool
 
-def load_llm(agent_config):
+from .hedging import HedgedChatModel
+from .resilience import ResilientChatModel
+from .rate_limit import RateLimitedChatModel
+
+REQUEST_TIMEOUT = 60.0
+
+class StandInChatModel(SimpleChatModel):
+    """
+    An offline chat model that answers every prompt with `response` after `latency`
+    seconds, for load tests and dry runs of the graph without API calls or keys.
+
+    A fraction `tail_rate` of the calls take `tail_latency` seconds instead, to mimic the
+    slow tail of a real provider.
+    """
+    response: str = "Stand-in answer."
+    latency: float = 0.0
+    tail_latency: float = 0.0
+    tail_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stand-in"
+
+    def _call(self, messages, stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        latency = self.tail_latency if self.tail_rate and random.random() < self.tail_rate else self.latency
+        if latency:
+            time.sleep(latency)
+        return self.response
+
+    def bind_tools(self, tools, **kwargs):
+        # Never calls tools, so binding them is a no-op
+        return self
+
+def load_llm(agent_config, resilient: bool = False):
     """
     Loads an LLM instance based on the configuration for a specific agent.
 
     Parameters:
     - agent_config (dict): Configuration dictionary with keys:
-        - 'provider' (str): LLM provider name ('openai', 'anthropic', 'ollama', 'groq').
+        - 'provider' (str): LLM provider name ('openai', 'anthropic', 'ollama', 'groq', 'standin').
         - 'model' (str): Model name (e.g. 'gpt-4', 'claude-3-sonnet-20240229').
         - 'temperature' (float, optional): Sampling temperature (default is 0.7).
+        - 'timeout' (float, optional): Seconds an OpenAI, Anthropic or Groq request may take
+          (default is 60). With `resilient`, each call's timeout also ends at the question's
+          deadline.
+        - 'requests_per_minute', 'tokens_per_minute' (float, optional): The provider quota
+          of the model. Calls then wait for it in a token bucket shared by every agent and
+          process using the same provider and model (`RateLimitedChatModel`).
+      Or, for hedged routing across several backends:
+        - 'backends' (list[dict]): Backend configs as above, in order of preference. Keys
+          set next to 'backends' (e.g. 'temperature') are defaults for every backend.
+        - 'hedge' (dict, optional): Settings of the `HedgedChatModel` ('quantile',
+          'initial_delay', 'min_delay', 'max_delay', 'min_samples', 'max_hedges', 'order').
+    - resilient (bool): Route every call through `resilient_call` (retries, circuit breaker
+      and deadline per backend, configured by `tools.resilience`) instead of the provider
+      SDK's own retries.
 
     Returns:
     - LLM instance from the appropriate LangChain chat module.
     """
+    if "backends" in agent_config:
+        defaults = {k: v for k, v in agent_config.items() if k not in ("backends", "hedge")}
+        backends = [{**defaults, **backend} for backend in agent_config["backends"]]
+        return HedgedChatModel(
+            backends=[load_llm(backend, resilient) for backend in backends],
+            names=[f"{backend['provider']}:{backend['model']}" for backend in backends],
+            **(agent_config.get("hedge") or {}),
+        )
+
     provider = agent_config["provider"]
     model = agent_config["model"]
     temperature = agent_config.get("temperature", 0.7)
+    retries = {"max_retries": 0} if resilient else {}
+    timeout = agent_config.get("timeout", REQUEST_TIMEOUT) if provider in ("openai", "anthropic", "groq") else None
 
     if provider == "openai":
-        return ChatOpenAI(model=model, temperature=temperature)
+        llm = ChatOpenAI(model=model, temperature=temperature, timeout=timeout, **retries)
     elif provider == "anthropic":
-        return ChatAnthropic(model=model, temperature=temperature)
+        llm = ChatAnthropic(model=model, temperature=temperature, timeout=timeout, **retries)
     elif provider == "ollama":
-        return ChatOllama(model=model, temperature=temperature)
+        llm = ChatOllama(model=model, temperature=temperature)
     elif provider == "groq":
-        return ChatGroq(model=model, temperature=temperature)
+        llm = ChatGroq(model=model, temperature=temperature, timeout=timeout, **retries)
+    elif provider == "standin":
+        llm = StandInChatModel(
+            response=agent_config.get("response", "Stand-in answer."),
+            latency=agent_config.get("latency", 0.0),
+            tail_latency=agent_config.get("tail_latency", 0.0),
+            tail_rate=agent_config.get("tail_rate", 0.0),
+        )
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}")
+    if agent_config.get("requests_per_minute") or agent_config.get("tokens_per_minute"):
+        llm = RateLimitedChatModel(
+            model=llm,
+            backend=f"{provider}:{model}",
+            requests_per_minute=agent_config.get("requests_per_minute"),
+            tokens_per_minute=agent_config.get("tokens_per_minute"),
+        )
+    return ResilientChatModel(model=llm, backend=f"{provider}:{model}", timeout=timeout) if resilient else llm
 
-# Load the YAML config file that defines LLM configurations for multiple agents
-config_path = os.path.join(os.path.dirname(__file__), "../..",os.getenv("CONFIG_FILE"))
-
-with open(os.path.abspath(config_path), "r") as f:
-    config = yaml.safe_load(f)
 
+_config: Optional[dict] = None
+_config_lock = threading.Lock()
 # Dictionary to store initialized LLMs per agent
-agents = {}
+_agents: Optional[dict] = None
+_agents_lock = threading.Lock()
 
-# Loop through each defined agent in the config and load its corresponding LLM
-for agent_name in config["llms"].keys():
-    agents[agent_name] = load_llm(config["llms"][agent_name])
+
+def get_config() -> dict:
+    """
+    Loads the YAML config file that defines LLM configurations for multiple agents, named
+    by the `CONFIG_FILE` environment variable (relative to the repository root), on first use.
+
+    Raises:
+    - RuntimeError if `CONFIG_FILE` is not set.
+    """
+    global _config
+    with _config_lock:
+        if _config is None:
+            if not os.getenv("CONFIG_FILE"):
+                raise RuntimeError("Set CONFIG_FILE to the config to use, e.g. config/config.anthropic.yaml")
+            config_path = os.path.join(os.path.dirname(__file__), "../..", os.getenv("CONFIG_FILE"))
+            with open(os.path.abspath(config_path), "r") as f:
+                _config = yaml.safe_load(f)
+    return _config
+
+
+def _load_agents() -> dict:
+    """Loads the LLM of each agent defined in the config, once."""
+    global _agents
+    config = get_config()
+    with _agents_lock:
+        if _agents is None:
+            _agents = {agent_name: load_llm(config["llms"][agent_name], resilient=True) for agent_name in config["llms"].keys()}
+    return _agents
 
 
 def get_agent(agent_name: str):
@@ -61,6 +162,17 @@ def get_agent(agent_name: str):
     Raises:
     - ValueError if the agent name is not found.
     """
+    agents = _load_agents()
     if agent_name not in agents:
         raise ValueError(f"Agent {agent_name} not found.")
-    return agents[agent_name]
\ No newline at end of file
+    return agents[agent_name]
+
+def get_tool_config(tool_name: str) -> dict:
+    """
+    Retrieves the settings of a tool from the optional `tools` section of the config.
+    Parameters:
+    - tool_name (str): The name of the tool as defined in the config (e.g. 'git').
+    Returns:
+    - A dictionary of settings, empty if the tool is not configured.
+    """
+    return (get_config().get("tools") or {}).get(tool_name) or {}
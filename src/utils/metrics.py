@@ -0,0 +1,43 @@
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """
+    Thread-safe counters collected while the graph runs (cache hits, time saved, ...).
+
+    Counters are plain numbers keyed by dotted names such as `git_cache.hits`.
+    A batch run resets them before starting and saves `summary()` when it finishes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+
+    def incr(self, name: str, value: float = 1):
+        """Adds `value` to the counter `name`."""
+        with self._lock:
+            self._values[name] += value
+
+    def snapshot(self) -> dict:
+        """Returns a copy of all counters."""
+        with self._lock:
+            return dict(self._values)
+
+    def summary(self) -> dict:
+        """Returns all counters plus a `<prefix>.hit_rate` for every prefix that has both hits and misses."""
+        values = self.snapshot()
+        prefixes = {name.rsplit(".", 1)[0] for name in values if name.endswith(".hits")}
+        for prefix in prefixes:
+            total = values.get(f"{prefix}.hits", 0) + values.get(f"{prefix}.misses", 0)
+            if total:
+                values[f"{prefix}.hit_rate"] = values.get(f"{prefix}.hits", 0) / total
+        return dict(sorted(values.items()))
+
+    def reset(self):
+        """Clears all counters."""
+        with self._lock:
+            self._values.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,294 @@
+import io
+import os
+import time
+import atexit
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from functools import wraps
+from typing import Optional
+
+from .metrics import metrics
+
+PROFILE_ENV = "LAPSUM_PROFILE"
+OUTPUT_DIR = os.path.join("data", "profiles")
+TOP_FUNCTIONS = 40
+MAX_STACK_DEPTH = 64
+
+
+def _settings() -> dict:
+    from .llm_loader import get_tool_config
+    return get_tool_config("profiling")
+
+
+def enabled() -> bool:
+    """Returns True if nodes should be profiled (`LAPSUM_PROFILE` or `tools.profiling.enabled`)."""
+    return bool(os.getenv(PROFILE_ENV)) or bool(_settings().get("enabled", False))
+
+
+class NodeStats:
+    """The aggregated profile of one node: calls, wall time, allocation peaks and merged cProfile stats."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self.total_peak_bytes = 0
+        self.stats: Optional[pstats.Stats] = None
+
+    def add(self, seconds: float, peak_bytes: int, profile: Optional[cProfile.Profile]):
+        self.calls += 1
+        self.seconds += seconds
+        self.peak_bytes = max(self.peak_bytes, peak_bytes)
+        self.total_peak_bytes += peak_bytes
+        if profile is None:
+            return
+        if self.stats is None:
+            self.stats = pstats.Stats(profile, stream=io.StringIO())
+        else:
+            self.stats.add(profile)
+
+    @property
+    def profiled_seconds(self) -> float:
+        """The time cProfile saw in the node's own thread, excluding nested profiled nodes."""
+        return self.stats.total_tt if self.stats is not None else 0.0
+
+
+class _Frame:
+    """A node running in the current thread: its profiler and the allocation peak seen so far."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.profiling = False
+        self.base_bytes = 0
+        self.peak_bytes = 0
+
+    def start(self):
+        try:
+            self.profile.enable()
+            self.profiling = True
+        except ValueError:
+            # Python 3.12+ allows one cProfile per process: a node concurrent with another
+            # thread's is timed but not profiled
+            metrics.incr("profiling.skipped")
+
+    def pause(self):
+        if self.profiling:
+            self.profile.disable()
+
+    def resume(self):
+        if not self.profiling:
+            return
+        try:
+            self.profile.enable()
+        except ValueError:
+            # Another thread's node took the process's profiler while this one was paused:
+            # the rest of this node is timed but not profiled
+            metrics.incr("profiling.skipped")
+
+
+class NodeProfiler:
+    """
+    Collects the profiles of graph nodes.
+
+    cProfile only sees the thread a node runs in: work it hands to other threads (tool
+    calls in `run_batch`, hedged LLM calls) shows up as the wait on them. When a profiled
+    node runs another (an agent subgraph inside an information node), the outer profile is
+    paused meanwhile, so every node's cProfile stats are its own; its wall time includes
+    the nested nodes. Allocation peaks are measured with tracemalloc, which is process-wide:
+    with nodes running concurrently in several threads they are approximate.
+    """
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.nodes: dict[str, NodeStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list[_Frame]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _traced_peak(self) -> int:
+        return tracemalloc.get_traced_memory()[1] if self.memory else 0
+
+    def wrap(self, node, name: str):
+        """Returns `node` wrapped so each of its calls is profiled under `name`."""
+        @wraps(node)
+        def run(state):
+            stack = self._stack()
+            if self.memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if stack:
+                outer = stack[-1]
+                outer.pause()
+                outer.peak_bytes = max(outer.peak_bytes, self._traced_peak())
+            frame = _Frame()
+            if self.memory:
+                frame.base_bytes = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+            stack.append(frame)
+            start = time.perf_counter()
+            frame.start()
+            try:
+                return node(state)
+            finally:
+                frame.pause()
+                seconds = time.perf_counter() - start
+                stack.pop()
+                peak = max(frame.peak_bytes, self._traced_peak()) - frame.base_bytes
+                if stack:
+                    outer = stack[-1]
+                    outer.peak_bytes = max(outer.peak_bytes, self._traced_peak())
+                    outer.resume()
+                with self._lock:
+                    if name not in self.nodes:
+                        self.nodes[name] = NodeStats(name)
+                    self.nodes[name].add(seconds, max(peak, 0), frame.profile if frame.profiling else None)
+                metrics.incr("profiling.calls")
+        return run
+
+    def reset(self):
+        """Drops the profiles collected so far (e.g. between the runs of a batch)."""
+        with self._lock:
+            self.nodes.clear()
+
+    def summary(self) -> str:
+        """Returns a table of the profiled nodes, slowest (total wall time) first."""
+        with self._lock:
+            nodes = sorted(self.nodes.values(), key=lambda n: n.seconds, reverse=True)
+        lines = [f"{'node':<40}{'calls':>8}{'total (s)':>12}{'mean (ms)':>12}{'profiled (s)':>14}{'peak (MB)':>12}{'mean peak (MB)':>16}"]
+        for n in nodes:
+            lines.append(
+                f"{n.name:<40}{n.calls:>8}{n.seconds:>12.2f}{n.seconds / n.calls * 1000:>12.1f}"
+                f"{n.profiled_seconds:>14.2f}{n.peak_bytes / 1e6:>12.2f}{n.total_peak_bytes / n.calls / 1e6:>16.2f}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self, directory: str, top: int = TOP_FUNCTIONS) -> list[str]:
+        """
+        Writes the reports of every profiled node into `directory`:
+
+        - `summary.txt`: the `summary()` table;
+        - `<node>.txt`: the node's `top` functions by cumulative and by own time;
+        - `<node>.prof`: its raw stats, for `pstats`, snakeviz or gprof2dot;
+        - `nodes.collapsed`: the stacks of all nodes, each rooted at its node, in the
+          collapsed format of flamegraph.pl, inferno and speedscope (microseconds).
+
+        Returns:
+            list[str]: The paths written.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            nodes = [n for n in self.nodes.values() if n.stats is not None]
+        paths = [os.path.join(directory, "summary.txt")]
+        with open(paths[0], "w", encoding="utf-8") as f:
+            f.write(self.summary())
+        with open(os.path.join(directory, "nodes.collapsed"), "w", encoding="utf-8") as collapsed:
+            for n in nodes:
+                file_name = n.name.replace("/", "_")
+                with open(os.path.join(directory, f"{file_name}.txt"), "w", encoding="utf-8") as f:
+                    f.write(f"{n.name}: {n.calls} calls, {n.seconds:.2f}s wall, peak {n.peak_bytes / 1e6:.2f} MB\n")
+                    for sort in ("cumulative", "tottime"):
+                        n.stats.stream = f
+                        n.stats.sort_stats(sort).print_stats(top)
+                n.stats.dump_stats(os.path.join(directory, f"{file_name}.prof"))
+                paths += [os.path.join(directory, f"{file_name}.txt"), os.path.join(directory, f"{file_name}.prof")]
+                for stack, micros in collapsed_stacks(n.stats):
+                    collapsed.write(f"{n.name};{stack} {micros}\n")
+        paths.append(os.path.join(directory, "nodes.collapsed"))
+        return paths
+
+
+def _label(func: tuple) -> str:
+    file_name, line, function = func
+    if file_name == "~":
+        return function  # Built-ins, e.g. <method 'execute' of 'sqlite3.Cursor' objects>
+    return f"{function} ({os.path.basename(file_name)}:{line})".replace(";", ",")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> list[tuple[str, int]]:
+    """
+    Rebuilds call stacks (`a;b;c`) and their own time in microseconds from cProfile stats.
+
+    cProfile records caller/callee pairs, not whole stacks: a function's time along a path
+    is apportioned by the share of its calls made from that path, as gprof-style tools do.
+    Recursion is cut where a function reappears in its own stack.
+    """
+    callees: dict[tuple, dict[tuple, float]] = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, {})[func] = cumulative
+    roots = [func for func, (_, _, _, _, callers) in stats.stats.items() if not callers]
+    stacks: dict[str, float] = {}
+
+    def walk(func: tuple, path: list[str], on_path: set, seconds: float):
+        _, _, own, cumulative, _ = stats.stats[func]
+        if cumulative <= 0 or seconds <= 0:
+            return
+        share = min(seconds / cumulative, 1.0)
+        path = path + [_label(func)]
+        stack = ";".join(path)
+        stacks[stack] = stacks.get(stack, 0.0) + own * share
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge in callees.get(func, {}).items():
+            if callee in on_path or callee not in stats.stats:
+                continue
+            walk(callee, path, on_path | {callee}, edge * share)
+
+    for root in roots:
+        walk(root, [], {root}, stats.stats[root][3])
+    return [(stack, round(seconds * 1e6)) for stack, seconds in stacks.items() if seconds * 1e6 >= 1]
+
+
+_profiler: Optional[NodeProfiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Optional[NodeProfiler]:
+    """
+    Returns the process-wide node profiler, or None if profiling is off. The first call
+    registers the reports to be written at exit, to `LAPSUM_PROFILE` or
+    `tools.profiling.output_dir`.
+    """
+    global _profiler
+    if not enabled():
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            settings = _settings()
+            _profiler = NodeProfiler(settings.get("memory", True))
+            atexit.register(write_reports)
+    return _profiler
+
+
+def profiled(node, name: str):
+    """
+    Returns `node` profiled under `name` if profiling is on, else `node` itself, so a
+    graph built with profiling off runs exactly as without this hook.
+
+    Profiling is turned on by the `LAPSUM_PROFILE` environment variable (the directory
+    the reports are written to) or by `tools.profiling.enabled`, and must be on when the
+    graphs are built (on import of `src.orchestration`):
+
+        LAPSUM_PROFILE=data/profiles CONFIG_FILE=config/config.anthropic.yaml python main.py
+    """
+    profiler = get_profiler()
+    return node if profiler is None else profiler.wrap(node, name)
+
+
+def write_reports(directory: Optional[str] = None) -> list[str]:
+    """Writes the profiles collected so far (see `NodeProfiler.write_reports`); nothing if profiling is off."""
+    if _profiler is None or not _profiler.nodes:
+        return []
+    settings = _settings()
+    directory = directory or os.getenv(PROFILE_ENV) or settings.get("output_dir") or OUTPUT_DIR
+    if directory in ("1", "true"):
+        directory = settings.get("output_dir") or OUTPUT_DIR
+    paths = _profiler.write_reports(os.path.expanduser(directory), settings.get("top", TOP_FUNCTIONS))
+    print(f"Wrote node profiles to {directory}")
+    return paths
@@ -128,6 +128,7 @@ system_prompts = {
 		- `uml_property`: represents class attributes/fields, with details like `dataType`, `visibility`, and `isStatic`.
 		- `uml_method`: contains information about methods/functions, including `returnType`, `parameters`, `visibility`, and method-level properties like `isStatic` and `isAbstract`.
 		- `uml_relationship`: describes relationships between classes (e.g., inheritance, association, composition, or usage dependencies).
+		- `file_history` (when available): version-control history per source file. `file` matches the file paths stored with the classes (e.g. the entries of a class's `files` list, use json_each to expand it), and each row has `commit_count`, `recent_churn` (lines added and deleted in the 90 days before the latest commit), `last_modified`, `last_author`, `top_author` and `top_authors` (a JSON list). Join it with the class tables to answer questions that mix code structure and history, such as which classes change most often or who owns a package.
 
 		Users will ask natural-language questions based on **available context information**, which may include:
 		- Class names, packages, or relationships they are examining.
@@ -141,6 +142,7 @@ system_prompts = {
 		- Do not explain the SQL logic.
 		- Only return the **final answer** as the response.
 		- DO NOT call any tool besides SubmitFinalAnswer to submit the result.
+		- If the question needs several independent queries, call the query tool once per query in the same turn; the queries run concurrently.
 		""",
 	"information_git": """
 		You are a version control analysis assistant collaborating with a software researcher.
@@ -152,8 +154,13 @@ system_prompts = {
         - All information must be derived from Git history via the provided tools.
 		- Generate only git commands not general shell commands
         
-        Available Tool:
-        - run_git_command(command): Run any git command against the local repo.
+        Available Tools:
+        - HistoryQuery(sql): Run a read-only SQLite query against a pre-built index of the repository's commit history. Prefer this tool whenever the question is about commits, authors, dates, touched files or line churn.
+          The index has the following tables:
+          - `commits(hash, author_name, author_email, authored_at, committed_at, subject)`: one row per commit reachable from HEAD. Timestamps are unix seconds; use datetime(committed_at, 'unixepoch') to format them.
+          - `file_changes(hash, path, added, deleted)`: one row per file touched by a commit, with the repository-relative `path` and the number of added/deleted lines (NULL for binary files).
+        - GitCommand(command): Run any git command against the local repo. Use it only for what the index cannot answer (e.g. diffs, blame, file contents, branches and tags).
+        If the question needs several independent lookups, call the tools once per lookup in the same turn; the calls run concurrently.
 
         Always refer to the repo using the path provided in 'repository_path'.
 	""", 
@@ -180,7 +187,8 @@ system_prompts = {
 			- The GitHub repository name
 			- Optional additional context (e.g., filenames, prior responses)
 
-			Your response must be a single, focused query that can be used to search GitHub metadata.
+			Each query must be a single, focused query that can be used to search GitHub metadata.
+			If the question needs several independent searches (e.g. issues and pull requests), submit one query per search in the same turn; they run concurrently.
 
 	""",
 	"information_docs": """
@@ -0,0 +1,195 @@
+import os
+import time
+import random
+import sqlite3
+import threading
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import get_buffer_string
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from .metrics import metrics
+from .retrieval import count_tokens
+from .resilience import DeadlineExceeded, time_left
+
+UTILIZATION = 0.95  # Fraction of the provider quota to use
+BURST_SECONDS = 10.0  # A bucket holds this many seconds of quota
+MAX_POLL = 1.0  # Longest sleep between two checks of a bucket
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    level REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def _settings() -> dict:
+    from .llm_loader import get_tool_config
+    try:
+        return get_tool_config("rate_limit")
+    except RuntimeError:
+        return {}  # No config loaded (e.g. the judge CLI): the defaults apply
+
+
+class RateLimiter:
+    """
+    Token buckets in a SQLite file, shared by every thread and process that opens it.
+
+    A backend (`<provider>:<model>`) has a bucket of requests and one of tokens, each
+    refilled continuously at `utilization` of its per-minute quota and holding at most
+    `burst_seconds` of it. Buckets are read, refilled and charged in one `BEGIN IMMEDIATE`
+    transaction, so concurrent processes never spend the same quota twice.
+
+    The limits are passed by each caller rather than stored: every process using a backend
+    should be configured with the same quota.
+    """
+
+    def __init__(self, db_path: str, utilization: float = UTILIZATION, burst_seconds: float = BURST_SECONDS):
+        self.db_path = db_path
+        self.utilization = utilization
+        self.burst_seconds = burst_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _bucket(self, per_minute: float) -> tuple[float, float]:
+        """Returns the refill rate (per second) and capacity of a bucket for a per-minute quota."""
+        rate = per_minute * self.utilization / 60
+        return rate, max(rate * self.burst_seconds, 1.0)
+
+    @staticmethod
+    def _level(conn: sqlite3.Connection, name: str, rate: float, capacity: float, now: float) -> float:
+        row = conn.execute("SELECT level, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return capacity
+        return min(capacity, row[0] + (now - row[1]) * rate)
+
+    def acquire(self, backend: str, tokens: int = 0, requests_per_minute: Optional[float] = None,
+                tokens_per_minute: Optional[float] = None) -> int:
+        """
+        Blocks until one request and `tokens` tokens of the backend's quota are available,
+        then charges them.
+
+        A request larger than the tokens bucket is charged the full bucket and waits for it
+        to be full. Raises `DeadlineExceeded` instead of waiting past the current deadline.
+
+        Returns:
+            int: The tokens charged, to pass to `settle` once the actual usage is known.
+        """
+        limits = []
+        if requests_per_minute:
+            limits.append((f"{backend}:requests", *self._bucket(requests_per_minute), 1.0))
+        if tokens_per_minute:
+            rate, capacity = self._bucket(tokens_per_minute)
+            tokens = min(tokens, int(capacity))
+            limits.append((f"{backend}:tokens", rate, capacity, float(tokens)))
+        if not limits:
+            return tokens
+
+        waited = 0.0
+        while True:
+            now = time.time()
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                levels = [self._level(conn, name, rate, capacity, now) for name, rate, capacity, _ in limits]
+                wait = max((cost - level) / rate for (_, rate, _, cost), level in zip(limits, levels))
+                if wait <= 0:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                        [(name, level - cost, now) for (name, _, _, cost), level in zip(limits, levels)],
+                    )
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+            if wait <= 0:
+                break
+            left = time_left()
+            if left is not None and wait > left:
+                metrics.incr("resilience.deadline_exceeded")
+                raise DeadlineExceeded(f"Rate limit of {backend} leaves no time before the deadline")
+            # Jittered, so processes woken by the same refill do not collide
+            delay = min(wait, MAX_POLL) * random.uniform(1.0, 1.2)
+            time.sleep(delay)
+            waited += delay
+
+        metrics.incr("rate_limit.requests")
+        metrics.incr("rate_limit.tokens", tokens)
+        if waited:
+            metrics.incr("rate_limit.waits")
+            metrics.incr("rate_limit.wait_seconds", waited)
+        return tokens
+
+    def settle(self, backend: str, charged: int, used: int, tokens_per_minute: Optional[float] = None):
+        """
+        Corrects the tokens bucket once a request's actual usage is known: unused estimated
+        tokens are refunded, and usage beyond the estimate is charged, delaying later requests.
+        """
+        if not tokens_per_minute or used == charged:
+            return
+        rate, capacity = self._bucket(tokens_per_minute)
+        name = f"{backend}:tokens"
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            level = self._level(conn, name, rate, capacity, now)
+            conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (name, min(level + charged - used, capacity), now))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        metrics.incr("rate_limit.tokens", used - charged)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the process-wide rate limiter configured by `tools.rate_limit` (defaults without a config)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            settings = _settings()
+            path = settings.get("path") or os.path.join("~", ".cache", "lapsum", "rate_limits.db")
+            _limiter = RateLimiter(
+                os.path.expanduser(path), settings.get("utilization", UTILIZATION), settings.get("burst_seconds", BURST_SECONDS),
+            )
+    return _limiter
+
+
+class RateLimitedChatModel(BaseChatModel):
+    """
+    Wraps a chat model so every call first takes one request and its estimated prompt
+    tokens from the shared quota of its `backend` (see `RateLimiter`), then settles the
+    tokens bucket with the usage the provider reports.
+    """
+
+    model: Any
+    backend: str
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "rate-limited"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"model": self.model.bind_tools(tools, **kwargs)})
+
+    def _generate(self, messages, stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        limiter = get_rate_limiter()
+        estimate = count_tokens(get_buffer_string(messages)) if self.tokens_per_minute else 0
+        charged = limiter.acquire(self.backend, estimate, self.requests_per_minute, self.tokens_per_minute)
+        message = self.model.invoke(messages, stop=stop, **kwargs)
+        usage = getattr(message, "usage_metadata", None)
+        if usage and usage.get("total_tokens"):
+            limiter.settle(self.backend, charged, usage["total_tokens"], self.tokens_per_minute)
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,322 @@
+import time
+import random
+import threading
+import contextvars
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional, TypeVar
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from .metrics import metrics
+
+T = TypeVar("T")
+
+ATTEMPTS = 4
+BASE_DELAY = 0.5
+MAX_DELAY = 20.0
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+RETRY_RATIO = 0.2
+MIN_RETRIES = 10
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+# Transient network and provider errors of requests, httpx and the LLM SDKs, by class name
+TRANSIENT_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError", "OverloadedError",
+    "ConnectError", "ConnectTimeout", "ReadTimeout", "ReadError", "RemoteProtocolError", "PoolTimeout",
+    "ConnectionError", "Timeout", "ChunkedEncodingError",
+}
+
+
+class ResilienceError(Exception):
+    """A call given up on without reaching the backend: see `DeadlineExceeded` and `CircuitOpenError`."""
+
+
+class DeadlineExceeded(ResilienceError):
+    """The question's deadline passed."""
+
+
+class CircuitOpenError(ResilienceError):
+    """The backend's circuit breaker is open after repeated failures."""
+
+
+def _settings() -> dict:
+    from .llm_loader import get_tool_config
+    return get_tool_config("resilience")
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """Returns the HTTP status of an SDK or `requests` error, if it has one."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Returns the seconds a server asked to wait before retrying, from the `Retry-After`
+    (seconds or HTTP date) or `retry-after-ms` headers of the error's response, or from
+    an exhausted `X-RateLimit-Reset` quota (GitHub).
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("Retry-After")
+        if value:
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+            return max(float(headers["X-RateLimit-Reset"]) - time.time(), 0.0) + 1
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Returns True for errors a later attempt may not hit: timeouts, dropped connections, rate limits and 5xx answers."""
+    if isinstance(error, ResilienceError):
+        return False
+    status = status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS or (status == 403 and retry_after(error) is not None)
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in TRANSIENT_ERRORS
+
+
+# Deadlines: the wall-clock time by which the current question must be answered, carried
+# by a context variable so it reaches every call made on its behalf (see `run_batch`).
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline_at(at: Optional[float]):
+    """Runs the body under a deadline (a `time.time()` value); an enclosing earlier deadline still applies."""
+    if at is None:
+        yield
+        return
+    current = _deadline.get()
+    token = _deadline.set(min(at, current) if current is not None else at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Returns the seconds left before the current deadline, or None if there is none."""
+    at = _deadline.get()
+    return None if at is None else at - time.time()
+
+
+def check_deadline(what: str = "call"):
+    """Raises `DeadlineExceeded` if the current deadline has passed."""
+    left = time_left()
+    if left is not None and left <= 0:
+        metrics.incr("resilience.deadline_exceeded")
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+
+def bounded_timeout(seconds: float) -> float:
+    """Returns a timeout of at most `seconds` that also ends at the current deadline."""
+    left = time_left()
+    return seconds if left is None else max(min(seconds, left), 0.001)
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a backend after `failure_threshold` consecutive transient failures.
+
+    While open, calls fail at once with `CircuitOpenError` instead of waiting on the
+    backend. After `reset_timeout` seconds one trial call is let through (half-open): its
+    success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self):
+        """Raises `CircuitOpenError` unless a call may go to the backend now."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self._trial:
+                self._trial = True
+                return
+        metrics.incr("resilience.circuit_open")
+        raise CircuitOpenError(f"{self.name} is unavailable: {self.failures} consecutive failures")
+
+    def record_success(self):
+        with self._lock:
+            self.failures, self.opened_at, self._trial = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial:
+                    metrics.incr("resilience.circuit_opened")
+                self.opened_at, self._trial = time.monotonic(), False
+
+
+class RetryBudget:
+    """
+    Caps retries to a backend at `ratio` of its calls (plus `min_retries` in reserve), so
+    retries cannot multiply the load on a backend that is already failing.
+    """
+
+    def __init__(self, ratio: float = RETRY_RATIO, min_retries: int = MIN_RETRIES):
+        self.ratio = ratio
+        self.capacity = float(min_retries)
+        self.tokens = float(min_retries)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Credits one call."""
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio, self.capacity)
+
+    def withdraw(self) -> bool:
+        """Takes one retry from the budget; returns False if it is spent."""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    """Up to `attempts` tries, with full-jitter exponential backoff between them (`Retry-After` wins when longer)."""
+
+    def __init__(self, attempts: int = ATTEMPTS, base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, retry: int, error: BaseException) -> float:
+        """Returns the seconds to wait before retry number `retry` (0-based) after `error`."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        hint = retry_after(error)
+        return max(delay, hint) if hint is not None else delay
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "RetryPolicy":
+        return cls(settings.get("attempts", ATTEMPTS), settings.get("base_delay", BASE_DELAY), settings.get("max_delay", MAX_DELAY))
+
+
+def get_retry_policy(**overrides) -> RetryPolicy:
+    """Returns the retry policy configured by `tools.resilience`, with `overrides` (e.g. `attempts`) applied."""
+    return RetryPolicy.from_settings({**_settings(), **overrides})
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_budgets: dict[str, RetryBudget] = {}
+_registry_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Returns the process-wide circuit breaker of a backend, configured by `tools.resilience`."""
+    with _registry_lock:
+        if name not in _breakers:
+            settings = _settings()
+            _breakers[name] = CircuitBreaker(name, settings.get("failure_threshold", FAILURE_THRESHOLD), settings.get("reset_timeout", RESET_TIMEOUT))
+        return _breakers[name]
+
+
+def get_retry_budget(name: str) -> RetryBudget:
+    """Returns the process-wide retry budget of a backend, configured by `tools.resilience`."""
+    with _registry_lock:
+        if name not in _budgets:
+            settings = _settings()
+            _budgets[name] = RetryBudget(settings.get("retry_ratio", RETRY_RATIO), settings.get("min_retries", MIN_RETRIES))
+        return _budgets[name]
+
+
+def resilient_call(name: str, fn: Callable[[], T], policy: Optional[RetryPolicy] = None) -> T:
+    """
+    Calls `fn` on behalf of the backend `name` (e.g. `anthropic:claude-3-7-sonnet-20250219`
+    or `github`), retrying transient failures.
+
+    Each attempt must pass the current deadline and the backend's circuit breaker. Retries
+    wait with jittered exponential backoff (or as long as `Retry-After` asks), and stop when
+    the attempts, the backend's retry budget or the time left before the deadline run out;
+    the last error is then raised. Errors that are not transient (e.g. a 400) are raised at once.
+    """
+    policy = policy or get_retry_policy()
+    breaker, budget = get_circuit_breaker(name), get_retry_budget(name)
+    budget.deposit()
+    retry = 0
+    while True:
+        check_deadline(name)
+        breaker.allow()
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.record_success()  # The backend answered; the request itself was wrong
+                raise
+            breaker.record_failure()
+            metrics.incr("resilience.failures")
+            if retry + 1 >= policy.attempts:
+                raise
+            if not budget.withdraw():
+                metrics.incr("resilience.budget_exhausted")
+                raise
+            delay = policy.backoff(retry, e)
+            left = time_left()
+            if left is not None and delay >= left:
+                metrics.incr("resilience.deadline_exceeded")
+                raise DeadlineExceeded(f"{name} failed and the deadline leaves no time to retry: {e}") from e
+            metrics.incr("resilience.retries")
+            time.sleep(delay)
+            retry += 1
+            continue
+        breaker.record_success()
+        return result
+
+
+class ResilientChatModel(BaseChatModel):
+    """
+    Wraps a chat model so every call goes through `resilient_call` under the name of its
+    `backend`. Tool bindings share the backend's circuit breaker and retry budget. With a
+    `timeout`, each attempt is sent with a request timeout of at most that many seconds,
+    cut to the time left before the deadline.
+    """
+
+    model: Any
+    backend: str
+    timeout: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "resilient"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"model": self.model.bind_tools(tools, **kwargs)})
+
+    def _generate(self, messages, stop: Optional[list[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        def call():
+            if self.timeout is None:
+                return self.model.invoke(messages, stop=stop, **kwargs)
+            return self.model.invoke(messages, stop=stop, **{**kwargs, "timeout": bounded_timeout(self.timeout)})
+
+        message = resilient_call(self.backend, call)
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,110 @@
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+MAX_ROWS = 50
+MAX_CHARS = 8000
+
+
+@dataclass
+class ToolResult:
+    """
+    The structured result of one tool call made by an information agent.
+
+    Agents attach these to their response message (`response_metadata["results"]`), so
+    the response stage can render rows and text compactly and within a budget instead of
+    re-parsing a flattened string.
+
+    Attributes:
+        source (str): The tool that produced it (`sql`, `git`, `git_history`, `github`).
+        query (str): The SQL query, git command or search that was run.
+        columns (list[str]): Column names of tabular results.
+        rows (list[list]): Result rows of tabular results.
+        text (str): Output of free-text results (e.g. git stdout).
+        total (Optional[int]): The number of matching rows, when more exist than were fetched.
+        truncated (bool): Whether rows or text were cut off at the source.
+        notice (str): A note on how the result was truncated.
+        error (Optional[str]): The error message if the call failed.
+    """
+    source: str
+    query: str = ""
+    columns: list[str] = field(default_factory=list)
+    rows: list[list] = field(default_factory=list)
+    text: str = ""
+    total: Optional[int] = None
+    truncated: bool = False
+    notice: str = ""
+    error: Optional[str] = None
+
+    @property
+    def is_table(self) -> bool:
+        return bool(self.columns)
+
+    def render(self, max_rows: int = MAX_ROWS, max_chars: int = MAX_CHARS) -> str:
+        """Formats the result for an LLM: tab-separated rows with a header, or the text, within the budget."""
+        if self.error:
+            return f"Error: {self.error}"
+        if self.is_table and not self.rows:
+            text = "No rows found."
+        elif self.is_table:
+            lines = ["\t".join(self.columns)]
+            lines += ["\t".join("" if v is None else str(v) for v in row) for row in self.rows[:max_rows]]
+            text = "\n".join(lines)
+            if len(self.rows) > max_rows or self.truncated:
+                total = f"{self.total}" if self.total else f"more than {len(self.rows)}" if self.truncated else f"{len(self.rows)}"
+                text += f"\n... showing {min(len(self.rows), max_rows)} of {total} rows"
+        else:
+            text = self.text.strip()
+            if self.notice:
+                text = f"{text}\n\n{self.notice}"
+        if len(text) > max_chars:
+            text = text[:max_chars].rsplit("\n", 1)[0] + f"\n... [cut at {max_chars} characters]"
+        return text
+
+    def compact(self, max_rows: int = MAX_ROWS, max_chars: int = MAX_CHARS) -> "ToolResult":
+        """Returns a copy cut down to what `render` shows with the same budget, for keeping it around."""
+        if len(self.rows) <= max_rows and len(self.text) <= max_chars:
+            return self
+        return ToolResult(
+            source=self.source, query=self.query, columns=self.columns, rows=self.rows[:max_rows],
+            text=self.text[:max_chars], total=self.total or (len(self.rows) if len(self.rows) > max_rows else None),
+            truncated=True, notice=self.notice, error=self.error,
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ToolResult":
+        return cls(**data)
+
+
+def invoke_tool(tool, args: dict) -> ToolResult:
+    """Invokes a `content_and_artifact` LangChain tool and returns the `ToolResult` it produced."""
+    message = tool.invoke({"type": "tool_call", "name": tool.name, "args": args, "id": tool.name})
+    return message.artifact
+
+
+def render_results(results: list[ToolResult], max_rows: int = MAX_ROWS, max_chars: int = MAX_CHARS) -> str:
+    """Renders several results, splitting the character budget between them."""
+    if len(results) == 1:
+        return results[0].render(max_rows, max_chars)
+    budget = max(max_chars // max(len(results), 1), 500)
+    return "\n\n".join(
+        f"Call {i}: {result.source}: {result.query}\nResult:\n{result.render(max_rows, budget)}"
+        for i, result in enumerate(results, start=1)
+    )
+
+
+def result_message(results: list[ToolResult], content: Optional[str] = None) -> AIMessage:
+    """Wraps results in an `AIMessage` carrying them in `response_metadata["results"]`."""
+    return AIMessage(
+        content=content if content is not None else render_results(results),
+        response_metadata={"results": [r.to_dict() for r in results]},
+    )
+
+
+def get_results(message: BaseMessage) -> list[ToolResult]:
+    """Returns the results attached to a message by `result_message`, if any."""
+    return [ToolResult.from_dict(r) for r in (getattr(message, "response_metadata", None) or {}).get("results", [])]
@@ -0,0 +1,221 @@
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Optional
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+STOP_WORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "with", "by", "and", "or", "is", "are", "was", "were",
+    "be", "it", "this", "that", "as", "at", "from", "how", "what", "which", "do", "does", "can", "i",
+}
+
+_encoding = None
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cases text and splits it into word tokens, dropping stop words."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts the LLM tokens of a text with tiktoken's `cl100k_base` encoding, or estimates
+    them as one token per four characters if the encoding cannot be loaded (e.g. offline).
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+class BM25:
+    """
+    Okapi BM25 over a fixed list of documents, scored with NumPy.
+
+    Postings are kept as one array of document ids and one of term frequencies per term,
+    so scoring a query only touches the documents containing its terms.
+    """
+
+    def __init__(self, documents: list[list[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.doc_len = np.array([len(d) for d in documents], dtype=np.float32)
+        self.avg_len = float(self.doc_len.mean()) if len(documents) else 0.0
+        postings: dict[str, tuple[list, list]] = {}
+        for doc_id, doc in enumerate(documents):
+            for term, tf in Counter(doc).items():
+                ids, tfs = postings.setdefault(term, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+        self.postings = {
+            term: (np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.float32)) for term, (ids, tfs) in postings.items()
+        }
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings[term][0]) if term in self.postings else 0
+        n = len(self.doc_len)
+        return float(np.log(1 + (n - df + 0.5) / (df + 0.5)))
+
+    def scores(self, query: list[str]) -> np.ndarray:
+        """Returns the BM25 score of every document for a tokenized query."""
+        scores = np.zeros(len(self.doc_len), dtype=np.float32)
+        if not len(self.doc_len):
+            return scores
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / max(self.avg_len, 1e-9))
+        for term in set(query):
+            if term not in self.postings:
+                continue
+            ids, tfs = self.postings[term]
+            scores[ids] += self.idf(term) * tfs * (self.k1 + 1) / (tfs + norm[ids])
+        return scores
+
+    def top_k(self, query: list[str], k: int) -> list[int]:
+        """Returns the ids of the `k` best-scoring documents with a positive score."""
+        scores = self.scores(query)
+        if not len(scores):
+            return []
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        return [int(i) for i in best[np.argsort(-scores[best])] if scores[i] > 0]
+
+
+class HashingEmbedder:
+    """
+    A dependency-free embedder hashing word unigrams and bigrams into a fixed-size,
+    L2-normalized vector. It needs no model or network, which keeps indexing offline.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _embed(self, text: str) -> np.ndarray:
+        tokens = tokenize(text)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feature.encode())
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
+        return np.stack([self._embed(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._embed(text)
+
+
+class LangChainEmbedder:
+    """Wraps a LangChain `Embeddings` model so it returns normalized NumPy arrays."""
+
+    def __init__(self, embeddings, name: str):
+        self.embeddings = embeddings
+        self.name = name
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
+        return self._normalize(np.array(self.embeddings.embed_documents(texts), dtype=np.float32))
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._normalize(np.array(self.embeddings.embed_query(text), dtype=np.float32))
+
+
+def default_embedding() -> str:
+    """
+    Returns the embedding used when `tools.docs.embedding` is not set: OpenAI's
+    `text-embedding-3-small` when `OPENAI_API_KEY` is set, else the offline `hashing`
+    fallback, whose vectors only match shared words, not meaning.
+    """
+    return "openai:text-embedding-3-small" if os.getenv("OPENAI_API_KEY") else "hashing"
+
+
+def get_embedder(spec: Optional[str] = None):
+    """
+    Returns the embedder named by a `tools.docs.embedding` setting.
+
+    Args:
+        spec (Optional[str]): `hashing`, `hashing:<dim>` or `openai:<model>`, or the name
+            an embedder records in an index manifest (e.g. `hashing-512`). Defaults to
+            `default_embedding()`.
+    """
+    spec = spec or default_embedding()
+    kind, _, arg = spec.partition(":")
+    if kind.startswith("hashing-"):
+        kind, arg = "hashing", kind[len("hashing-"):]
+    if kind == "hashing":
+        return HashingEmbedder(int(arg) if arg else 512)
+    if kind == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        model = arg or "text-embedding-3-small"
+        return LangChainEmbedder(OpenAIEmbeddings(model=model), spec)
+    raise ValueError(f"Unsupported embedding: {spec}")
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = 60) -> list[int]:
+    """Merges several ranked id lists, scoring each id by the sum of 1 / (k + rank)."""
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda d: -scores[d])
+
+
+def split_passages(text: str, max_words: int = 120) -> list[str]:
+    """Splits text into paragraphs, breaking paragraphs longer than `max_words` at sentence ends."""
+    passages = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        if not words:
+            continue
+        if len(words) <= max_words:
+            passages.append(" ".join(words))
+            continue
+        current = []
+        for sentence in re.split(r"(?<=[.!?])\s+", " ".join(words)):
+            if current and len(current) + len(sentence.split()) > max_words:
+                passages.append(" ".join(current))
+                current = []
+            current.extend(sentence.split())
+        if current:
+            passages.append(" ".join(current))
+    return passages
+
+
+def compress_passages(query: str, text: str, max_tokens: int = 1500, duplicate_threshold: float = 0.9) -> str:
+    """
+    Extracts the passages of a retrieved text that best answer a query, within a token budget.
+
+    Passages are scored with BM25 against the query, near-duplicates (cosine similarity of
+    hashed embeddings above `duplicate_threshold`) are dropped, and the best passages are
+    kept until `max_tokens` is reached. The kept passages are returned in their original order.
+    """
+    passages = split_passages(text)
+    if count_tokens(text) <= max_tokens or len(passages) <= 1:
+        return text
+
+    scores = BM25([tokenize(p) for p in passages]).scores(tokenize(query))
+    vectors = HashingEmbedder().embed_documents(passages)
+    kept, kept_vectors, used = [], [], 0
+    for i in np.argsort(-scores, kind="stable"):
+        if kept_vectors and float(np.max(np.stack(kept_vectors) @ vectors[i])) > duplicate_threshold:
+            continue
+        tokens = count_tokens(passages[i])
+        if used + tokens > max_tokens:
+            if kept:
+                continue
+        kept.append(int(i))
+        kept_vectors.append(vectors[i])
+        used += tokens
+    return "\n\n".join(passages[i] for i in sorted(kept))
@@ -6,6 +6,16 @@ from .data_models import UMLClassDiagram
 def identity(a, b):
     return b
 
+MEMO_ENTRIES = 64
+
+def merge_memo(a, b):
+    """Merges session memo entries, keeping the `MEMO_ENTRIES` most recently written or used."""
+    merged = dict(a or {})
+    for key, value in (b or {}).items():
+        merged.pop(key, None)
+        merged[key] = value
+    return dict(list(merged.items())[-MEMO_ENTRIES:])
+
 class State(TypedDict):
     # User input
     user_query: Annotated[list[HumanMessage], add_messages]
@@ -13,27 +23,41 @@ class State(TypedDict):
     # Project config
     source_db: Annotated[Optional[HumanMessage], identity]
     repository_path: Annotated[Optional[HumanMessage], identity]
+    # Prebuilt, read-only commit-history index of the repository (a project bundle's)
+    history_db: Annotated[Optional[str], identity]
     github_url: Annotated[Optional[HumanMessage], identity]
     docs_source: Annotated[Optional[HumanMessage], identity]
     docs_source_type: Annotated[Optional[HumanMessage], identity]
 
     # Agent input queries
-    source_query: Annotated[list[HumanMessage], add_messages]
-    git_query: Annotated[list[HumanMessage], add_messages]
-    github_query: Annotated[list[HumanMessage], add_messages]
-    docs_query: Annotated[list[HumanMessage], add_messages]
+    # (query and response channels are replaced whole by the node that owns them, so bulky
+    # tool outputs are not re-merged by add_messages on every step)
+    source_query: Annotated[list[HumanMessage], identity]
+    git_query: Annotated[list[HumanMessage], identity]
+    github_query: Annotated[list[HumanMessage], identity]
+    docs_query: Annotated[list[HumanMessage], identity]
 
     # Agent outputs
-    supervisor_response: Annotated[Optional[list[BaseMessage]], add_messages]
-    source_response: Annotated[Optional[list[BaseMessage]], add_messages]
-    git_response: Annotated[Optional[list[BaseMessage]], add_messages]
-    github_response: Annotated[Optional[list[BaseMessage]], add_messages]
-    docs_response: Annotated[Optional[list[BaseMessage]], add_messages]
+    supervisor_response: Annotated[Optional[list[BaseMessage]], identity]
+    source_response: Annotated[Optional[list[BaseMessage]], identity]
+    git_response: Annotated[Optional[list[BaseMessage]], identity]
+    github_response: Annotated[Optional[list[BaseMessage]], identity]
+    docs_response: Annotated[Optional[list[BaseMessage]], identity]
 
     # Final output
     final_response: Annotated[Optional[HumanMessage], identity]
+
+    # Session (checkpointed multi-turn) state: evidence from the previous turn, and the
+    # text of the responses to the session's latest agent sub-queries
+    context: Annotated[list[BaseMessage], identity]
+    memo: Annotated[dict, merge_memo]
+
+    # Wall-clock time (time.time()) by which the information agents must be done, set by
+    # the supervisor from `tools.resilience.deadline`
+    deadline: Annotated[Optional[float], identity]
     
     information_round: Annotated[int, identity]
+    rounds: Annotated[int, identity]
     information_done: Annotated[Set[str], identity]
     run_git: Annotated[Optional[bool], identity]
     run_github: Annotated[Optional[bool], identity]